@@ -16,6 +16,8 @@ DEFAULT_TAGS_MANIFEST = Path("data/tags/defined_tags.json")
 DEFAULT_MEALS_DIR = Path("data/meals")
 DEFAULT_MANIFEST_PATH = Path("resolver/meals/meals_manifest.json")
 DEFAULT_PARQUET_PATH = Path("resolver/meals/meals_manifest.parquet")
+# Schema metadata key read by the server's Parquet manifest backend.
+PARQUET_HEADER_KEY = "yummi.manifest_header"
 
 ALWAYS_REQUIRED_MEAL_CATEGORIES = {
     "Diet",
@@ -176,15 +178,34 @@ def flatten_meal_rows(
         "tags_json": json.dumps(meal.get("meal_tags") or {}, ensure_ascii=False, sort_keys=True),
         "ingredients_json": json.dumps(meal.get("final_ingredients") or meal.get("ingredients") or [], ensure_ascii=False),
         "metadata_json": json.dumps(meal.get("metadata") or {}, ensure_ascii=False),
+        # Remaining meal fields so the server can load the manifest straight from Parquet.
+        "description": meal.get("description"),
+        "prep_steps_json": json.dumps(meal.get("prep_steps") or [], ensure_ascii=False),
+        "cook_steps_json": json.dumps(meal.get("cook_steps") or [], ensure_ascii=False),
+        "instructions_json": json.dumps(meal.get("instructions") or [], ensure_ascii=False),
+        "source_ingredients_json": json.dumps(meal.get("ingredients") or [], ensure_ascii=False),
+        "final_ingredients_json": json.dumps(meal.get("final_ingredients") or [], ensure_ascii=False),
+        "product_matches_json": json.dumps(meal.get("product_matches") or [], ensure_ascii=False),
+        "warnings_json": json.dumps(meal.get("warnings") or [], ensure_ascii=False),
     }
 
 
+def build_parquet_header(manifest: dict[str, Any]) -> dict[str, Any]:
+    """Manifest fields and archetype blocks (without meals) stored as Parquet schema metadata."""
+    header = {key: value for key, value in manifest.items() if key != "archetypes"}
+    header["archetypes"] = [
+        {key: value for key, value in archetype.items() if key != "meals"}
+        for archetype in manifest.get("archetypes", [])
+    ]
+    return header
+
+
 def write_json(path: Path, payload: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
 
 
-def write_parquet(path: Path, rows: list[dict[str, Any]]) -> bool:
+def write_parquet(path: Path, rows: list[dict[str, Any]], header: dict[str, Any] | None = None) -> bool:
     if not rows:
         return False
     try:
@@ -194,6 +215,10 @@ def write_parquet(path: Path, rows: list[dict[str, Any]]) -> bool:
         print("[warn] pyarrow not available; skipping Parquet output")
         return False
     table = pa.Table.from_pylist(rows)
+    if header is not None:
+        table = table.replace_schema_metadata(
+            {PARQUET_HEADER_KEY: json.dumps(header, ensure_ascii=False)}
+        )
     path.parent.mkdir(parents=True, exist_ok=True)
     pq.write_table(table, path)
     return True
@@ -215,7 +240,6 @@ def main(argv: Iterable[str] | None = None) -> None:
 
     archetypes_payload: dict[str, dict[str, Any]] = {}
     manifest_warnings: list[str] = []
-    parquet_rows: list[dict[str, Any]] = []
 
     for meal in meals:
         archetype_uid = meal.get("archetype_uid")
@@ -236,7 +260,6 @@ def main(argv: Iterable[str] | None = None) -> None:
         manifest_warnings.extend(
             f"{meal_block.get('meal_id')}: {note}" for note in meal_warnings if note not in ("", None)
         )
-        parquet_rows.append(flatten_meal_rows(manifest_id, archetype_entry, meal_block))
 
     archetype_list = sorted(archetypes_payload.values(), key=lambda item: item.get("uid") or "")
     for entry in archetype_list:
@@ -263,7 +286,11 @@ def main(argv: Iterable[str] | None = None) -> None:
     write_json(Path(args.manifest_path), manifest)
     print(f"[ok] Wrote manifest to {args.manifest_path}")
     if not args.skip_parquet:
-        if write_parquet(Path(args.parquet_path), parquet_rows):
+        # Flatten the finished manifest so rows keep its archetype and meal order.
+        parquet_rows = [
+            flatten_meal_rows(manifest_id, entry, meal) for entry in archetype_list for meal in entry.get("meals", [])
+        ]
+        if write_parquet(Path(args.parquet_path), parquet_rows, build_parquet_header(manifest)):
             print(f"[ok] Wrote Parquet rows to {args.parquet_path}")
 
 
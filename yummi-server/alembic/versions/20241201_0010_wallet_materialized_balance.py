@@ -0,0 +1,60 @@
+"""Materialize wallet balances on the account state.
+
+Revision ID: 4d2c8e71b0f5
+Revises: 1f3b5a4a9c22
+Create Date: 2025-12-01 09:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4d2c8e71b0f5"
+down_revision = "1f3b5a4a9c22"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "wallet_account_states",
+        sa.Column("balance_minor", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "wallet_account_states",
+        sa.Column("currency", sa.String(length=3), nullable=False, server_default="ZAR"),
+    )
+
+    # Every user with ledger entries needs a state row before the backfill.
+    op.execute(
+        """
+        INSERT INTO wallet_account_states (user_id, spend_blocked)
+        SELECT DISTINCT t.user_id, false
+        FROM wallet_transactions t
+        WHERE NOT EXISTS (
+            SELECT 1 FROM wallet_account_states s WHERE s.user_id = t.user_id
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE wallet_account_states s
+        SET balance_minor = ledger.balance_minor,
+            currency = ledger.currency
+        FROM (
+            SELECT user_id,
+                   SUM(CASE WHEN entry_type = 'credit' THEN amount_minor ELSE -amount_minor END) AS balance_minor,
+                   MAX(currency) AS currency
+            FROM wallet_transactions
+            GROUP BY user_id
+        ) AS ledger
+        WHERE s.user_id = ledger.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("wallet_account_states", "currency")
+    op.drop_column("wallet_account_states", "balance_minor")
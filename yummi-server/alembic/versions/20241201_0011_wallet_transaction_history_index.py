@@ -0,0 +1,32 @@
+"""Composite index for keyset wallet history.
+
+Revision ID: 9a61f0c3d7e2
+Revises: 4d2c8e71b0f5
+Create Date: 2025-12-01 09:30:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9a61f0c3d7e2"
+down_revision = "4d2c8e71b0f5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_wallet_transactions_user_created",
+        "wallet_transactions",
+        ["user_id", sa.text("created_at DESC"), "id"],
+    )
+    # The composite index leads with user_id, so the single-column one is redundant.
+    op.drop_index("ix_wallet_transactions_user_id", table_name="wallet_transactions")
+
+
+def downgrade() -> None:
+    op.create_index("ix_wallet_transactions_user_id", "wallet_transactions", ["user_id"])
+    op.drop_index("ix_wallet_transactions_user_created", table_name="wallet_transactions")
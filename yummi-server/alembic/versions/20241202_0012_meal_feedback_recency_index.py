@@ -0,0 +1,29 @@
+"""Composite recency index for meal feedback events.
+
+Revision ID: e3b7c5a90d14
+Revises: 9a61f0c3d7e2
+Create Date: 2025-12-02 10:00:00
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e3b7c5a90d14"
+down_revision = "9a61f0c3d7e2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_meal_feedback_events_user_recency",
+        "meal_feedback_events",
+        ["user_id", sa.text("occurred_at DESC"), sa.text("created_at DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_meal_feedback_events_user_recency", table_name="meal_feedback_events")
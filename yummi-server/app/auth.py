@@ -1,39 +1,142 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import threading
 import time
+from collections import OrderedDict
 from typing import Any, Dict, Optional
 
 import httpx
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt
 
 from .config import get_settings
 
 
+logger = logging.getLogger(__name__)
+
 _http = httpx.Client(timeout=5)
 _bearer = HTTPBearer(auto_error=False)
 
+JWKS_TTL_SECONDS = 600
+# Unknown kids force a refresh (key rotation), but not more often than this.
+JWKS_MIN_FORCED_REFRESH_SECONDS = 30
+
 
 class JWKSCache:
+    """Signing keys with stale-while-revalidate refresh.
+
+    Once the TTL lapses, callers keep getting the previous key set while a
+    single background thread refetches it; only the very first load (or a
+    forced refresh for an unknown ``kid``) blocks, and concurrent callers
+    share that one fetch.
+    """
+
     def __init__(self) -> None:
         self._jwks: Optional[Dict[str, Any]] = None
+        self._url: Optional[str] = None
         self._exp_ts: float = 0.0
+        self._fetched_at: float = 0.0
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
 
-    def get(self, url: str) -> Dict[str, Any]:
+    def get(self, url: str, *, force: bool = False) -> Dict[str, Any]:
         now = time.time()
-        if self._jwks is None or now >= self._exp_ts:
-            resp = _http.get(url)
-            resp.raise_for_status()
-            self._jwks = resp.json()
-            # cache for 10 minutes
-            self._exp_ts = now + 600
-        return self._jwks  # type: ignore[return-value]
+        jwks = self._jwks
+        if jwks is None or self._url != url:
+            return self._fetch_blocking(url, fetched_before=now)
+        if force and now - self._fetched_at >= JWKS_MIN_FORCED_REFRESH_SECONDS:
+            return self._fetch_blocking(url, fetched_before=now)
+        if now >= self._exp_ts:
+            self._refresh_in_background(url)
+        return jwks
+
+    def _fetch_blocking(self, url: str, *, fetched_before: float) -> Dict[str, Any]:
+        with self._fetch_lock:
+            # Another caller may have completed the fetch while we waited.
+            if self._jwks is not None and self._url == url and self._fetched_at >= fetched_before:
+                return self._jwks
+            return self._fetch(url)
+
+    def _fetch(self, url: str) -> Dict[str, Any]:
+        resp = _http.get(url)
+        resp.raise_for_status()
+        jwks = resp.json()
+        now = time.time()
+        self._jwks, self._url = jwks, url
+        self._fetched_at = now
+        self._exp_ts = now + JWKS_TTL_SECONDS
+        return jwks
+
+    def _refresh_in_background(self, url: str) -> None:
+        with self._fetch_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run() -> None:
+            try:
+                with self._fetch_lock:
+                    if time.time() >= self._exp_ts:
+                        self._fetch(url)
+            except Exception as exc:
+                # Keep serving the stale keys; retry on a later request.
+                logger.warning("JWKS refresh failed: %s", exc)
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, name="jwks-refresh", daemon=True).start()
 
 
 _jwks_cache = JWKSCache()
 
 
+class VerifiedTokenCache:
+    """Bounded LRU of verified claims keyed by token hash, valid until ``exp``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= now:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, key: str, claims: Dict[str, Any]) -> None:
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or exp <= time.time():
+            return
+        max_entries = get_settings().auth_token_cache_max_entries
+        with self._lock:
+            self._entries[key] = (float(exp), claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_verified_tokens = VerifiedTokenCache()
+
+
 def _verify_jwt(token: str) -> Dict[str, Any]:
     settings = get_settings()
     if settings.auth_disable_verification:
@@ -46,6 +149,11 @@ def _verify_jwt(token: str) -> Dict[str, Any]:
     if not settings.clerk_issuer:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Auth issuer not configured")
 
+    cache_key = VerifiedTokenCache.key(token)
+    cached = _verified_tokens.get(cache_key)
+    if cached is not None:
+        return cached
+
     jwks_url = settings.clerk_jwks_url or settings.clerk_issuer.rstrip("/") + "/.well-known/jwks.json"
     jwks = _jwks_cache.get(jwks_url)
 
@@ -53,6 +161,9 @@ def _verify_jwt(token: str) -> Dict[str, Any]:
         unverified = jwt.get_unverified_header(token)
         kid = unverified.get("kid")
         key = next((k for k in jwks.get("keys", []) if k.get("kid") == kid), None)
+        if not key:
+            jwks = _jwks_cache.get(jwks_url, force=True)
+            key = next((k for k in jwks.get("keys", []) if k.get("kid") == kid), None)
         if not key:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Signing key not found")
         claims = jwt.decode(
@@ -62,6 +173,7 @@ def _verify_jwt(token: str) -> Dict[str, Any]:
             audience=settings.clerk_audience,
             issuer=settings.clerk_issuer,
         )
+        _verified_tokens.put(cache_key, claims)
         return claims
     except HTTPException:
         raise
@@ -69,11 +181,20 @@ def _verify_jwt(token: str) -> Dict[str, Any]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"JWT verification failed: {e}")
 
 
-def get_current_principal(creds: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> Dict[str, Any]:
-    if not creds or not creds.scheme.lower() == "bearer":
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
-    token = creds.credentials
-    claims = _verify_jwt(token)
+def cached_claims_for_token(token: str) -> Optional[Dict[str, Any]]:
+    """Claims for a token this process has already verified, without re-verifying.
+
+    In dev mode (verification disabled) the unverified claims are returned.
+    """
+    if get_settings().auth_disable_verification:
+        try:
+            return jwt.get_unverified_claims(token)
+        except Exception:
+            return None
+    return _verified_tokens.get(VerifiedTokenCache.key(token))
+
+
+def _principal_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
     # normalize common fields
     principal = {
         "sub": claims.get("sub"),
@@ -84,3 +205,30 @@ def get_current_principal(creds: Optional[HTTPAuthorizationCredentials] = Depend
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token: no sub")
     return principal
 
+
+def _bearer_token(creds: Optional[HTTPAuthorizationCredentials]) -> str:
+    if not creds or not creds.scheme.lower() == "bearer":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
+    return creds.credentials
+
+
+def get_current_principal(creds: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> Dict[str, Any]:
+    token = _bearer_token(creds)
+    return _principal_from_claims(_verify_jwt(token))
+
+
+async def get_current_principal_async(
+    creds: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Dict[str, Any]:
+    """Async variant: cached tokens resolve on the event loop without a threadpool hop.
+
+    Cache misses (RSA verification, possibly a blocking JWKS fetch) still run
+    in the threadpool so they never stall the loop.
+    """
+    token = _bearer_token(creds)
+    claims = None
+    if not get_settings().auth_disable_verification:
+        claims = _verified_tokens.get(VerifiedTokenCache.key(token))
+    if claims is None:
+        claims = await run_in_threadpool(_verify_jwt, token)
+    return _principal_from_claims(claims)
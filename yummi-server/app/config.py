@@ -18,18 +18,37 @@ class Settings(BaseSettings):
     clerk_jwks_url: str | None = Field(default=None)
     clerk_audience: str | None = Field(default=None)
     auth_disable_verification: bool = Field(default=False)
+    auth_token_cache_max_entries: int = Field(default=10000, ge=1)
+    # Weighted per-user budget (see app/ratelimit.py); LLM routes cost 10, reads 1.
+    rate_limit_user_budget: str = Field(default="300/minute")
 
     # Data
     database_url: str | None = Field(default=None)
     redis_url: str | None = Field(default=None)
+    redis_max_connections: int = Field(default=50, ge=1)
+    redis_socket_timeout_seconds: float = Field(default=5.0, gt=0)
+    redis_pool_timeout_seconds: float = Field(default=5.0, gt=0)
+    redis_blocking_max_connections: int = Field(default=20, ge=1)
+    redis_health_check_interval_seconds: int = Field(default=30, ge=0)
+    # Bounds for the in-process stores used when REDIS_URL is unset
+    memory_fallback_max_entries: int = Field(default=10000, ge=1)
+    memory_fallback_ttl_seconds: int = Field(default=604800, ge=1)
     catalog_path: str | None = Field(default="resolver/catalog.json")
+    catalog_refresh_interval_seconds: float = Field(default=5.0, ge=0)
     meals_manifest_path: str | None = Field(default="resolver/meals/meals_manifest.json")
+    meals_manifest_format: str = Field(default="json")  # json|parquet
+    meals_manifest_parquet_path: str | None = Field(default="resolver/meals/meals_manifest.parquet")
     tags_manifest_path: str | None = Field(default="data/tags/defined_tags.json")
     ingredient_classifications_path: str | None = Field(
         default="data/ingredients/ingredient_classifications.jsonl"
     )
+    # Compiled by scripts/ingredient_classifications_builder.py; used when it matches the JSONL above
+    ingredient_index_path: str | None = Field(default="data/ingredients/ingredient_product_index.sqlite")
     thin_runner_log_path: str = Field(default="data/thin-runner-log.txt")
     thin_slice_enabled: bool = Field(default=True)
+    thin_order_visibility_timeout_seconds: int = Field(default=300, ge=1)
+    thin_order_max_wait_seconds: float = Field(default=25.0, ge=0)
+    order_status_max_wait_seconds: float = Field(default=25.0, ge=0)
 
     # API
     cors_allowed_origins: List[str] = Field(default_factory=lambda: ["*"])
@@ -57,6 +76,7 @@ class Settings(BaseSettings):
     recommendation_candidate_limit: int = Field(default=100)
     recommendation_meal_count: int = Field(default=10)
     recommendation_stream_timeout_seconds: int = Field(default=20, ge=5, le=120)
+    sse_keepalive_seconds: float = Field(default=15.0, gt=0)
     recommendation_learning_candidate_limit: int = Field(default=60)
     recommendation_learning_exploration_meal_count: int = Field(default=25)
     recommendation_learning_meal_count: int = Field(default=10)
@@ -75,7 +95,24 @@ class Settings(BaseSettings):
     openai_shopping_list_top_p: float | None = Field(default=None)
     openai_shopping_list_reasoning_effort: str = Field(default="low")
     openai_shopping_list_max_output_tokens: int = Field(default=1500)
+    shopping_list_pack_solver_enabled: bool = Field(default=True)
+    shopping_list_batching_enabled: bool = Field(default=True)
+    shopping_list_batch_max_groups: int = Field(default=8, ge=1, le=50)
+    shopping_list_batch_target_seconds: float = Field(default=20.0, gt=0)
     openai_request_timeout_seconds: int = Field(default=90, ge=30, le=300)
+    openai_connect_timeout_seconds: float = Field(default=10.0, gt=0, le=60)
+    openai_max_connections: int = Field(default=100, ge=1)
+    openai_max_keepalive_connections: int = Field(default=20, ge=0)
+    openai_keepalive_expiry_seconds: float = Field(default=60.0, ge=0)
+    openai_http2: bool = Field(default=True)
+    openai_max_concurrent_requests: int = Field(default=32, ge=1)
+    openai_max_concurrent_requests_per_user: int = Field(default=8, ge=1)
+    openai_scheduler_aging_seconds: float = Field(default=10.0, gt=0)
+    llm_response_cache_enabled: bool = Field(default=True)
+    llm_response_cache_ttl_seconds: int = Field(default=86400, ge=1)
+    llm_response_cache_max_entries: int = Field(default=2048, ge=1)
+    feedback_summary_cache_ttl_seconds: int = Field(default=86400, ge=1)
+    feedback_summary_cache_max_entries: int = Field(default=4096, ge=1)
 
     # Observability
     sentry_dsn: str | None = Field(default=None)
@@ -13,6 +13,9 @@ from prometheus_fastapi_instrumentator import Instrumentator
 from .config import get_settings
 from .db import init_engine
 from .observability import configure_logging, init_sentry
+from .redis_util import close_redis_clients
+from .services.openai_client import close_openai_clients
+from .services.order_updates import stop_order_update_listener
 from .startup import validate_settings
 from .routes import (
     health,
@@ -54,6 +57,9 @@ def create_app() -> FastAPI:
 
     # Initialize DB engine if configured
     init_engine()
+    app.add_event_handler("shutdown", close_openai_clients)
+    app.add_event_handler("shutdown", stop_order_update_listener)
+    app.add_event_handler("shutdown", close_redis_clients)
 
     # CORS
     origins: List[str] = s.cors_allowed_origins
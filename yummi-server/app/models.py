@@ -92,6 +92,9 @@ class WalletAccountState(Base, TimestampMixin):
     spend_blocked: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     lock_reason: Mapped[Optional[str]] = mapped_column(String(64))
     lock_note: Mapped[Optional[str]] = mapped_column(String(255))
+    # Running ledger total, adjusted in the same DB transaction as each entry.
+    balance_minor: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    currency: Mapped[str] = mapped_column(String(3), nullable=False, default="ZAR", server_default="ZAR")
 
 
 class UserPreferenceProfile(Base, TimestampMixin):
@@ -1,8 +1,157 @@
 from __future__ import annotations
 
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from fastapi import Depends, HTTPException, status
+from limits import RateLimitItem, parse
+from limits.storage import MemoryStorage, storage_from_string
+from limits.strategies import MovingWindowRateLimiter, RateLimiter
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from starlette.requests import Request
+
+from .auth import cached_claims_for_token, get_current_principal_async
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Weights charged against the shared per-user budget. LLM-backed routes cost
+# more than reads because they are what spends OpenAI tokens and latency.
+READ_REQUEST_COST = 1
+LLM_REQUEST_COST = 10
+USER_BUDGET_SCOPE = "user-budget"
+# While Redis is marked dead, budget charges re-probe it at most this often.
+STORAGE_RECHECK_SECONDS = 30.0
+
+
+def rate_limit_key(request: Request) -> str:
+    """Bucket by authenticated user, falling back to the client IP.
+
+    Route dependencies run before slowapi's decorator check, so a valid token
+    is already in the verified-claims cache here; unverified tokens never
+    pick a bucket.
+    """
+    auth_header = request.headers.get("authorization") or ""
+    scheme, _, token = auth_header.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        claims = cached_claims_for_token(token.strip())
+        if claims and claims.get("sub"):
+            return f"user:{claims['sub']}"
+    return f"ip:{_client_ip(request)}"
+
+
+def _client_ip(request: Request) -> str:
+    # Fly's proxy sets the original client address; request.client is the proxy.
+    return request.headers.get("fly-client-ip") or get_remote_address(request)
+
+
+def _build_limiter() -> Limiter:
+    settings = get_settings()
+    return Limiter(
+        key_func=rate_limit_key,
+        storage_uri=settings.redis_url or "memory://",
+        strategy="moving-window",
+        key_prefix="ratelimit",
+        # A Redis outage degrades to per-process limits instead of failing requests.
+        in_memory_fallback_enabled=bool(settings.redis_url),
+    )
+
+
+limiter = _build_limiter()
+
+
+class _BudgetStorage:
+    """Moving-window storage for the user budget, owned here rather than borrowed from slowapi.
+
+    Charges go to ``primary`` (Redis when configured). If it errors they go to
+    the per-process ``fallback`` and the primary is probed again at most every
+    ``STORAGE_RECHECK_SECONDS``; without a fallback the charge is skipped.
+    """
+
+    def __init__(self, primary: RateLimiter, fallback: RateLimiter | None = None) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.primary_dead = False
+        self._next_check_at = 0.0
+        self._lock = threading.Lock()
+
+    def hit(self, item: RateLimitItem, key: str, cost: int) -> RateLimiter | None:
+        """Charge ``cost``; returns the strategy that refused it, or ``None`` if allowed."""
+        strategy = self._active()
+        try:
+            allowed = strategy.hit(item, USER_BUDGET_SCOPE, key, cost=cost)
+        except Exception as exc:
+            strategy = self._fall_back(strategy, exc)
+            if strategy is None:
+                return None
+            allowed = strategy.hit(item, USER_BUDGET_SCOPE, key, cost=cost)
+        return None if allowed else strategy
+
+    def _active(self) -> RateLimiter:
+        with self._lock:
+            if not self.primary_dead:
+                return self.primary
+            if time.monotonic() < self._next_check_at:
+                return self.fallback or self.primary
+            self._next_check_at = time.monotonic() + STORAGE_RECHECK_SECONDS
+        try:
+            recovered = self.primary.storage.check()
+        except Exception:
+            recovered = False
+        if not recovered:
+            return self.fallback or self.primary
+        logger.info("Rate limit storage recovered")
+        with self._lock:
+            self.primary_dead = False
+        return self.primary
+
+    def _fall_back(self, strategy: RateLimiter, exc: Exception) -> RateLimiter | None:
+        if strategy is not self.primary or self.fallback is None:
+            logger.warning("Rate limit storage unavailable; not charging budget error=%s", exc)
+            return None
+        logger.warning("Rate limit storage unreachable - falling back to in-memory storage error=%s", exc)
+        with self._lock:
+            self.primary_dead = True
+            self._next_check_at = time.monotonic() + STORAGE_RECHECK_SECONDS
+        return self.fallback
+
+
+def _build_budget_storage() -> _BudgetStorage:
+    redis_url = get_settings().redis_url
+    if not redis_url:
+        return _BudgetStorage(MovingWindowRateLimiter(MemoryStorage()))
+    # A Redis outage degrades to per-process budgets instead of failing requests.
+    return _BudgetStorage(
+        MovingWindowRateLimiter(storage_from_string(redis_url)),
+        MovingWindowRateLimiter(MemoryStorage()),
+    )
+
+
+_budget_storage = _build_budget_storage()
+
+
+def user_budget(cost: int) -> Callable[..., None]:
+    """Dependency charging ``cost`` against the caller's shared moving-window budget.
 
+    Used as ``dependencies=[Depends(user_budget(LLM_REQUEST_COST))]``; it
+    reuses the route's resolved principal, so the bucket is the verified
+    ``sub`` and every Fly machine shares it through Redis.
+    """
+    item = parse(get_settings().rate_limit_user_budget)
 
-limiter = Limiter(key_func=get_remote_address)
+    def _charge(request: Request, principal: Dict[str, Any] = Depends(get_current_principal_async)) -> None:
+        key = f"user:{principal['sub']}" if principal.get("sub") else f"ip:{_client_ip(request)}"
+        refused_by = _budget_storage.hit(item, key, cost)
+        if refused_by is None:
+            return
+        reset_at = refused_by.get_window_stats(item, USER_BUDGET_SCOPE, key).reset_time
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded: {item}",
+            headers={"Retry-After": str(max(1, int(reset_at - time.time())))},
+        )
 
+    return _charge
@@ -1,12 +1,133 @@
 from __future__ import annotations
 
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List
+
 import redis
-from .config import get_settings
+import redis.asyncio as aioredis
+
+from .config import Settings, get_settings
+
+_LOCK = threading.Lock()
+_SYNC_CLIENT: redis.Redis | None = None
+_SYNC_CLIENT_URL: str | None = None
+_ASYNC_CLIENTS: Dict[asyncio.AbstractEventLoop, aioredis.Redis] = {}
+_ASYNC_BLOCKING_CLIENTS: Dict[asyncio.AbstractEventLoop, aioredis.Redis] = {}
+# Blocking reads (BLMOVE, pub/sub waits) end this long before the socket timeout would fire.
+BLOCKING_READ_MARGIN_SECONDS = 1.0
+
+
+def _pool_kwargs(settings: Settings) -> dict:
+    return {
+        "decode_responses": True,
+        "max_connections": settings.redis_max_connections,
+        # Blocking pools make callers queue for a connection at the cap
+        # instead of raising immediately; this bounds the wait.
+        "timeout": settings.redis_pool_timeout_seconds,
+        "socket_timeout": settings.redis_socket_timeout_seconds,
+        "socket_connect_timeout": settings.redis_socket_timeout_seconds,
+        "health_check_interval": settings.redis_health_check_interval_seconds,
+    }
 
 
 def get_redis() -> redis.Redis | None:
-    url = get_settings().redis_url
+    """Process-wide blocking client backed by one connection pool."""
+    global _SYNC_CLIENT, _SYNC_CLIENT_URL
+    settings = get_settings()
+    url = settings.redis_url
+    if not url:
+        return None
+    with _LOCK:
+        if _SYNC_CLIENT is None or _SYNC_CLIENT_URL != url:
+            pool = redis.BlockingConnectionPool.from_url(url, **_pool_kwargs(settings))
+            _SYNC_CLIENT = redis.Redis(connection_pool=pool)
+            _SYNC_CLIENT_URL = url
+        return _SYNC_CLIENT
+
+
+def get_async_redis() -> aioredis.Redis | None:
+    """asyncio client for the running loop; its pool cannot be shared across loops."""
+    settings = get_settings()
+    return _async_client(_ASYNC_CLIENTS, settings, _pool_kwargs(settings))
+
+
+def get_async_blocking_redis() -> aioredis.Redis | None:
+    """asyncio client reserved for blocking commands (BLMOVE and friends).
+
+    A blocking pop holds its connection for the whole wait, so these get their
+    own ``redis_blocking_max_connections`` pool instead of starving the shared
+    one used by rate limits, caches and order updates.
+    """
+    settings = get_settings()
+    kwargs = {**_pool_kwargs(settings), "max_connections": settings.redis_blocking_max_connections}
+    return _async_client(_ASYNC_BLOCKING_CLIENTS, settings, kwargs)
+
+
+def _async_client(
+    clients: Dict[asyncio.AbstractEventLoop, aioredis.Redis],
+    settings: Settings,
+    pool_kwargs: dict,
+) -> aioredis.Redis | None:
+    url = settings.redis_url
     if not url:
         return None
-    return redis.from_url(url, decode_responses=True)
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        client = clients.get(loop)
+        if client is None:
+            for stale_loop in [entry for entry in clients if entry.is_closed()]:
+                clients.pop(stale_loop, None)
+            pool = aioredis.BlockingConnectionPool.from_url(url, **pool_kwargs)
+            client = aioredis.Redis(connection_pool=pool)
+            clients[loop] = client
+        return client
+
+
+def blocking_read_slice_seconds() -> float:
+    """Longest single blocking read that stays under ``redis_socket_timeout_seconds``."""
+    socket_timeout = get_settings().redis_socket_timeout_seconds
+    return max(socket_timeout - BLOCKING_READ_MARGIN_SECONDS, socket_timeout / 2)
+
+
+def run_pipeline(
+    client: redis.Redis,
+    build: Callable[[redis.client.Pipeline], Any],
+    *,
+    transaction: bool = True,
+) -> List[Any]:
+    """Queue the commands issued by ``build`` and send them in one round trip.
+
+    With ``transaction`` the batch is wrapped in MULTI/EXEC so it applies
+    atomically. Returns the per-command results in order.
+    """
+    with client.pipeline(transaction=transaction) as pipe:
+        build(pipe)
+        return pipe.execute()
+
+
+async def run_async_pipeline(
+    client: aioredis.Redis,
+    build: Callable[[aioredis.client.Pipeline], Any],
+    *,
+    transaction: bool = True,
+) -> List[Any]:
+    async with client.pipeline(transaction=transaction) as pipe:
+        build(pipe)
+        return await pipe.execute()
+
 
+async def close_redis_clients() -> None:
+    """Disconnect pooled clients; registered as an app shutdown handler."""
+    global _SYNC_CLIENT, _SYNC_CLIENT_URL
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        sync_client = _SYNC_CLIENT
+        async_clients = [_ASYNC_CLIENTS.pop(loop, None), _ASYNC_BLOCKING_CLIENTS.pop(loop, None)]
+        _SYNC_CLIENT = None
+        _SYNC_CLIENT_URL = None
+    for async_client in async_clients:
+        if async_client is not None:
+            await async_client.aclose()
+    if sync_client is not None:
+        sync_client.connection_pool.disconnect()
@@ -1,21 +1,22 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
 from ..config import get_settings
 from ..db import get_session
 from ..redis_util import get_redis
 from ..schemas import (
     AdminChargebackRequest,
     AdminChargebackResponse,
+    AdminWalletReconcileResponse,
     WalletRefundAdminActionRequest,
     WalletRefundResponse,
 )
-from ..services.payments import record_chargeback, update_refund_status
+from ..services.catalog_store import catalog_file_path, get_catalog_snapshot, publish_catalog
+from ..services.payments import reconcile_wallet_balances, record_chargeback, update_refund_status
 
 
 router = APIRouter()
@@ -34,51 +35,36 @@ def _require_admin(principal: Dict[str, Any]):
 
 
 @router.post("/admin/catalog/import")
-def catalog_import(payload: Any, principal=Depends(get_current_principal)):
+def catalog_import(payload: Any, principal=Depends(get_current_principal_async)):
     _require_admin(principal)
-    r = get_redis()
-    if r is None:
+    if get_redis() is None:
         raise HTTPException(status_code=503, detail="Redis not configured")
-    data = payload
-    if not isinstance(data, (list, dict)):
+    if not isinstance(payload, (list, dict)):
         raise HTTPException(status_code=400, detail="Expected list or object with items[]")
     try:
-        # Validate minimal shape
-        items = data if isinstance(data, list) else data.get("items", [])
-        if not isinstance(items, list) or len(items) == 0:
-            raise HTTPException(status_code=400, detail="No items to import")
-        r.set("catalog:data", json.dumps(data))
-        return {"ok": True, "count": len(items), "source": "redis"}
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+        version, count = publish_catalog(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ok": True, "count": count, "source": "redis", "version": version}
 
 
 @router.get("/admin/catalog/source")
-def catalog_source(principal=Depends(get_current_principal)):
+def catalog_source(principal=Depends(get_current_principal_async)):
     _require_admin(principal)
-    s = get_settings()
-    r = get_redis()
-    src = "file"
-    count = None
-    if r is not None:
-        raw = r.get("catalog:data")
-        if raw:
-            try:
-                data = json.loads(raw)
-                items = data if isinstance(data, list) else data.get("items", [])
-                src = "redis"
-                count = len(items)
-            except Exception:
-                pass
-    return {"source": src, "redis": bool(r is not None), "file": s.catalog_path, "count": count}
+    snapshot = get_catalog_snapshot()
+    return {
+        "source": snapshot.source if snapshot else "file",
+        "redis": get_redis() is not None,
+        "file": catalog_file_path(),
+        "count": len(snapshot) if snapshot else None,
+        "version": snapshot.version if snapshot else None,
+    }
 
 
 @router.post("/admin/wallet/chargebacks", response_model=AdminChargebackResponse)
 async def admin_record_chargeback(
     payload: AdminChargebackRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ):
     _require_admin(principal)
     async with get_session() as session:
@@ -97,6 +83,17 @@ async def admin_record_chargeback(
     return result
 
 
+@router.post("/admin/wallet/reconcile", response_model=AdminWalletReconcileResponse)
+async def admin_reconcile_wallets(
+    userId: Optional[str] = None,
+    repair: bool = False,
+    principal=Depends(get_current_principal_async),
+):
+    _require_admin(principal)
+    async with get_session() as session:
+        return await reconcile_wallet_balances(session, user_id=userId, repair=repair)
+
+
 @router.post(
     "/admin/wallet/refunds/{transaction_id}/status",
     response_model=WalletRefundResponse,
@@ -104,7 +101,7 @@ async def admin_record_chargeback(
 async def admin_update_refund(
     transaction_id: str,
     payload: WalletRefundAdminActionRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ):
     _require_admin(principal)
     async with get_session() as session:
@@ -1,22 +1,22 @@
 from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Header, Request
-from openai import OpenAI
 
 from ..config import get_settings
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
+from ..services.openai_client import get_async_openai_client
 
 
 router = APIRouter()
-from ..ratelimit import limiter
+from ..ratelimit import LLM_REQUEST_COST, limiter, user_budget
 
 
-@router.post("/ai/complete")
+@router.post("/ai/complete", dependencies=[Depends(user_budget(LLM_REQUEST_COST))])
 @limiter.limit("20/minute")
-def ai_complete(
+async def ai_complete(
     request: Request,
     payload: Dict[str, Any],
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
     idempotency_key: Optional[str] = Header(default=None, convert_underscores=False, alias="Idempotency-Key"),
 ):
     s = get_settings()
@@ -26,13 +26,12 @@ def ai_complete(
     if model not in s.openai_allowed_models:
         raise HTTPException(status_code=400, detail="Model not allowed")
 
-    client = OpenAI(api_key=s.openai_api_key)
     messages = payload.get("messages")
     if not isinstance(messages, list):
         raise HTTPException(status_code=400, detail="messages[] required")
 
     try:
-        resp = client.chat.completions.create(
+        resp = await get_async_openai_client().chat.completions.create(
             model=model,
             messages=messages,
             temperature=payload.get("temperature", 0.2),
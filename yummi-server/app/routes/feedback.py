@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
 from ..schemas import (
     MealFeedbackSubmitRequest,
     MealFeedbackRecordResponse,
@@ -22,7 +22,7 @@ router = APIRouter(prefix="/feedback", tags=["feedback"])
 
 @router.get("/meals", response_model=MealFeedbackSummaryResponse)
 async def get_meal_feedback_summary(
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> MealFeedbackSummaryResponse:
     user_id = principal.get("sub")
     summary = await load_feedback_summary(user_id)
@@ -35,7 +35,7 @@ async def get_meal_feedback_summary(
 @router.post("/meals", response_model=MealFeedbackRecordResponse, status_code=status.HTTP_202_ACCEPTED)
 async def submit_meal_feedback(
     payload: MealFeedbackSubmitRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> MealFeedbackRecordResponse:
     user_id = principal.get("sub")
     reaction_value = (payload.reaction or "").lower()
@@ -69,7 +69,7 @@ async def submit_meal_feedback(
 
 @router.delete("/meals", status_code=status.HTTP_200_OK)
 async def clear_meal_feedback_history(
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> dict:
     user_id = principal.get("sub")
     await clear_user_feedback(user_id)
@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
 from ..db import get_session
 from ..schemas import CandidateFilterRequest, CandidateFilterResponse
 from ..services.filtering import generate_candidate_pool
-from ..services.meals import get_meal_manifest
+from ..services.meals import get_meal_manifest_index
 from ..services.preferences import (
     get_user_preference_profile,
     load_tag_manifest,
@@ -18,7 +18,7 @@ router = APIRouter(prefix="/filter", tags=["filtering"])
 @router.post("", response_model=CandidateFilterResponse)
 async def build_candidate_pool(
     payload: CandidateFilterRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> CandidateFilterResponse:
     user_id = principal.get("sub") if principal else None
     if not user_id:
@@ -27,8 +27,8 @@ async def build_candidate_pool(
             detail="Missing authenticated user",
         )
 
-    manifest = get_meal_manifest()
-    manifest_version = manifest.get("manifest_id")
+    manifest_index = get_meal_manifest_index()
+    manifest_version = manifest_index.manifest.get("manifest_id")
     if payload.mealVersion and manifest_version and payload.mealVersion != manifest_version:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -40,7 +40,7 @@ async def build_candidate_pool(
     tag_manifest = load_tag_manifest()
 
     return generate_candidate_pool(
-        manifest=manifest,
+        manifest_index=manifest_index,
         tag_manifest=tag_manifest,
         profile=profile,
         request=payload,
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends
 
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
 from ..db import get_session
 from ..services.payments import get_user_wallet_summary
 
@@ -10,7 +10,7 @@ router = APIRouter()
 
 
 @router.get("/me")
-async def me(principal=Depends(get_current_principal)):
+async def me(principal=Depends(get_current_principal_async)):
     async with get_session() as session:
         wallet = await get_user_wallet_summary(session, principal.get("sub"))
     return {
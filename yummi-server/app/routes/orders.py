@@ -3,13 +3,15 @@ import time
 import uuid
 from typing import Dict
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status, Request
-import redis
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status, Request
 
+from ..auth import get_current_principal_async
 from ..config import get_settings
-from ..auth import get_current_principal
 from ..schemas import CreateOrderRequest, CreateOrderResponse, OrderStatusResponse
 from ..ratelimit import limiter
+from ..redis_util import get_async_redis, run_async_pipeline
+from ..services.memory_store import BoundedTTLStore
+from ..services.order_updates import notify_order_watchers, order_update_channel, watch_order_updates
 from ..services.recommendationlearning import (
     WOOLWORTHS_CART_TRIGGER,
     build_learning_context,
@@ -20,46 +22,87 @@ from ..services.recommendationlearning import (
 router = APIRouter()
 
 
-def _redis() -> redis.Redis | None:
-    url = get_settings().redis_url
-    if not url:
-        return None
-    return redis.from_url(url, decode_responses=True)
+IDEMPOTENCY_TTL_SECONDS = 86400
+
+_mem_orders = BoundedTTLStore(
+    "orders",
+    max_entries=get_settings().memory_fallback_max_entries,
+    default_ttl=get_settings().memory_fallback_ttl_seconds,
+)
+_mem_idem = BoundedTTLStore(
+    "orders_idempotency",
+    max_entries=get_settings().memory_fallback_max_entries,
+    default_ttl=IDEMPOTENCY_TTL_SECONDS,
+)
+
 
+async def _idem_get(key: str) -> Dict | None:
+    r = get_async_redis()
+    if r is None:
+        return _mem_idem.get(key)
+    raw = await r.get(f"idem:{key}")
+    return json.loads(raw) if raw else None
 
-_mem_orders: Dict[str, Dict] = {}
-_mem_idem: Dict[str, Dict] = {}
 
+async def _store_new_order(order: Dict, response: Dict, idempotency_key: str | None) -> Dict | None:
+    """Persist a new order, claiming the idempotency key in the same round trip.
 
-def _idem_get_set(key: str, payload: Dict | None = None, ttl: int = 86400) -> Dict | None:
-    r = _redis()
+    Returns the previously stored response instead when another request
+    claimed the key first; the order written alongside the lost claim is
+    discarded.
+    """
+    oid = order["order_id"]
+    r = get_async_redis()
     if r is None:
-        if payload is None:
-            return _mem_idem.get(key)
-        _mem_idem[key] = payload
-        return payload
-    if payload is None:
-        raw = r.get(f"idem:{key}")
-        return json.loads(raw) if raw else None
-    r.setex(f"idem:{key}", ttl, json.dumps(payload))
-    return payload
-
-
-def _order_put(order: Dict) -> None:
-    r = _redis()
+        if idempotency_key:
+            existing = _mem_idem.set_if_absent(idempotency_key, response)
+            if existing is not None:
+                return existing
+        _mem_orders.set(oid, order)
+        return None
+
+    def _build(pipe) -> None:
+        if idempotency_key:
+            pipe.set(f"idem:{idempotency_key}", json.dumps(response), nx=True, ex=IDEMPOTENCY_TTL_SECONDS)
+        pipe.hset(f"order:{oid}", mapping={"data": json.dumps(order), "version": order["version"]})
+
+    results = await run_async_pipeline(r, _build)
+    if idempotency_key and not results[0]:
+        await r.delete(f"order:{oid}")
+        return await _idem_get(idempotency_key)
+    return None
+
+
+async def _order_put(order: Dict) -> None:
+    """Save an update, bump the order's version and wake long-polling readers."""
+    r = get_async_redis()
     oid = order["order_id"]
     if r is None:
-        _mem_orders[oid] = order
+        current = _mem_orders.get(oid) or {}
+        order["version"] = int(current.get("version") or 0) + 1
+        _mem_orders.set(oid, order)
+        notify_order_watchers(oid)
         return
-    r.hset(f"order:{oid}", mapping={"data": json.dumps(order)})
+
+    def _build(pipe) -> None:
+        pipe.hincrby(f"order:{oid}", "version", 1)
+        pipe.hset(f"order:{oid}", "data", json.dumps(order))
+
+    version, _ = await run_async_pipeline(r, _build)
+    order["version"] = int(version)
+    await r.publish(order_update_channel(oid), version)
 
 
-def _order_get(oid: str) -> Dict | None:
-    r = _redis()
+async def _order_get(oid: str) -> Dict | None:
+    r = get_async_redis()
     if r is None:
         return _mem_orders.get(oid)
-    raw = r.hget(f"order:{oid}", "data")
-    return json.loads(raw) if raw else None
+    raw, version = await r.hmget(f"order:{oid}", ["data", "version"])
+    if not raw:
+        return None
+    order = json.loads(raw)
+    order["version"] = int(version or 0)
+    return order
 
 
 @router.post("/orders", response_model=CreateOrderResponse)
@@ -67,12 +110,12 @@ def _order_get(oid: str) -> Dict | None:
 async def create_order(
     request: Request,
     body: CreateOrderRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
     idempotency_key: str | None = Header(default=None, convert_underscores=False, alias="Idempotency-Key"),
 ):
     # Idempotency handling
     if idempotency_key:
-        cached = _idem_get_set(idempotency_key)
+        cached = await _idem_get(idempotency_key)
         if cached:
             return CreateOrderResponse(**cached)
 
@@ -86,11 +129,12 @@ async def create_order(
         "created_at": int(time.time()),
         "events": [],
         "notes": body.notes,
+        "version": 1,
     }
-    _order_put(order)
     resp = CreateOrderResponse(order_id=oid, status="queued")
-    if idempotency_key:
-        _idem_get_set(idempotency_key, resp.model_dump())
+    existing = await _store_new_order(order, resp.model_dump(), idempotency_key)
+    if existing:
+        return CreateOrderResponse(**existing)
     schedule_recommendation_learning_run(
         user_id=principal.get("sub"),
         trigger=WOOLWORTHS_CART_TRIGGER,
@@ -109,30 +153,64 @@ async def create_order(
 
 @router.get("/orders/{order_id}", response_model=OrderStatusResponse)
 @limiter.limit("120/minute")
-def get_order(request: Request, order_id: str, principal=Depends(get_current_principal)):
-    order = _order_get(order_id)
+async def get_order(
+    request: Request,
+    order_id: str,
+    principal=Depends(get_current_principal_async),
+    waitSeconds: float = Query(default=0.0, ge=0),
+    sinceVersion: int | None = Query(default=None),
+):
+    """Current order status, long-polling up to ``waitSeconds`` for a change.
+
+    The wait ends as soon as the order's version differs from ``sinceVersion``
+    (by default, the version when the request arrived), so clients can loop
+    on this instead of polling on a timer.
+    """
+    wait_seconds = min(waitSeconds, get_settings().order_status_max_wait_seconds)
+    if wait_seconds <= 0:
+        return _order_status(order_id, await _order_get(order_id), principal)
+
+    deadline = time.monotonic() + wait_seconds
+    async with watch_order_updates(order_id) as watch:
+        order = _check_order_access(await _order_get(order_id), principal)
+        since = order.get("version", 0) if sinceVersion is None else sinceVersion
+        while order.get("version", 0) == since:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not await watch.wait(remaining):
+                break
+            order = await _order_get(order_id) or order
+    return _order_status(order_id, order, principal)
+
+
+def _check_order_access(order: Dict | None, principal) -> Dict:
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     if order.get("user_id") != principal.get("sub"):
         raise HTTPException(status_code=403, detail="Forbidden")
+    return order
+
+
+def _order_status(order_id: str, order: Dict | None, principal) -> OrderStatusResponse:
+    order = _check_order_access(order, principal)
     return OrderStatusResponse(
         order_id=order_id,
         status=order.get("status"),
         items=order.get("items"),
         retailer=order.get("retailer"),
         events=order.get("events", []),
+        version=order.get("version", 0),
     )
 
 
 @router.post("/orders/{order_id}/ack")
 @limiter.limit("120/minute")
-def ack_order(request: Request, order_id: str, principal=Depends(get_current_principal)):
-    order = _order_get(order_id)
+async def ack_order(request: Request, order_id: str, principal=Depends(get_current_principal_async)):
+    order = await _order_get(order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     if order.get("user_id") != principal.get("sub"):
         raise HTTPException(status_code=403, detail="Forbidden")
     order["status"] = "completed"
     order.setdefault("events", []).append({"type": "ack", "ts": int(time.time())})
-    _order_put(order)
+    await _order_put(order)
     return {"ok": True}
@@ -6,7 +6,7 @@ from typing import Dict
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, PlainTextResponse
 
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
 from ..config import get_settings
 from ..db import get_session
 from ..payments.payfast import (
@@ -33,7 +33,7 @@ logger = logging.getLogger(__name__)
 @router.post("/initiate", response_model=PayFastInitiateResponse)
 async def initiate_payfast_payment(
     payload: PayFastInitiateRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ):
     try:
         host, params, _ = build_checkout_params(
@@ -111,7 +111,7 @@ async def payfast_itn(request: Request):
 
 
 @router.get("/status", response_model=PayFastStatusResponse)
-async def payfast_status(reference: str, principal=Depends(get_current_principal)):
+async def payfast_status(reference: str, principal=Depends(get_current_principal_async)):
     async with get_session() as session:
         try:
             payload = await get_payfast_status_details(
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
 from ..db import get_session
 from ..schemas import PreferenceProfileResponse, PreferenceSaveRequest
 from ..services.preferences import (
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/preferences", tags=["preferences"])
 
 
 @router.get("", response_model=PreferenceProfileResponse)
-async def get_preferences(principal=Depends(get_current_principal)):
+async def get_preferences(principal=Depends(get_current_principal_async)):
     async with get_session() as session:
         profile = await get_user_preference_profile(session, principal.get("sub"))
     manifest = load_tag_manifest()
@@ -29,7 +29,7 @@ async def get_preferences(principal=Depends(get_current_principal)):
 @router.put("", response_model=PreferenceProfileResponse)
 async def update_preferences(
     payload: PreferenceSaveRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ):
     async with get_session() as session:
         try:
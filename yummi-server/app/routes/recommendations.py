@@ -4,13 +4,14 @@ from datetime import datetime, timezone
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
 from ..db import get_session
+from ..ratelimit import LLM_REQUEST_COST, READ_REQUEST_COST, user_budget
 from ..schemas import (
     ExplorationRunRequest,
     ExplorationRunResponse,
-    MealSkuSnapshot,
     RecommendationMeal,
     RecommendationRunRequest,
     RecommendationRunResponse,
@@ -19,8 +20,8 @@ from ..services.exploration import (
     fetch_exploration_session,
     run_exploration_workflow,
 )
-from ..services.meal_representation import extract_sku_snapshot
-from ..services.meals import get_meal_manifest
+from ..services.event_stream import SSE_HEADERS, stream_workflow_events
+from ..services.meals import MealManifestIndex, get_meal_manifest_index
 from ..services.preferences import (
     get_user_preference_profile,
     _materialize_latest_recommendation_meals,
@@ -30,39 +31,82 @@ from ..services.recommendation import run_recommendation_workflow
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
 
-@router.post("/exploration", response_model=ExplorationRunResponse)
+@router.post(
+    "/exploration",
+    response_model=ExplorationRunResponse,
+    dependencies=[Depends(user_budget(LLM_REQUEST_COST))],
+)
 async def create_exploration_run(
     payload: ExplorationRunRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> ExplorationRunResponse:
     user_id = principal.get("sub")
     return await run_exploration_workflow(user_id=user_id, request=payload)
 
 
-@router.get("/exploration/{session_id}", response_model=ExplorationRunResponse)
+@router.post("/exploration/stream", dependencies=[Depends(user_budget(LLM_REQUEST_COST))])
+async def stream_exploration_run(
+    payload: ExplorationRunRequest,
+    principal=Depends(get_current_principal_async),
+) -> StreamingResponse:
+    """SSE variant of ``/exploration``: ``meal`` events, then ``summary`` or ``error``."""
+    user_id = principal.get("sub")
+    events = stream_workflow_events(
+        lambda on_meal: run_exploration_workflow(user_id=user_id, request=payload, on_meal=on_meal)
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get(
+    "/exploration/{session_id}",
+    response_model=ExplorationRunResponse,
+    dependencies=[Depends(user_budget(READ_REQUEST_COST))],
+)
 async def get_exploration_run(
     session_id: UUID,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> ExplorationRunResponse:
     user_id = principal.get("sub")
     return await fetch_exploration_session(user_id=user_id, session_id=session_id)
 
 
-@router.post("/feed", response_model=RecommendationRunResponse)
+@router.post(
+    "/feed",
+    response_model=RecommendationRunResponse,
+    dependencies=[Depends(user_budget(LLM_REQUEST_COST))],
+)
 async def create_recommendation_feed(
     payload: RecommendationRunRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> RecommendationRunResponse:
     user_id = principal.get("sub")
     return await run_recommendation_workflow(user_id=user_id, request=payload)
 
 
-@router.get("/latest", response_model=RecommendationRunResponse)
+@router.post("/feed/stream", dependencies=[Depends(user_budget(LLM_REQUEST_COST))])
+async def stream_recommendation_feed(
+    payload: RecommendationRunRequest,
+    principal=Depends(get_current_principal_async),
+) -> StreamingResponse:
+    """SSE variant of ``/feed``: ``meal`` events, then ``summary`` or ``error``."""
+    user_id = principal.get("sub")
+    events = stream_workflow_events(
+        lambda on_meal: run_recommendation_workflow(user_id=user_id, request=payload, on_meal=on_meal)
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get(
+    "/latest",
+    response_model=RecommendationRunResponse,
+    dependencies=[Depends(user_budget(READ_REQUEST_COST))],
+)
 async def get_latest_recommendations(
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> RecommendationRunResponse:
     user_id = principal.get("sub")
-    manifest = get_meal_manifest()
+    manifest_index = get_meal_manifest_index()
+    manifest = manifest_index.manifest
     async with get_session() as session:
         profile = await get_user_preference_profile(session, user_id)
     if not profile or not profile.latest_recommendation_meal_ids:
@@ -72,7 +116,7 @@ async def get_latest_recommendations(
         )
     meal_ids = profile.latest_recommendation_meal_ids
     meals = _hydrate_latest_meals(
-        manifest=manifest,
+        manifest_index=manifest_index,
         meal_ids=meal_ids,
     )
     latest_full_meals = _materialize_latest_recommendation_meals(meal_ids)
@@ -96,39 +140,13 @@ async def get_latest_recommendations(
 
 def _hydrate_latest_meals(
     *,
-    manifest: dict,
+    manifest_index: MealManifestIndex,
     meal_ids: list[str],
 ) -> list[RecommendationMeal]:
     hydrated: list[RecommendationMeal] = []
-    lookup = _build_manifest_lookup(manifest)
     for rank, meal_id in enumerate(meal_ids or [], start=1):
-        meal, archetype_uid = lookup.get(str(meal_id), (None, None))
-        if not meal:
+        meal = manifest_index.hydrate_recommendation_meal(meal_id, rank=rank)
+        if meal is None:
             continue
-        hydrated.append(
-            RecommendationMeal(
-                mealId=str(meal_id),
-                name=meal.get("name"),
-                description=meal.get("description"),
-                tags=meal.get("meal_tags") or {},
-                rank=rank,
-                rationale=None,
-                confidence=None,
-                diversityAxes=[],
-                skuSnapshot=[MealSkuSnapshot(**snapshot) for snapshot in extract_sku_snapshot(meal)],
-                archetypeId=archetype_uid,
-            )
-        )
+        hydrated.append(meal)
     return hydrated
-
-
-def _build_manifest_lookup(manifest: dict) -> dict[str, tuple[dict, str | None]]:
-    lookup: dict[str, tuple[dict, str | None]] = {}
-    for archetype in manifest.get("archetypes", []):
-        archetype_uid = archetype.get("uid")
-        for meal in archetype.get("meals") or []:
-            meal_id = meal.get("meal_id")
-            if meal_id is None:
-                continue
-            lookup[str(meal_id)] = (meal, archetype_uid)
-    return lookup
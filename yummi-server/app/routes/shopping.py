@@ -4,7 +4,8 @@ import logging
 
 from fastapi import APIRouter, Depends, status
 
-from ..auth import get_current_principal
+from ..auth import get_current_principal_async
+from ..ratelimit import LLM_REQUEST_COST, user_budget
 from ..schemas import (
     RecommendationLearningTriggerRequest,
     ShoppingListBuildRequest,
@@ -22,19 +23,27 @@ router = APIRouter(prefix="/shopping-list", tags=["shopping-list"])
 logger = logging.getLogger(__name__)
 
 
-@router.post("/build", response_model=ShoppingListBuildResponse)
+@router.post(
+    "/build",
+    response_model=ShoppingListBuildResponse,
+    dependencies=[Depends(user_budget(LLM_REQUEST_COST))],
+)
 async def create_shopping_list(
     payload: ShoppingListBuildRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> ShoppingListBuildResponse:
     user_id = principal.get("sub")
     return await run_shopping_list_workflow(user_id=user_id, request=payload)
 
 
-@router.post("/learning/trigger", status_code=status.HTTP_202_ACCEPTED)
+@router.post(
+    "/learning/trigger",
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(user_budget(LLM_REQUEST_COST))],
+)
 async def trigger_recommendation_learning(
     payload: RecommendationLearningTriggerRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ) -> dict:
     user_id = principal.get("sub")
     logger.info(
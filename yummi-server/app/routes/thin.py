@@ -1,20 +1,33 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import os
-import random
 import threading
+import time
 import uuid
+from collections import deque
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException, Query, Response, status
 from pydantic import BaseModel, Field, ConfigDict
+from redis.exceptions import ConnectionError as RedisConnectionError
 
 from ..config import get_settings
-from ..redis_util import get_redis
+from ..redis_util import blocking_read_slice_seconds, get_async_blocking_redis, get_async_redis, run_async_pipeline
+from ..services.catalog_store import (
+    CatalogSnapshot,
+    catalog_file_path,
+    get_catalog_snapshot,
+    get_catalog_snapshot_async,
+)
+from ..services.memory_store import BoundedTTLStore
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -79,96 +92,94 @@ class ThinLogLine(BaseModel):
 
 
 THIN_PENDING_KEY = "thin:orders:pending"
+# Claimed orders sit in the processing list with a visibility deadline in the
+# claims ZSET until acked; expired claims are moved back to pending.
+THIN_PROCESSING_KEY = "thin:orders:processing"
+THIN_CLAIMS_KEY = "thin:orders:claims"
 THIN_ORDER_KEY_PREFIX = "thin:order:"
+REAP_INTERVAL_SECONDS = 5.0
+REAP_BATCH_SIZE = 100
+# A requeued order still reads "claimed" until the reaper rewrites it, so both
+# states can be handed out; anything else (a late ack) is dropped on claim.
+CLAIMABLE_STATUSES = {"pending", "claimed"}
+
+# A server that died between BLMOVE and ZADD leaves an id in processing without
+# a deadline; the first loop gives it one (NX, so live claims keep theirs).
+# Doing that here rather than after a separate LRANGE means an id acked in the
+# meantime is no longer in processing and cannot be re-added.
+# ZREM guards against two reapers (or a reaper and an ack) both moving an id.
+_REQUEUE_STALE_SCRIPT = """
+for _, id in ipairs(redis.call('LRANGE', KEYS[2], 0, -1)) do
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[3], id)
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local moved = {}
+for _, id in ipairs(ids) do
+    if redis.call('ZREM', KEYS[1], id) == 1 then
+        redis.call('LREM', KEYS[2], 1, id)
+        redis.call('LPUSH', KEYS[3], id)
+        table.insert(moved, id)
+    end
+end
+return moved
+"""
+
+_mem_orders = BoundedTTLStore(
+    "thin_orders",
+    max_entries=get_settings().memory_fallback_max_entries,
+    default_ttl=get_settings().memory_fallback_ttl_seconds,
+)
+# Guards the queue structures below; ids whose order was evicted from
+# ``_mem_orders`` are skipped on claim and pruned once the deque outgrows it.
+_mem_lock = threading.Lock()
+_mem_pending: Deque[str] = deque()
+_mem_claims: Dict[str, float] = {}
+_mem_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+_last_reap_at: float = 0.0
+
+
+def _to_thin_product(key: str, value: Dict[str, Any]) -> ThinProduct:
+    product_id = value.get("productId")
+    catalog_ref = value.get("catalogRefId")
+    detail_url = (
+        value.get("detailUrl")
+        or value.get("detailURL")
+        or value.get("url")
+        or value.get("productUrl")
+        or value.get("link")
+        or value.get("href")
+    )
+    if not detail_url:
+        if product_id:
+            detail_url = f"https://www.woolworths.co.za/prod/_/A-{product_id}"
+        elif catalog_ref:
+            detail_url = f"https://www.woolworths.co.za/prod/_/A-{catalog_ref}"
+    return ThinProduct(
+        key=key,
+        title=value.get("name") or value.get("title") or key,
+        productId=str(product_id) if product_id is not None else None,
+        catalogRefId=str(catalog_ref) if catalog_ref is not None else None,
+        sku=str(value.get("sku")) if value.get("sku") is not None else None,
+        qty=max(1, int(value.get("qty", 1))) if isinstance(value.get("qty"), (int, float)) else 1,
+        url=detail_url,
+        detailUrl=detail_url,
+        price=value.get("price") or value.get("salePrice") or value.get("pricePerUnit"),
+        imageUrl=value.get("image") or value.get("imageUrl") or value.get("thumbnail") or value.get("primaryImage"),
+        metadata=value,
+    )
 
-_catalog_lock = threading.Lock()
-_catalog_cache: List[ThinProduct] | None = None
-_catalog_mtime: float = 0.0
 
-_mem_lock = threading.Lock()
-_mem_orders: Dict[str, Dict[str, Any]] = {}
-_mem_pending: List[str] = []
-
-
-def _catalog_path() -> str:
-    settings = get_settings()
-    return settings.catalog_path or "resolver/catalog.json"
-
-
-def _load_catalog() -> List[ThinProduct]:
-    path = _catalog_path()
-    try:
-        stat = os.stat(path)
-    except FileNotFoundError:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Catalog missing at {path}")
-
-    with _catalog_lock:
-        global _catalog_cache, _catalog_mtime
-        if _catalog_cache is not None and stat.st_mtime <= _catalog_mtime:
-            # Return a shallow copy to avoid accidental mutations
-            return list(_catalog_cache)
-
-        with open(path, "r", encoding="utf-8") as fh:
-            raw = json.load(fh)
-        items: List[ThinProduct] = []
-        if isinstance(raw, dict):
-            for key, value in raw.items():
-                if not isinstance(value, dict):
-                    continue
-                product_id = value.get("productId")
-                catalog_ref = value.get("catalogRefId")
-                detail_url = (
-                    value.get("detailUrl")
-                    or value.get("detailURL")
-                    or value.get("url")
-                    or value.get("productUrl")
-                    or value.get("link")
-                    or value.get("href")
-                )
-                if not detail_url:
-                    if product_id:
-                        detail_url = f"https://www.woolworths.co.za/prod/_/A-{product_id}"
-                    elif catalog_ref:
-                        detail_url = f"https://www.woolworths.co.za/prod/_/A-{catalog_ref}"
-                product = ThinProduct(
-                    key=str(key),
-                    title=value.get("name") or str(key),
-                    productId=str(product_id) if product_id is not None else None,
-                    catalogRefId=str(catalog_ref) if catalog_ref is not None else None,
-                    sku=str(value.get("sku")) if value.get("sku") is not None else None,
-                    qty=max(1, int(value.get("qty", 1))) if isinstance(value.get("qty"), (int, float)) else 1,
-                    url=detail_url,
-                    detailUrl=detail_url,
-                    price=value.get("price") or value.get("salePrice") or value.get("pricePerUnit"),
-                    imageUrl=value.get("image") or value.get("imageUrl") or value.get("thumbnail") or value.get("primaryImage"),
-                    metadata=value,
-                )
-                items.append(product)
-        elif isinstance(raw, list):
-            for idx, value in enumerate(raw):
-                if not isinstance(value, dict):
-                    continue
-                key = value.get("key") or value.get("title") or f"item_{idx}"
-                product = ThinProduct(
-                    key=str(key),
-                    title=value.get("title") or value.get("name") or str(key),
-                    productId=str(value.get("productId")) if value.get("productId") is not None else None,
-                    catalogRefId=str(value.get("catalogRefId")) if value.get("catalogRefId") is not None else None,
-                    sku=str(value.get("sku")) if value.get("sku") is not None else None,
-                    qty=int(value.get("qty")) if isinstance(value.get("qty"), (int, float)) else 1,
-                    url=value.get("url") or value.get("detailUrl"),
-                    detailUrl=value.get("detailUrl") or value.get("url"),
-                    price=value.get("price") or value.get("salePrice"),
-                    imageUrl=value.get("imageUrl") or value.get("image"),
-                    metadata=value,
-                )
-                items.append(product)
-        else:
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Unsupported catalog format")
+def _load_catalog() -> CatalogSnapshot:
+    return _require_catalog(get_catalog_snapshot())
+
 
-        _catalog_cache = items
-        _catalog_mtime = stat.st_mtime
-        return list(items)
+def _require_catalog(snapshot: CatalogSnapshot | None) -> CatalogSnapshot:
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Catalog missing at {catalog_file_path()}",
+        )
+    return snapshot
 
 
 def _require_enabled() -> None:
@@ -180,63 +191,181 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _store_order(order: Dict[str, Any]) -> None:
-    redis_client = get_redis()
-    data = json.dumps(order)
+async def _store_order(order: Dict[str, Any]) -> None:
+    redis_client = get_async_redis()
     if redis_client is not None:
-        redis_client.hset(f"{THIN_ORDER_KEY_PREFIX}{order['id']}", mapping={"data": data})
+        await redis_client.hset(f"{THIN_ORDER_KEY_PREFIX}{order['id']}", mapping={"data": json.dumps(order)})
     else:
-        with _mem_lock:
-            _mem_orders[order["id"]] = order
+        _mem_orders.set(order["id"], order)
 
 
-def _queue_order(order_id: str) -> None:
-    redis_client = get_redis()
-    if redis_client is not None:
-        redis_client.rpush(THIN_PENDING_KEY, order_id)
-    else:
+async def _store_and_queue_order(order: Dict[str, Any]) -> None:
+    redis_client = get_async_redis()
+    if redis_client is None:
+        _mem_orders.set(order["id"], order)
         with _mem_lock:
-            _mem_pending.append(order_id)
+            _mem_pending.append(order["id"])
+            if len(_mem_pending) > 2 * _mem_orders.max_entries:
+                live = [order_id for order_id in _mem_pending if order_id in _mem_orders]
+                _mem_pending.clear()
+                _mem_pending.extend(live)
+            waiter = _mem_waiters.popleft() if _mem_waiters else None
+        if waiter is not None:
+            loop, future = waiter
+            loop.call_soon_threadsafe(_wake, future)
+        return
+
+    def _build(pipe) -> None:
+        pipe.hset(f"{THIN_ORDER_KEY_PREFIX}{order['id']}", mapping={"data": json.dumps(order)})
+        pipe.rpush(THIN_PENDING_KEY, order["id"])
+
+    await run_async_pipeline(redis_client, _build)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+async def _claim_next_id(wait_seconds: float) -> Optional[str]:
+    """Move the oldest pending id into processing and start its visibility timer.
+
+    With ``wait_seconds`` the call blocks (BLMOVE, or a parked future in the
+    in-memory fallback) until an order arrives or the wait elapses.
+    """
+    visibility = get_settings().thin_order_visibility_timeout_seconds
+    redis_client = get_async_redis()
+    if redis_client is None:
+        return await _mem_claim_next_id(wait_seconds, visibility)
+
+    blocking_client = get_async_blocking_redis()
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        order_id = None
+        if remaining > 0:
+            try:
+                order_id = await blocking_client.blmove(
+                    THIN_PENDING_KEY,
+                    THIN_PROCESSING_KEY,
+                    min(remaining, blocking_read_slice_seconds()),
+                    src="LEFT",
+                    dest="RIGHT",
+                )
+            except RedisConnectionError as exc:
+                # Every blocking connection is parked in another long poll;
+                # claim without waiting and let this runner poll again.
+                logger.warning("Thin queue blocking pop unavailable: %s", exc)
+                remaining = 0
+        if remaining <= 0:
+            order_id = await redis_client.lmove(THIN_PENDING_KEY, THIN_PROCESSING_KEY, src="LEFT", dest="RIGHT")
+        if order_id:
+            await redis_client.zadd(THIN_CLAIMS_KEY, {order_id: time.time() + visibility})
+            return order_id
+        if remaining <= 0 or deadline - time.monotonic() <= 0:
+            return None
+
+
+async def _mem_claim_next_id(wait_seconds: float, visibility: float) -> Optional[str]:
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        future: asyncio.Future | None = None
+        with _mem_lock:
+            while _mem_pending:
+                order_id = _mem_pending.popleft()
+                if order_id in _mem_orders:
+                    _mem_claims[order_id] = time.time() + visibility
+                    return order_id
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            future = loop.create_future()
+            _mem_waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, remaining)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with _mem_lock:
+                if (loop, future) in _mem_waiters:
+                    _mem_waiters.remove((loop, future))
+
+
+async def _release_claim(order_id: str) -> None:
+    """Forget ``order_id`` everywhere in the queue, including a requeued copy from a late ack."""
+    redis_client = get_async_redis()
+    if redis_client is None:
+        with _mem_lock:
+            _mem_claims.pop(order_id, None)
+            if order_id in _mem_pending:
+                _mem_pending.remove(order_id)
+        return
 
+    def _build(pipe) -> None:
+        pipe.zrem(THIN_CLAIMS_KEY, order_id)
+        pipe.lrem(THIN_PROCESSING_KEY, 1, order_id)
+        pipe.lrem(THIN_PENDING_KEY, 0, order_id)
 
-def _next_pending() -> Optional[str]:
-    redis_client = get_redis()
-    if redis_client is not None:
-        return redis_client.lpop(THIN_PENDING_KEY)
-    with _mem_lock:
-        if _mem_pending:
-            return _mem_pending.pop(0)
-    return None
+    await run_async_pipeline(redis_client, _build)
+
+
+async def _requeue_stale_claims() -> None:
+    """Return orders whose runner missed the visibility deadline to the queue front.
 
+    Runs at most every ``REAP_INTERVAL_SECONDS`` per process, piggybacking on
+    ``/orders/next`` so no separate scheduler is needed.
+    """
+    global _last_reap_at
+    now = time.monotonic()
+    if now - _last_reap_at < REAP_INTERVAL_SECONDS:
+        return
+    _last_reap_at = now
 
-def _get_order(order_id: str) -> Optional[Dict[str, Any]]:
-    redis_client = get_redis()
+    redis_client = get_async_redis()
+    if redis_client is None:
+        with _mem_lock:
+            expired = [oid for oid, deadline in _mem_claims.items() if deadline <= time.time()]
+            for order_id in expired:
+                _mem_claims.pop(order_id, None)
+                _mem_pending.appendleft(order_id)
+    else:
+        now_epoch = time.time()
+        expired = await redis_client.eval(
+            _REQUEUE_STALE_SCRIPT,
+            3,
+            THIN_CLAIMS_KEY,
+            THIN_PROCESSING_KEY,
+            THIN_PENDING_KEY,
+            now_epoch,
+            REAP_BATCH_SIZE,
+            now_epoch + get_settings().thin_order_visibility_timeout_seconds,
+        )
+    for order_id in expired:
+        order = await _get_order(order_id)
+        if order and order.get("status") == "claimed":
+            order["status"] = "pending"
+            order["requeuedAt"] = _now_iso()
+            order["claimedBy"] = None
+            await _store_order(order)
+
+
+async def _get_order(order_id: str) -> Optional[Dict[str, Any]]:
+    redis_client = get_async_redis()
     if redis_client is not None:
-        raw = redis_client.hget(f"{THIN_ORDER_KEY_PREFIX}{order_id}", "data")
+        raw = await redis_client.hget(f"{THIN_ORDER_KEY_PREFIX}{order_id}", "data")
         return json.loads(raw) if raw else None
-    with _mem_lock:
-        order = _mem_orders.get(order_id)
-        return json.loads(json.dumps(order)) if order is not None else None
+    return _mem_orders.get(order_id)
 
 
-def _count_pending() -> int:
-    redis_client = get_redis()
+async def _count_pending() -> int:
+    redis_client = get_async_redis()
     if redis_client is not None:
-        return int(redis_client.llen(THIN_PENDING_KEY))
+        return int(await redis_client.llen(THIN_PENDING_KEY))
     with _mem_lock:
         return len(_mem_pending)
 
 
-def _shuffle_items(items: List[ThinProduct], count: int, seed: Optional[str]) -> List[ThinProduct]:
-    pool = list(items)
-    if seed:
-        rng = random.Random(seed)
-        rng.shuffle(pool)
-    else:
-        random.shuffle(pool)
-    return pool[:count]
-
-
 def _log_path() -> str:
     return get_settings().thin_runner_log_path
 
@@ -249,28 +378,28 @@ def _ensure_log_dir() -> None:
 
 
 @router.get("/health")
-def thin_health() -> Dict[str, Any]:
+async def thin_health() -> Dict[str, Any]:
     _require_enabled()
-    catalog_items = _load_catalog()
+    catalog = _require_catalog(await get_catalog_snapshot_async())
     return {
         "ok": True,
-        "catalogSize": len(catalog_items),
-        "pendingOrders": _count_pending(),
+        "catalogSize": len(catalog),
+        "pendingOrders": await _count_pending(),
     }
 
 
 @router.get("/products/random", response_model=ThinCatalogResponse)
 def thin_products_random(count: int = Query(100, ge=1, le=250), seed: Optional[str] = Query(None)) -> ThinCatalogResponse:
     _require_enabled()
-    catalog_items = _load_catalog()
-    if not catalog_items:
+    catalog = _load_catalog()
+    if not len(catalog):
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Catalog unavailable")
-    selection = _shuffle_items(catalog_items, count, seed)
+    selection = catalog.sample(count, seed, population=catalog.view("thin_products", _to_thin_product))
     return ThinCatalogResponse(count=len(selection), seed=seed, items=selection)
 
 
 @router.post("/orders/place", response_model=ThinOrderPlaceResponse)
-def thin_orders_place(body: ThinOrderPlaceRequest) -> ThinOrderPlaceResponse:
+async def thin_orders_place(body: ThinOrderPlaceRequest) -> ThinOrderPlaceResponse:
     _require_enabled()
     received_items = len(body.items)
     order_id = str(uuid.uuid4())
@@ -285,8 +414,7 @@ def thin_orders_place(body: ThinOrderPlaceRequest) -> ThinOrderPlaceResponse:
         "metadata": metadata,
         "result": None,
     }
-    _store_order(order)
-    _queue_order(order_id)
+    await _store_and_queue_order(order)
     return ThinOrderPlaceResponse(
         status="queued",
         orderId=order_id,
@@ -297,30 +425,43 @@ def thin_orders_place(body: ThinOrderPlaceRequest) -> ThinOrderPlaceResponse:
 
 
 @router.get("/orders/next", response_model=ThinOrderResponse, status_code=status.HTTP_200_OK)
-def thin_orders_next(workerId: Optional[str] = Query(default=None)) -> Response | ThinOrderResponse:
+async def thin_orders_next(
+    workerId: Optional[str] = Query(default=None),
+    waitSeconds: float = Query(default=0.0, ge=0),
+) -> Response | ThinOrderResponse:
+    """Claim the next order, long-polling up to ``waitSeconds`` when the queue is empty.
+
+    The claim is visible to other runners again once
+    ``thin_order_visibility_timeout_seconds`` passes without an ack.
+    """
     _require_enabled()
+    await _requeue_stale_claims()
+    # Retries after skipping finished orders share one deadline, so the
+    # request never waits longer than ``waitSeconds`` in total.
+    deadline = time.monotonic() + min(waitSeconds, get_settings().thin_order_max_wait_seconds)
     attempt = 0
     while attempt < 3:
         attempt += 1
-        order_id = _next_pending()
+        order_id = await _claim_next_id(max(0.0, deadline - time.monotonic()))
         if not order_id:
             return Response(status_code=status.HTTP_204_NO_CONTENT)
-        order = _get_order(order_id)
-        if not order:
+        order = await _get_order(order_id)
+        if not order or order.get("status") not in CLAIMABLE_STATUSES:
+            await _release_claim(order_id)
             continue
         order["status"] = "claimed"
         order["claimedAt"] = _now_iso()
         order["claimedBy"] = workerId
-        _store_order(order)
+        await _store_order(order)
         return ThinOrderResponse(**order)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.post("/orders/{order_id}/ack")
-def thin_orders_ack(order_id: str, body: ThinOrderAckRequest) -> Dict[str, Any]:
+async def thin_orders_ack(order_id: str, body: ThinOrderAckRequest) -> Dict[str, Any]:
     _require_enabled()
-    order = _get_order(order_id)
+    order = await _get_order(order_id)
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="order_not_found")
     status_value = body.status or "completed"
@@ -332,14 +473,15 @@ def thin_orders_ack(order_id: str, body: ThinOrderAckRequest) -> Dict[str, Any]:
         "processedItems": body.processedItems,
         "error": body.error,
     }
-    _store_order(order)
+    await _release_claim(order_id)
+    await _store_order(order)
     return {"ok": True}
 
 
 @router.get("/orders/{order_id}", response_model=ThinOrderResponse)
-def thin_orders_get(order_id: str) -> ThinOrderResponse:
+async def thin_orders_get(order_id: str) -> ThinOrderResponse:
     _require_enabled()
-    order = _get_order(order_id)
+    order = await _get_order(order_id)
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="order_not_found")
     return ThinOrderResponse(**order)
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
 
-from ..auth import get_current_principal
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..auth import get_current_principal_async
 from ..db import get_session
-from ..services.payments import get_user_wallet_summary, request_wallet_refund
-from ..schemas import WalletSummary, WalletRefundRequest, WalletRefundResponse
+from ..services.payments import (
+    WALLET_HISTORY_MAX_PAGE_SIZE,
+    WALLET_SUMMARY_TRANSACTION_LIMIT,
+    get_user_wallet_summary,
+    list_wallet_transactions,
+    request_wallet_refund,
+)
+from ..schemas import WalletSummary, WalletRefundRequest, WalletRefundResponse, WalletTransactionPage
 
 router = APIRouter(prefix="/wallet", tags=["wallet"])
 
 
 @router.get("/balance", response_model=WalletSummary)
-async def wallet_balance(principal=Depends(get_current_principal)):
+async def wallet_balance(principal=Depends(get_current_principal_async)):
     async with get_session() as session:
         summary = await get_user_wallet_summary(session, principal.get("sub"))
     if summary is None:
@@ -19,10 +27,29 @@ async def wallet_balance(principal=Depends(get_current_principal)):
     return summary
 
 
+@router.get("/transactions", response_model=WalletTransactionPage)
+async def wallet_transactions(
+    limit: int = Query(default=WALLET_SUMMARY_TRANSACTION_LIMIT, ge=1, le=WALLET_HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    principal=Depends(get_current_principal_async),
+):
+    user_id = principal.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
+    async with get_session() as session:
+        try:
+            transactions, next_cursor = await list_wallet_transactions(
+                session, user_id, limit=limit, cursor=cursor
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return WalletTransactionPage(transactions=transactions, nextCursor=next_cursor)
+
+
 @router.post("/refunds", response_model=WalletRefundResponse)
 async def wallet_refund(
     payload: WalletRefundRequest,
-    principal=Depends(get_current_principal),
+    principal=Depends(get_current_principal_async),
 ):
     async with get_session() as session:
         try:
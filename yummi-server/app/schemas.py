@@ -42,6 +42,7 @@ class OrderStatusResponse(BaseModel):
     items: List[OrderItem]
     retailer: str
     events: List[dict] = []
+    version: int = 0
 
 
 class PayFastInitiateRequest(BaseModel):
@@ -94,6 +95,12 @@ class WalletSummary(BaseModel):
     lockReason: Optional[str] = None
     lockNote: Optional[str] = None
     transactions: List[WalletTransactionSchema] = Field(default_factory=list)
+    transactionsCursor: Optional[str] = None
+
+
+class WalletTransactionPage(BaseModel):
+    transactions: List[WalletTransactionSchema] = Field(default_factory=list)
+    nextCursor: Optional[str] = None
 
 
 class WalletRefundRequest(BaseModel):
@@ -127,6 +134,18 @@ class AdminChargebackResponse(BaseModel):
     lockNote: Optional[str] = None
 
 
+class WalletBalanceDrift(BaseModel):
+    userId: str
+    ledgerMinor: int
+    materializedMinor: int
+
+
+class AdminWalletReconcileResponse(BaseModel):
+    checked: int
+    repaired: bool
+    drift: List[WalletBalanceDrift] = Field(default_factory=list)
+
+
 class WalletRefundAdminActionRequest(BaseModel):
     status: str = Field(pattern=r"^(approved|denied|paid)$")
     note: Optional[str] = Field(default=None, max_length=255)
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import get_settings
+from ..redis_util import get_redis, run_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Admin imports are written as immutable per-version chunks; ``catalog:current``
+# points at the live version and is swapped in one SET once every chunk exists.
+CATALOG_CURRENT_KEY = "catalog:current"
+CATALOG_VERSION_SEQ_KEY = "catalog:version:seq"
+CATALOG_CHUNK_SIZE = 500
+# Superseded versions linger briefly so readers mid-fetch can finish.
+CATALOG_RETIRED_TTL_SECONDS = 300
+# Single-blob layout written by older servers; read until the next import.
+CATALOG_LEGACY_DATA_KEY = "catalog:data"
+
+CatalogEntry = Tuple[str, Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable view of one catalog version.
+
+    Entries are the raw product dicts, shared by every index. Routes that
+    serve products build their response models once per version through
+    ``view`` and sample from that shared list.
+    """
+
+    source: str
+    version: str
+    entries: List[CatalogEntry]
+    by_key: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    by_product_id: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    by_catalog_ref: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    _views: Dict[str, List[Any]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, product_id: Any = None, catalog_ref_id: Any = None) -> Dict[str, Any] | None:
+        if product_id is not None:
+            entry = self.by_product_id.get(str(product_id))
+            if entry:
+                return entry
+        if catalog_ref_id is not None:
+            entry = self.by_catalog_ref.get(str(catalog_ref_id))
+            if entry:
+                return entry
+        return None
+
+    def view(self, name: str, build: Callable[[str, Dict[str, Any]], Any]) -> List[Any]:
+        """``build(key, entry)`` for every entry, computed once per snapshot and shared."""
+        items = self._views.get(name)
+        if items is None:
+            with _VIEW_LOCK:
+                items = self._views.get(name)
+                if items is None:
+                    items = [build(key, entry) for key, entry in self.entries]
+                    self._views[name] = items
+        return items
+
+    def sample(
+        self,
+        count: int,
+        seed: Optional[str] = None,
+        *,
+        population: Sequence[Any] | None = None,
+    ) -> List[Any]:
+        """Random ``count`` entries (or items of a ``view``) without copying; a seed makes it repeatable."""
+        items = self.entries if population is None else population
+        count = min(count, len(items))
+        rng = random.Random(seed) if seed else random
+        return rng.sample(items, count)
+
+
+_LOCK = threading.Lock()
+_VIEW_LOCK = threading.Lock()
+_SNAPSHOT: CatalogSnapshot | None = None
+_NEXT_CHECK_AT: float = 0.0
+
+
+def get_catalog_snapshot() -> CatalogSnapshot | None:
+    """Current catalog, preferring an admin import in Redis over the bundled file.
+
+    The source version (Redis ``catalog:current`` pointer or file mtime/size) is checked
+    at most every ``catalog_refresh_interval_seconds``; the catalog is only
+    re-parsed when that version changes. Returns ``None`` when neither source
+    has a catalog.
+    """
+    global _SNAPSHOT, _NEXT_CHECK_AT
+    snapshot = _SNAPSHOT
+    if snapshot is not None and time.monotonic() < _NEXT_CHECK_AT:
+        return snapshot
+    with _LOCK:
+        now = time.monotonic()
+        if _SNAPSHOT is not None and now < _NEXT_CHECK_AT:
+            return _SNAPSHOT
+        _NEXT_CHECK_AT = now + get_settings().catalog_refresh_interval_seconds
+        source, version = _current_source()
+        if source is None:
+            _SNAPSHOT = None
+            return None
+        if _SNAPSHOT is not None and (_SNAPSHOT.source, _SNAPSHOT.version) == (source, version):
+            return _SNAPSHOT
+        entries = _read_entries(source, version)
+        if entries is None:
+            return _SNAPSHOT
+        _SNAPSHOT = _build_snapshot(source, version, entries)
+        logger.info("Loaded catalog source=%s version=%s entries=%d", source, version, len(_SNAPSHOT))
+        return _SNAPSHOT
+
+
+async def get_catalog_snapshot_async() -> CatalogSnapshot | None:
+    """``get_catalog_snapshot`` for coroutines.
+
+    A fresh snapshot is returned directly; the source version check (a Redis
+    round trip) and any reload run in a worker thread, off the event loop.
+    """
+    snapshot = _SNAPSHOT
+    if snapshot is not None and time.monotonic() < _NEXT_CHECK_AT:
+        return snapshot
+    return await run_in_threadpool(get_catalog_snapshot)
+
+
+def peek_catalog_snapshot() -> CatalogSnapshot | None:
+    """The last loaded snapshot, without checking the source.
+
+    For synchronous helpers running on the event loop inside a request that
+    already awaited ``get_catalog_snapshot_async``.
+    """
+    return _SNAPSHOT
+
+
+def invalidate_catalog_snapshot() -> None:
+    """Force the next read to re-check the source (e.g. right after an admin import)."""
+    global _NEXT_CHECK_AT
+    with _LOCK:
+        _NEXT_CHECK_AT = 0.0
+
+
+def publish_catalog(payload: Any) -> Tuple[str, int]:
+    """Store an admin import as a new version and make it live.
+
+    Returns the new version and entry count. Raises ``ValueError`` for an
+    empty catalog and ``RuntimeError`` when Redis is not configured.
+    """
+    r = get_redis()
+    if r is None:
+        raise RuntimeError("Redis not configured")
+    entries = _iter_entries(payload)
+    if not entries:
+        raise ValueError("No items to import")
+    version = str(r.incr(CATALOG_VERSION_SEQ_KEY))
+    chunks = [entries[idx : idx + CATALOG_CHUNK_SIZE] for idx in range(0, len(entries), CATALOG_CHUNK_SIZE)]
+
+    def _write(pipe) -> None:
+        for idx, chunk in enumerate(chunks):
+            pipe.set(_chunk_key(version, idx), json.dumps(chunk, separators=(",", ":")))
+        pipe.hset(_meta_key(version), mapping={"count": len(entries), "chunks": len(chunks)})
+
+    run_pipeline(r, _write, transaction=False)
+    previous = r.set(CATALOG_CURRENT_KEY, version, get=True)
+    if previous and previous != version:
+        _retire_version(r, previous)
+    r.delete(CATALOG_LEGACY_DATA_KEY)
+    invalidate_catalog_snapshot()
+    return version, len(entries)
+
+
+def catalog_file_path() -> str:
+    return get_settings().catalog_path or "resolver/catalog.json"
+
+
+def load_catalog_file(path: str) -> CatalogSnapshot:
+    """Parse a catalog file outside the shared snapshot (used by offline build steps)."""
+    with open(path, "r", encoding="utf-8") as handle:
+        entries = _iter_entries(json.load(handle))
+    stat = os.stat(path)
+    return _build_snapshot("file", f"{path}:{stat.st_mtime_ns}:{stat.st_size}", entries)
+
+
+def _current_source() -> Tuple[str | None, str]:
+    r = get_redis()
+    if r is not None:
+        try:
+            version, legacy = run_pipeline(
+                r,
+                lambda pipe: (pipe.get(CATALOG_CURRENT_KEY), pipe.exists(CATALOG_LEGACY_DATA_KEY)),
+                transaction=False,
+            )
+        except Exception as exc:  # pragma: no cover - fall back to the file
+            logger.warning("Catalog version check failed: %s", exc)
+            version, legacy = None, 0
+        if version:
+            return "redis", str(version)
+        if legacy:
+            return "redis", "legacy"
+    path = catalog_file_path()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, ""
+    return "file", f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _read_entries(source: str, version: str) -> List[CatalogEntry] | None:
+    try:
+        if source == "file":
+            with open(catalog_file_path(), "r", encoding="utf-8") as handle:
+                return _iter_entries(json.load(handle))
+        r = get_redis()
+        if r is None:
+            return None
+        if version == "legacy":
+            raw = r.get(CATALOG_LEGACY_DATA_KEY)
+            return _iter_entries(json.loads(raw)) if raw else None
+        chunk_count = int(r.hget(_meta_key(version), "chunks") or 0)
+        if not chunk_count:
+            return None
+        raw_chunks = run_pipeline(
+            r,
+            lambda pipe: [pipe.get(_chunk_key(version, idx)) for idx in range(chunk_count)],
+            transaction=False,
+        )
+        if any(raw is None for raw in raw_chunks):
+            return None
+        return [(str(key), entry) for raw in raw_chunks for key, entry in json.loads(raw)]
+    except Exception as exc:
+        logger.warning("Failed to read catalog from %s version=%s: %s", source, version, exc)
+        return None
+
+
+def _chunk_key(version: str, idx: int) -> str:
+    return f"catalog:v{version}:chunk:{idx}"
+
+
+def _meta_key(version: str) -> str:
+    return f"catalog:v{version}:meta"
+
+
+def _retire_version(r, version: str) -> None:
+    chunk_count = int(r.hget(_meta_key(version), "chunks") or 0)
+
+    def _expire(pipe) -> None:
+        pipe.expire(_meta_key(version), CATALOG_RETIRED_TTL_SECONDS)
+        for idx in range(chunk_count):
+            pipe.expire(_chunk_key(version, idx), CATALOG_RETIRED_TTL_SECONDS)
+
+    run_pipeline(r, _expire, transaction=False)
+
+
+def _iter_entries(payload: Any) -> List[CatalogEntry]:
+    """Normalise the supported layouts: a list, ``{"items": [...]}`` or ``{key: product}``."""
+    if isinstance(payload, dict) and isinstance(payload.get("items"), list):
+        payload = payload["items"]
+    entries: List[CatalogEntry] = []
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            if isinstance(value, dict):
+                entries.append((str(key), value))
+    elif isinstance(payload, list):
+        for idx, value in enumerate(payload):
+            if isinstance(value, dict):
+                key = value.get("key") or value.get("title") or value.get("name") or f"item_{idx}"
+                entries.append((str(key), value))
+    return entries
+
+
+def _build_snapshot(source: str, version: str, entries: List[CatalogEntry]) -> CatalogSnapshot:
+    by_key: Dict[str, Dict[str, Any]] = {}
+    by_product: Dict[str, Dict[str, Any]] = {}
+    by_catalog_ref: Dict[str, Dict[str, Any]] = {}
+    for key, entry in entries:
+        by_key[key] = entry
+        product_id = entry.get("productId") or entry.get("product_id") or entry.get("sku")
+        catalog_ref = entry.get("catalogRefId") or entry.get("catalog_ref_id")
+        if product_id is not None:
+            by_product[str(product_id)] = entry
+        if catalog_ref is not None:
+            by_catalog_ref[str(catalog_ref)] = entry
+    return CatalogSnapshot(
+        source=source,
+        version=version,
+        entries=entries,
+        by_key=by_key,
+        by_product_id=by_product,
+        by_catalog_ref=by_catalog_ref,
+    )
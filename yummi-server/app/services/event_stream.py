@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Set
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+MealCallback = Callable[[BaseModel], None]
+WorkflowRunner = Callable[[MealCallback], Awaitable[BaseModel]]
+
+# Workflows keep running after a client disconnects (they persist sessions and
+# latest recommendations), so hold a strong reference until they finish.
+_DETACHED_RUNS: Set[asyncio.Task] = set()
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+SSE_KEEPALIVE_COMMENT = ": keep-alive\n\n"
+
+
+async def stream_workflow_events(
+    run: WorkflowRunner,
+    *,
+    keepalive_seconds: float | None = None,
+) -> AsyncIterator[str]:
+    """Yield ``meal`` events as the workflow emits cards, then ``summary`` or ``error``.
+
+    Errors are reported in-band because the 200 status has already been sent
+    by the time the workflow fails. A ``: keep-alive`` comment goes out after
+    every ``keepalive_seconds`` (default ``SSE_KEEPALIVE_SECONDS``) without an
+    event, so proxies do not drop the connection while the model is thinking.
+    """
+    if keepalive_seconds is None:
+        keepalive_seconds = get_settings().sse_keepalive_seconds
+    queue: asyncio.Queue[tuple[str, Any] | None] = asyncio.Queue()
+
+    def on_meal(meal: BaseModel) -> None:
+        queue.put_nowait(("meal", meal.model_dump(mode="json")))
+
+    async def _run() -> None:
+        try:
+            result = await run(on_meal)
+            queue.put_nowait(("summary", result.model_dump(mode="json")))
+        except HTTPException as exc:
+            queue.put_nowait(("error", {"status": exc.status_code, "detail": exc.detail}))
+        except Exception:  # pragma: no cover - defensive
+            logger.exception("Streaming workflow failed")
+            queue.put_nowait(("error", {"status": 500, "detail": "Internal server error"}))
+        finally:
+            queue.put_nowait(None)
+
+    task = asyncio.create_task(_run())
+    _DETACHED_RUNS.add(task)
+    task.add_done_callback(_DETACHED_RUNS.discard)
+    while True:
+        try:
+            item = await asyncio.wait_for(queue.get(), keepalive_seconds)
+        except asyncio.TimeoutError:
+            yield SSE_KEEPALIVE_COMMENT
+            continue
+        if item is None:
+            break
+        event, data = item
+        yield format_sse_event(event, data)
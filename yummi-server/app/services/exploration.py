@@ -26,10 +26,12 @@ from ..schemas import (
     MAX_CANDIDATE_POOL_LIMIT,
 )
 from .filtering import CandidateMealDetail, generate_candidate_pool_with_details
-from .meals import get_meal_manifest
+from .meals import get_meal_manifest_index
 from .meal_representation import extract_key_ingredients, extract_sku_snapshot, format_json
-from .openai_responses import call_openai_responses
+from .llm_scheduler import LLMPriority
+from .openai_responses import call_openai_responses_async
 from .exploration_tracker import register_background_run
+from .json_stream import JsonArrayStreamParser
 from .preferences import (
     get_user_preference_profile,
     load_tag_manifest,
@@ -43,12 +45,19 @@ async def run_exploration_workflow(
     *,
     user_id: str,
     request: ExplorationRunRequest,
+    on_meal: Callable[[ExplorationMeal], None] | None = None,
 ) -> ExplorationRunResponse:
+    """Run the exploration pipeline.
+
+    ``on_meal`` receives each meal card as soon as the model streams its ID
+    (capped at the meal target); the returned response stays authoritative.
+    """
     settings = get_settings()
     if not settings.openai_api_key:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="OpenAI not configured")
 
-    manifest = get_meal_manifest()
+    manifest_index = get_meal_manifest_index()
+    manifest = manifest_index.manifest
     tag_manifest = load_tag_manifest()
 
     async with get_session() as session:
@@ -67,7 +76,7 @@ async def run_exploration_workflow(
     )
     filter_request = CandidateFilterRequest(limit=MAX_CANDIDATE_POOL_LIMIT)
     filter_response, detail_records = generate_candidate_pool_with_details(
-        manifest=manifest,
+        manifest_index=manifest_index,
         tag_manifest=tag_manifest,
         profile=profile,
         request=filter_request,
@@ -94,6 +103,8 @@ async def run_exploration_workflow(
         )
 
     streamed_meal_ids: Dict[str, List[str]] = defaultdict(list)
+    batch_details_by_uid = dict(archetype_batches)
+    emitted_meal_ids: set[str] = set()
 
     def handle_streamed_meal(archetype_uid: str, meal_id: str) -> None:
         if not archetype_uid or not meal_id:
@@ -105,6 +116,13 @@ async def run_exploration_workflow(
             archetype_uid,
             meal_id,
         )
+        if on_meal is None or meal_id in emitted_meal_ids or len(emitted_meal_ids) >= meal_target:
+            return
+        for meal in _materialize_meals(
+            [{"meal_id": meal_id}], batch_details_by_uid.get(archetype_uid) or [], None
+        ):
+            emitted_meal_ids.add(meal_id)
+            on_meal(meal)
 
     timeout_seconds = settings.exploration_stream_timeout_seconds
     archetype_payloads, pending_tasks = await _score_archetype_batches(
@@ -270,6 +288,7 @@ async def _score_archetype_batches(
     on_stream_meal: Callable[[str, str], None] | None = None,
     timeout_seconds: int | None = None,
     get_streamed_ids: Callable[[str], List[str]] | None = None,
+    priority: LLMPriority = LLMPriority.INTERACTIVE,
 ) -> tuple[List[tuple[str, Dict[str, Any], List[CandidateMealDetail]]], List[asyncio.Task]]:
     tasks = []
     for archetype_uid, batch_details in archetype_batches:
@@ -281,6 +300,7 @@ async def _score_archetype_batches(
                 batch_details=batch_details,
                 settings=settings,
                 on_stream_meal=on_stream_meal,
+                priority=priority,
             )
         )
         tasks.append((task, archetype_uid, batch_details))
@@ -333,13 +353,13 @@ async def _score_single_archetype_batch(
     batch_details: List[CandidateMealDetail],
     settings,
     on_stream_meal: Callable[[str, str], None] | None,
+    priority: LLMPriority = LLMPriority.INTERACTIVE,
 ) -> tuple[str, Dict[str, Any], List[CandidateMealDetail]]:
     stream_accumulator = _StreamingMealAccumulator(archetype_uid, on_stream_meal)
     candidates = _prepare_llm_candidates(batch_details, len(batch_details))
     system_prompt, user_prompt = _build_prompts(profile_payload, candidates, None)
     llm_start = perf_counter()
-    llm_text = await asyncio.to_thread(
-        call_openai_responses,
+    llm_text = await call_openai_responses_async(
         model=settings.openai_exploration_model,
         system_prompt=system_prompt,
         user_prompt=user_prompt,
@@ -348,6 +368,8 @@ async def _score_single_archetype_batch(
         reasoning_effort=settings.openai_exploration_reasoning_effort,
         stream=True,
         on_stream_delta=stream_accumulator.handle_delta,
+        priority=priority,
+        user_id=user_id,
     )
     duration = perf_counter() - llm_start
     logger.info(
@@ -486,24 +508,26 @@ class _StreamingMealAccumulator:
     ) -> None:
         self.archetype_uid = archetype_uid
         self.callback = callback
-        self.buffer: str = ""
+        self._chunks: List[str] = []
+        self._parser = JsonArrayStreamParser("explorationSet")
         self._emitted: set[str] = set()
 
+    @property
+    def buffer(self) -> str:
+        return "".join(self._chunks)
+
     def handle_delta(self, delta: str | None) -> None:
         if not delta:
             return
-        self.buffer += delta
-        self._try_emit_ids()
-
-    def _try_emit_ids(self) -> None:
+        self._chunks.append(delta)
         if not self.callback:
             return
-        try:
-            payload = json.loads(self.buffer)
-        except json.JSONDecodeError:
-            return
-        selections = payload.get("explorationSet") or []
+        self._emit_ids(self._parser.feed(delta))
+
+    def _emit_ids(self, selections: List[Any]) -> None:
         for selection in selections:
+            if not isinstance(selection, dict):
+                continue
             meal_id = selection.get("meal_id")
             if not meal_id or meal_id in self._emitted:
                 continue
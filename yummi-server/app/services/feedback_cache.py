@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+from prometheus_client import Counter
+
+from ..config import get_settings
+from ..redis_util import get_async_redis, run_async_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Per-user hash of meal_id -> compact JSON entry for the latest reaction. The
+# marker field lets an empty summary be cached too.
+FEEDBACK_SUMMARY_KEY_PREFIX = "feedback:summary:"
+FEEDBACK_VERSION_KEY_PREFIX = "feedback:version:"
+_LOADED_FIELD = "_"
+
+FEEDBACK_SUMMARY_CACHE_LOOKUPS = Counter(
+    "yummi_feedback_summary_cache_lookups_total",
+    "Feedback summary cache lookups by outcome",
+    ["result"],
+)
+
+# Bumps the user's version (so in-flight cold loads discard their snapshot)
+# and merges entries only into an already-loaded summary; a reset replaces it.
+# ARGV: ttl, reset flag, count of retained meal ids (-1 keeps every field),
+# the retained ids, then meal_id/entry pairs.
+_WRITE_THROUGH_SCRIPT = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+local retained = tonumber(ARGV[3])
+local first_pair = 4 + math.max(retained, 0)
+if ARGV[2] == '1' then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], '_', '1', unpack(ARGV, first_pair))
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+elseif redis.call('EXISTS', KEYS[1]) == 1 then
+    if #ARGV >= first_pair then
+        redis.call('HSET', KEYS[1], unpack(ARGV, first_pair))
+    end
+    if retained >= 0 then
+        local keep = {['_'] = true}
+        for i = 4, 3 + retained do
+            keep[ARGV[i]] = true
+        end
+        for _, field in ipairs(redis.call('HKEYS', KEYS[1])) do
+            if not keep[field] then
+                redis.call('HDEL', KEYS[1], field)
+            end
+        end
+    end
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+# Stores a cold-loaded summary only if the user's version still matches the
+# one read before the load. ARGV: expected version ('' if unset), ttl, fields.
+_STORE_IF_UNCHANGED_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+FeedbackEntries = Dict[str, Dict[str, Any]]
+FeedbackLoader = Callable[[], Awaitable[FeedbackEntries]]
+
+_LOCK = threading.Lock()
+_MEMORY_CACHE: "OrderedDict[str, tuple[float, FeedbackEntries]]" = OrderedDict()
+_MEMORY_VERSIONS: "OrderedDict[str, int]" = OrderedDict()
+
+
+async def load_cached_feedback_entries(user_id: str, loader: FeedbackLoader) -> FeedbackEntries:
+    """Latest reaction per meal for ``user_id``, calling ``loader`` on a miss.
+
+    A cold load is only cached if no feedback write for the user landed while
+    ``loader`` was querying, so a racing write-through can never be lost.
+    """
+    client = get_async_redis()
+    if client is not None:
+        try:
+            return await _redis_load(client, user_id, loader)
+        except Exception as exc:  # pragma: no cover - cache is best effort
+            logger.warning("Feedback summary cache read failed user=%s error=%s", user_id, exc)
+            return await loader()
+    return await _memory_load(user_id, loader)
+
+
+async def write_through_feedback_entries(
+    user_id: str,
+    entries: FeedbackEntries,
+    *,
+    reset: bool = False,
+    retain: Iterable[str] | None = None,
+) -> None:
+    """Apply freshly committed reactions to a cached summary.
+
+    ``reset`` replaces the summary with ``entries`` (used when history is
+    cleared); otherwise entries are merged only if a summary is already cached.
+    ``retain`` lists the meals that still have events after retention trimmed
+    the history; cached entries for any other meal are dropped with them.
+    """
+    ttl = get_settings().feedback_summary_cache_ttl_seconds
+    retained = None if retain is None else set(retain)
+    client = get_async_redis()
+    if client is not None:
+        args: list[Any] = [ttl, "1" if reset else "0"]
+        if retained is None:
+            args.append(-1)
+        else:
+            args.append(len(retained))
+            args.extend(retained)
+        for meal_id, entry in entries.items():
+            args.extend([meal_id, json.dumps(entry, separators=(",", ":"), default=str)])
+        try:
+            await client.eval(
+                _WRITE_THROUGH_SCRIPT,
+                2,
+                FEEDBACK_SUMMARY_KEY_PREFIX + user_id,
+                FEEDBACK_VERSION_KEY_PREFIX + user_id,
+                *args,
+            )
+        except Exception as exc:  # pragma: no cover - cache is best effort
+            logger.warning("Feedback summary write-through failed user=%s error=%s", user_id, exc)
+            await _redis_invalidate(client, user_id)
+        return
+
+    with _LOCK:
+        _bump_memory_version(user_id)
+        cached = _MEMORY_CACHE.get(user_id)
+        if reset:
+            _memory_store(user_id, dict(entries), ttl)
+        elif cached is not None and cached[0] > time.monotonic():
+            merged = {**cached[1], **entries}
+            if retained is not None:
+                merged = {meal_id: entry for meal_id, entry in merged.items() if meal_id in retained}
+            _memory_store(user_id, merged, ttl)
+
+
+def clear_feedback_summary_cache() -> None:
+    with _LOCK:
+        _MEMORY_CACHE.clear()
+        _MEMORY_VERSIONS.clear()
+
+
+async def _redis_load(client, user_id: str, loader: FeedbackLoader) -> FeedbackEntries:
+    summary_key = FEEDBACK_SUMMARY_KEY_PREFIX + user_id
+    version_key = FEEDBACK_VERSION_KEY_PREFIX + user_id
+    # Read the version with the summary so no connection is held (as a WATCH
+    # would) while ``loader`` queries the database.
+    version, cached = await run_async_pipeline(
+        client,
+        lambda pipe: (pipe.get(version_key), pipe.hgetall(summary_key)),
+        transaction=False,
+    )
+    if cached:
+        FEEDBACK_SUMMARY_CACHE_LOOKUPS.labels("redis_hit").inc()
+        return {
+            meal_id: json.loads(raw)
+            for meal_id, raw in cached.items()
+            if meal_id != _LOADED_FIELD
+        }
+    FEEDBACK_SUMMARY_CACHE_LOOKUPS.labels("miss").inc()
+    entries = await loader()
+    args: list[Any] = [version or "", get_settings().feedback_summary_cache_ttl_seconds, _LOADED_FIELD, "1"]
+    for meal_id, entry in entries.items():
+        args.extend([meal_id, json.dumps(entry, separators=(",", ":"), default=str)])
+    stored = await client.eval(_STORE_IF_UNCHANGED_SCRIPT, 2, summary_key, version_key, *args)
+    if not stored:
+        logger.debug("Feedback summary changed during cold load user=%s; not caching", user_id)
+    return entries
+
+
+async def _redis_invalidate(client, user_id: str) -> None:
+    try:
+        await client.delete(FEEDBACK_SUMMARY_KEY_PREFIX + user_id)
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        logger.warning("Feedback summary invalidation failed user=%s error=%s", user_id, exc)
+
+
+async def _memory_load(user_id: str, loader: FeedbackLoader) -> FeedbackEntries:
+    now = time.monotonic()
+    with _LOCK:
+        cached = _MEMORY_CACHE.get(user_id)
+        if cached is not None and cached[0] > now:
+            _MEMORY_CACHE.move_to_end(user_id)
+            FEEDBACK_SUMMARY_CACHE_LOOKUPS.labels("memory_hit").inc()
+            return dict(cached[1])
+        version = _MEMORY_VERSIONS.get(user_id, 0)
+    FEEDBACK_SUMMARY_CACHE_LOOKUPS.labels("miss").inc()
+    entries = await loader()
+    with _LOCK:
+        if _MEMORY_VERSIONS.get(user_id, 0) == version:
+            _memory_store(user_id, dict(entries), get_settings().feedback_summary_cache_ttl_seconds)
+    return entries
+
+
+def _memory_store(user_id: str, entries: FeedbackEntries, ttl: int) -> None:
+    max_entries = get_settings().feedback_summary_cache_max_entries
+    _MEMORY_CACHE[user_id] = (time.monotonic() + ttl, entries)
+    _MEMORY_CACHE.move_to_end(user_id)
+    while len(_MEMORY_CACHE) > max_entries:
+        _MEMORY_CACHE.popitem(last=False)
+
+
+def _bump_memory_version(user_id: str) -> None:
+    _MEMORY_VERSIONS[user_id] = _MEMORY_VERSIONS.get(user_id, 0) + 1
+    _MEMORY_VERSIONS.move_to_end(user_id)
+    # Versions only matter while a cold load is in flight, so old ones can go.
+    while len(_MEMORY_VERSIONS) > get_settings().feedback_summary_cache_max_entries:
+        _MEMORY_VERSIONS.popitem(last=False)
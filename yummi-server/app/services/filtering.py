@@ -17,6 +17,7 @@ from ..schemas import (
     DEFAULT_CANDIDATE_POOL_LIMIT,
     MAX_CANDIDATE_POOL_LIMIT,
 )
+from .meals import MealManifestIndex, MealTagIndex
 from .preferences import TagManifest
 
 logger = logging.getLogger(__name__)
@@ -43,7 +44,7 @@ class CandidateMealDetail:
 
 def generate_candidate_pool(
     *,
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
     tag_manifest: TagManifest,
     profile: UserPreferenceProfile | None,
     request: CandidateFilterRequest,
@@ -51,7 +52,7 @@ def generate_candidate_pool(
 ) -> CandidateFilterResponse:
     """Build the filtered candidate pool returned to the client/AI worker."""
     response, _ = _build_candidate_pool(
-        manifest=manifest,
+        manifest_index=manifest_index,
         tag_manifest=tag_manifest,
         profile=profile,
         request=request,
@@ -62,14 +63,14 @@ def generate_candidate_pool(
 
 def generate_candidate_pool_with_details(
     *,
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
     tag_manifest: TagManifest,
     profile: UserPreferenceProfile | None,
     request: CandidateFilterRequest,
     user_id: str,
 ) -> tuple[CandidateFilterResponse, List[CandidateMealDetail]]:
     return _build_candidate_pool(
-        manifest=manifest,
+        manifest_index=manifest_index,
         tag_manifest=tag_manifest,
         profile=profile,
         request=request,
@@ -79,7 +80,7 @@ def generate_candidate_pool_with_details(
 
 def _build_candidate_pool(
     *,
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
     tag_manifest: TagManifest,
     profile: UserPreferenceProfile | None,
     request: CandidateFilterRequest,
@@ -94,15 +95,15 @@ def _build_candidate_pool(
         declined_ids=request.declinedMealIds,
     )
     total_candidates, summaries, details = _filter_manifest(
-        manifest=manifest,
+        manifest_index=manifest_index,
         constraints=constraints,
         limit=limit,
     )
     response = CandidateFilterResponse(
         candidatePoolId=str(uuid.uuid4()),
-        mealVersion=manifest.get("manifest_id"),
-        manifestId=manifest.get("manifest_id"),
-        tagsVersion=manifest.get("tags_version"),
+        mealVersion=manifest_index.manifest.get("manifest_id"),
+        manifestId=manifest_index.manifest.get("manifest_id"),
+        tagsVersion=manifest_index.manifest.get("tags_version"),
         generatedAt=datetime.now(timezone.utc),
         totalCandidates=total_candidates,
         returnedCount=len(summaries),
@@ -186,48 +187,55 @@ def _resolve_disliked_values(
     return resolved
 
 
+def _match_constraints(index: MealTagIndex, constraints: ConstraintContext) -> int:
+    if not constraints.selected_audience or not constraints.required_dietary_restrictions:
+        return 0
+    mask = index.all_mask & index.category_mask("Audience", constraints.selected_audience)
+    for value in constraints.required_dietary_restrictions:
+        if not mask:
+            return 0
+        mask &= index.category_mask("DietaryRestrictions", value)
+    for meal_id in constraints.declined_meal_ids:
+        mask &= ~index.meal_id_masks.get(meal_id, 0)
+    for value in constraints.disallowed_allergens:
+        mask &= ~index.category_mask("Allergens", value)
+    for category, disliked_values in constraints.disliked_tag_values.items():
+        for value in disliked_values:
+            mask &= ~index.category_mask(category, value)
+    return mask
+
+
+def _iter_positions(mask: int, ranges: List[tuple[int, int]]) -> List[int]:
+    positions: List[int] = []
+    for start, end in ranges:
+        window = (mask >> start) & ((1 << (end - start)) - 1)
+        while window:
+            low = window & -window
+            positions.append(start + low.bit_length() - 1)
+            window ^= low
+    return positions
+
+
 def _filter_manifest(
     *,
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
     constraints: ConstraintContext,
     limit: int,
 ) -> tuple[int, List[CandidateMealSummary], List[CandidateMealDetail]]:
-    archetypes = manifest.get("archetypes") or []
-    grouped: Dict[str | None, List[tuple[CandidateMealSummary, CandidateMealDetail]]] = {}
-
-    for archetype in archetypes:
-        archetype_uid = archetype.get("uid")
-        for meal in archetype.get("meals") or []:
-            meal_id = meal.get("meal_id")
-            if not meal_id or meal_id in constraints.declined_meal_ids:
-                continue
-            tags = meal.get("meal_tags") or {}
-            if not _passes_audience(tags, constraints):
-                continue
-            if not _passes_dietary_restrictions(tags, constraints):
-                continue
-            if not _passes_allergens(tags, constraints):
-                continue
-            if not _passes_disliked_tags(tags, constraints):
-                continue
-            grouped.setdefault(archetype_uid, []).append(
-                (
-                    _build_candidate_summary(meal, archetype_uid),
-                    CandidateMealDetail(archetype_uid=archetype_uid, meal=meal),
-                )
-            )
-
-    total_matches = sum(len(pairs) for pairs in grouped.values())
+    index = manifest_index.tags
+    mask = _match_constraints(index, constraints)
+    total_matches = mask.bit_count()
     if total_matches <= limit:
-        summaries: List[CandidateMealSummary] = []
-        details: List[CandidateMealDetail] = []
-        for pairs in grouped.values():
-            for summary, detail in pairs:
-                summaries.append(summary)
-                details.append(detail)
-        return total_matches, summaries, details
-
-    archetype_entries = list(grouped.items())
+        positions: List[int] = []
+        for ranges in index.archetype_ranges.values():
+            positions.extend(_iter_positions(mask, ranges))
+        return total_matches, *_materialize_positions(index, positions)
+
+    archetype_entries = [
+        (uid, ranges)
+        for uid, ranges in index.archetype_ranges.items()
+        if any(((mask >> start) & ((1 << (end - start)) - 1)) for start, end in ranges)
+    ]
     random.shuffle(archetype_entries)
     distinct_archetypes = len(archetype_entries)
     if distinct_archetypes == 0:
@@ -236,68 +244,44 @@ def _filter_manifest(
     base = limit // distinct_archetypes
     remainder = limit % distinct_archetypes
 
-    selected_pairs: List[tuple[CandidateMealSummary, CandidateMealDetail]] = []
-    for index, (uid, pairs) in enumerate(archetype_entries):
+    selected_positions: List[int] = []
+    leftover_positions: List[int] = []
+    for uid, ranges in archetype_entries:
         take = base
         if remainder > 0:
             take += 1
             remainder -= 1
+        group = _iter_positions(mask, ranges)
         if take <= 0:
+            leftover_positions.extend(group)
             continue
-        if take >= len(pairs):
-            selected = pairs
-            grouped[uid] = []
+        if take >= len(group):
+            selected_positions.extend(group)
         else:
-            random.shuffle(pairs)
-            selected = pairs[:take]
-            grouped[uid] = pairs[take:]
-        selected_pairs.extend(selected)
-
-    if len(selected_pairs) < limit:
-        remaining_needed = limit - len(selected_pairs)
-        leftovers: List[tuple[CandidateMealSummary, CandidateMealDetail]] = []
-        for remaining_pairs in grouped.values():
-            leftovers.extend(remaining_pairs)
-        random.shuffle(leftovers)
-        selected_pairs.extend(leftovers[:remaining_needed])
-
-    selected_pairs = selected_pairs[:limit]
-    summaries = [summary for summary, _ in selected_pairs]
-    details = [detail for _, detail in selected_pairs]
-    return total_matches, summaries, details
-
-
-def _passes_audience(tags: Dict[str, List[str]], constraints: ConstraintContext) -> bool:
-    selected_audience = constraints.selected_audience
-    if not selected_audience:
-        return False
-    meal_audience = tags.get("Audience") or []
-    return selected_audience in meal_audience
-
+            random.shuffle(group)
+            selected_positions.extend(group[:take])
+            leftover_positions.extend(group[take:])
 
-def _passes_dietary_restrictions(tags: Dict[str, List[str]], constraints: ConstraintContext) -> bool:
-    required_tags = constraints.required_dietary_restrictions
-    if not required_tags:
-        return False
-    meal_tags = set(tags.get("DietaryRestrictions") or [])
-    return required_tags.issubset(meal_tags)
+    if len(selected_positions) < limit:
+        remaining_needed = limit - len(selected_positions)
+        random.shuffle(leftover_positions)
+        selected_positions.extend(leftover_positions[:remaining_needed])
 
-
-def _passes_allergens(tags: Dict[str, List[str]], constraints: ConstraintContext) -> bool:
-    if not constraints.disallowed_allergens:
-        return True
-    meal_allergens = set(tags.get("Allergens") or [])
-    return not bool(meal_allergens & constraints.disallowed_allergens)
+    summaries, details = _materialize_positions(index, selected_positions[:limit])
+    return total_matches, summaries, details
 
 
-def _passes_disliked_tags(tags: Dict[str, List[str]], constraints: ConstraintContext) -> bool:
-    if not constraints.disliked_tag_values:
-        return True
-    for category, disliked_values in constraints.disliked_tag_values.items():
-        meal_values = set(tags.get(category) or [])
-        if meal_values & disliked_values:
-            return False
-    return True
+def _materialize_positions(
+    index: MealTagIndex,
+    positions: List[int],
+) -> tuple[List[CandidateMealSummary], List[CandidateMealDetail]]:
+    summaries: List[CandidateMealSummary] = []
+    details: List[CandidateMealDetail] = []
+    for position in positions:
+        meal, archetype_uid = index.meals[position]
+        summaries.append(_build_candidate_summary(meal, archetype_uid))
+        details.append(CandidateMealDetail(archetype_uid=archetype_uid, meal=meal))
+    return summaries, details
 
 
 def _build_candidate_summary(meal: Dict[str, Any], archetype_uid: str | None) -> CandidateMealSummary:
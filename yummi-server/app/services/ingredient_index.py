@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping
+
+# Bump when the table layout or the option shape changes; servers ignore
+# artifacts with another version and recompile from the JSONL classifications.
+INGREDIENT_INDEX_FORMAT_VERSION = 1
+
+IngredientOptions = Dict[str, List[Dict[str, Any]]]
+
+
+class IngredientIndex:
+    """Read-only view of a compiled ingredient → product index.
+
+    Each lookup reads one label's rows through the primary key, so opening the
+    artifact costs a metadata read rather than a parse of every product.
+    Behaves like the ``{label: [option, ...]}`` mapping it was compiled from.
+    """
+
+    def __init__(self, path: str, conn: sqlite3.Connection, meta: Dict[str, str]) -> None:
+        self.path = path
+        self.meta = meta
+        self._conn = conn
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int(self.meta.get("labels") or 0)
+
+    def get(self, label: str, default: Any = None) -> List[Dict[str, Any]] | Any:
+        with self._lock:
+            if self._closed:
+                # A request still holding a replaced index; the next load sees the new one.
+                return default
+            rows = self._conn.execute(
+                "SELECT option FROM options WHERE label = ? ORDER BY rank",
+                (label,),
+            ).fetchall()
+        if not rows:
+            return default
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._conn.close()
+
+
+def open_ingredient_index(
+    path: str,
+    *,
+    catalog_version: str,
+    source_sha256: str | None = None,
+) -> IngredientIndex | None:
+    """Open a compiled index, or ``None`` if it is unreadable or out of date.
+
+    ``catalog_version`` is the version of the live catalog snapshot; prices and
+    pack sizes are joined in at compile time, so an artifact built against
+    another catalog (or none) is rejected. ``source_sha256`` is the digest of
+    the classifications file the caller would otherwise parse; an artifact
+    compiled from different contents is rejected too.
+    """
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.Error:
+        return None
+    if (
+        meta.get("format_version") != str(INGREDIENT_INDEX_FORMAT_VERSION)
+        or not meta.get("catalog_version")
+        or meta.get("catalog_version") != catalog_version
+        or (source_sha256 is not None and meta.get("source_sha256") != source_sha256)
+    ):
+        conn.close()
+        return None
+    return IngredientIndex(path, conn, meta)
+
+
+def write_ingredient_index(
+    path: str,
+    options: Mapping[str, List[Dict[str, Any]]],
+    *,
+    source_sha256: str,
+    catalog_version: str,
+) -> int:
+    """Write ``options`` to a new artifact at ``path``, replacing any old one atomically.
+
+    Each writer uses its own temporary file, so workers compiling at the same
+    time do not clobber each other. Returns the number of options written.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    rows = [
+        (label, rank, json.dumps(option, ensure_ascii=False, separators=(",", ":")))
+        for label, label_options in options.items()
+        for rank, option in enumerate(label_options)
+    ]
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.executescript(
+                """
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+                CREATE TABLE options (
+                    label TEXT NOT NULL,
+                    rank INTEGER NOT NULL,
+                    option TEXT NOT NULL,
+                    PRIMARY KEY (label, rank)
+                ) WITHOUT ROWID;
+                """
+            )
+            conn.executemany("INSERT INTO options (label, rank, option) VALUES (?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ("format_version", str(INGREDIENT_INDEX_FORMAT_VERSION)),
+                    ("source_sha256", source_sha256),
+                    ("catalog_version", catalog_version),
+                    ("labels", str(len(options))),
+                    ("options", str(len(rows))),
+                    ("built_at", datetime.now(timezone.utc).isoformat()),
+                ],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(rows)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
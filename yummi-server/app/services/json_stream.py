@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, List
+
+logger = logging.getLogger(__name__)
+
+
+class JsonArrayStreamParser:
+    """Emit elements of one top-level array field while JSON text streams in.
+
+    ``feed`` consumes each delta exactly once and returns the elements of
+    ``field`` that closed within it, so CPU stays linear in the output length
+    instead of re-parsing the whole buffer per delta. Text outside the
+    top-level object (e.g. a ```json fence) is ignored. Only the element being
+    built is buffered.
+    """
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key_chars: List[str] | None = None
+        self._last_key: str | None = None
+        self._array_depth: int | None = None
+        self._element: List[str] | None = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        elements: List[Any] = []
+        for char in chunk:
+            self._consume(char, elements)
+        return elements
+
+    def _consume(self, char: str, elements: List[Any]) -> None:
+        if self._in_string:
+            if self._element is not None:
+                self._element.append(char)
+            elif self._key_chars is not None and not (char == '"' and not self._escape):
+                self._key_chars.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._key_chars is not None:
+                    self._last_key = _decode_key(self._key_chars)
+                    self._key_chars = None
+                elif self._element is not None and self._depth == self._array_depth:
+                    self._finish_element(elements)
+            return
+
+        in_target_array = self._array_depth is not None and self._depth == self._array_depth
+        if self._element is None and in_target_array and not char.isspace() and char not in ",]":
+            self._element = []
+        if self._element is not None:
+            if in_target_array and char in ",]":
+                # Bare literals (numbers, true/null) end at the next separator.
+                self._finish_element(elements)
+            else:
+                self._element.append(char)
+
+        if char == '"':
+            self._in_string = True
+            if self._element is None and self._depth == 1 and self._expect_key:
+                self._key_chars = []
+        elif char in "{[":
+            if char == "[" and self._depth == 1 and not self._expect_key and self._last_key == self.field:
+                self._array_depth = 2
+            self._depth += 1
+            if self._depth == 1:
+                self._expect_key = True
+                self._last_key = None
+        elif char in "}]":
+            if self._depth == 0:
+                return
+            if char == "]" and in_target_array:
+                self._array_depth = None
+            self._depth -= 1
+            if self._element is not None and self._depth == self._array_depth:
+                self._finish_element(elements)
+        elif self._depth == 1 and char == ",":
+            self._expect_key = True
+        elif self._depth == 1 and char == ":":
+            self._expect_key = False
+
+    def _finish_element(self, elements: List[Any]) -> None:
+        text = "".join(self._element or []).strip()
+        self._element = None
+        if not text:
+            return
+        try:
+            elements.append(json.loads(text))
+        except json.JSONDecodeError:
+            logger.debug("Skipping malformed streamed element: %s", text)
+
+
+def _decode_key(chars: List[str]) -> str:
+    raw = "".join(chars)
+    try:
+        return json.loads(f'"{raw}"')
+    except json.JSONDecodeError:
+        return raw
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+from prometheus_client import Counter
+
+from ..config import get_settings
+from ..redis_util import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_KEY_PREFIX = "llmcache:"
+
+LLM_CACHE_LOOKUPS = Counter(
+    "yummi_llm_response_cache_lookups_total",
+    "LLM response cache lookups by namespace and outcome",
+    ["namespace", "result"],
+)
+
+_LOCK = threading.Lock()
+_MEMORY_CACHE: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+
+
+def build_llm_cache_key(
+    *,
+    namespace: str,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    params: Dict[str, Any],
+) -> str:
+    """Content address for one LLM request.
+
+    Prompts are whitespace-normalised so indentation changes in the prompt
+    builders do not split the cache.
+    """
+    material = json.dumps(
+        {
+            "model": model,
+            "system": " ".join(system_prompt.split()),
+            "user": " ".join(user_prompt.split()),
+            "params": params,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    digest = hashlib.sha256(material.encode("utf-8")).hexdigest()
+    return f"{LLM_CACHE_KEY_PREFIX}{namespace}:{digest}"
+
+
+async def get_cached_llm_response(cache_key: str, *, namespace: str) -> str | None:
+    settings = get_settings()
+    if not settings.llm_response_cache_enabled:
+        return None
+    cached = _memory_get(cache_key)
+    if cached is not None:
+        LLM_CACHE_LOOKUPS.labels(namespace, "memory_hit").inc()
+        return cached
+    cached = await _redis_get(cache_key)
+    if cached is not None:
+        _memory_set(cache_key, cached, settings.llm_response_cache_ttl_seconds)
+        LLM_CACHE_LOOKUPS.labels(namespace, "redis_hit").inc()
+        return cached
+    LLM_CACHE_LOOKUPS.labels(namespace, "miss").inc()
+    return None
+
+
+async def store_llm_response(cache_key: str, text: str) -> None:
+    """Write a validated response to both tiers; Redis failures are logged only."""
+    settings = get_settings()
+    if not settings.llm_response_cache_enabled or not text:
+        return
+    ttl = settings.llm_response_cache_ttl_seconds
+    _memory_set(cache_key, text, ttl)
+    await _redis_set(cache_key, text, ttl)
+
+
+def clear_llm_response_cache() -> None:
+    with _LOCK:
+        _MEMORY_CACHE.clear()
+
+
+def _memory_get(cache_key: str) -> str | None:
+    now = time.monotonic()
+    with _LOCK:
+        entry = _MEMORY_CACHE.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at <= now:
+            _MEMORY_CACHE.pop(cache_key, None)
+            return None
+        _MEMORY_CACHE.move_to_end(cache_key)
+        return text
+
+
+def _memory_set(cache_key: str, text: str, ttl: int) -> None:
+    max_entries = get_settings().llm_response_cache_max_entries
+    with _LOCK:
+        _MEMORY_CACHE[cache_key] = (time.monotonic() + ttl, text)
+        _MEMORY_CACHE.move_to_end(cache_key)
+        while len(_MEMORY_CACHE) > max_entries:
+            _MEMORY_CACHE.popitem(last=False)
+
+
+async def _redis_get(cache_key: str) -> str | None:
+    client = get_async_redis()
+    if client is None:
+        return None
+    try:
+        return await client.get(cache_key)
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        logger.warning("LLM cache read failed key=%s error=%s", cache_key, exc)
+        return None
+
+
+async def _redis_set(cache_key: str, text: str, ttl: int) -> None:
+    client = get_async_redis()
+    if client is None:
+        return
+    try:
+        await client.set(cache_key, text, ex=ttl)
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        logger.warning("LLM cache write failed key=%s error=%s", cache_key, exc)
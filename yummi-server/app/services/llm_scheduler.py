@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from time import perf_counter
+from typing import AsyncIterator, Callable, Dict, List
+
+from prometheus_client import Gauge, Histogram
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMPriority(IntEnum):
+    """Dispatch classes; lower values are served first."""
+
+    INTERACTIVE = 0
+    SHOPPING_LIST = 1
+    BACKGROUND = 2
+
+
+LLM_QUEUE_DEPTH = Gauge(
+    "yummi_llm_queue_depth",
+    "LLM calls waiting for a dispatch slot",
+    ["priority"],
+)
+LLM_IN_FLIGHT = Gauge(
+    "yummi_llm_in_flight",
+    "LLM calls currently holding a dispatch slot",
+    ["priority"],
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "yummi_llm_queue_wait_seconds",
+    "Time LLM calls spent queued before dispatch",
+    ["priority"],
+    buckets=(0.005, 0.05, 0.25, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+@dataclass
+class _Waiter:
+    priority: int
+    sequence: int
+    user_key: str | None = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    queued_at: float = field(default=0.0, compare=False)
+
+
+class LLMScheduler:
+    """Admission control for outbound LLM calls on one event loop.
+
+    At most ``max_in_flight`` calls run at once and a single user may hold at
+    most ``per_user_limit`` of them. Free slots go to the highest-priority
+    waiter whose user is under quota, FIFO within a priority class, so one
+    heavy user queues behind their own calls instead of everyone else's. A
+    waiter moves up one class for every ``aging_seconds`` it has queued, so a
+    steady stream of interactive calls cannot starve background work.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_in_flight: int,
+        per_user_limit: int,
+        aging_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_in_flight = max(1, max_in_flight)
+        self.per_user_limit = max(1, per_user_limit)
+        self.aging_seconds = aging_seconds
+        self._clock = clock
+        self._in_flight = 0
+        self._in_flight_by_user: Dict[str, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        *,
+        priority: LLMPriority = LLMPriority.INTERACTIVE,
+        user_id: str | None = None,
+    ) -> AsyncIterator[None]:
+        await self._acquire(priority, user_id)
+        try:
+            yield
+        finally:
+            self._release(priority, user_id)
+
+    async def _acquire(self, priority: LLMPriority, user_id: str | None) -> None:
+        label = priority.name.lower()
+        waiter = _Waiter(
+            priority=int(priority),
+            sequence=next(self._sequence),
+            user_key=user_id,
+            future=asyncio.get_running_loop().create_future(),
+            queued_at=self._clock(),
+        )
+        self._waiters.append(waiter)
+        LLM_QUEUE_DEPTH.labels(label).inc()
+        self._dispatch()
+        queued_at = perf_counter()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                LLM_QUEUE_DEPTH.labels(label).dec()
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just before cancellation; hand it back.
+                self._release(priority, user_id)
+            raise
+        LLM_QUEUE_WAIT_SECONDS.labels(label).observe(perf_counter() - queued_at)
+
+    def _release(self, priority: LLMPriority, user_id: str | None) -> None:
+        self._in_flight -= 1
+        LLM_IN_FLIGHT.labels(priority.name.lower()).dec()
+        if user_id is not None:
+            remaining = self._in_flight_by_user.get(user_id, 1) - 1
+            if remaining > 0:
+                self._in_flight_by_user[user_id] = remaining
+            else:
+                self._in_flight_by_user.pop(user_id, None)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        if not self._waiters or self._in_flight >= self.max_in_flight:
+            return
+        now = self._clock()
+        self._waiters.sort(key=lambda waiter: (self._effective_priority(waiter, now), waiter.sequence))
+        granted: List[_Waiter] = []
+        for waiter in self._waiters:
+            if self._in_flight >= self.max_in_flight:
+                break
+            if waiter.future.done():
+                # Cancelled before its task could unregister it.
+                LLM_QUEUE_DEPTH.labels(LLMPriority(waiter.priority).name.lower()).dec()
+                granted.append(waiter)
+                continue
+            user_key = waiter.user_key
+            if user_key is not None and self._in_flight_by_user.get(user_key, 0) >= self.per_user_limit:
+                continue
+            self._in_flight += 1
+            if user_key is not None:
+                self._in_flight_by_user[user_key] = self._in_flight_by_user.get(user_key, 0) + 1
+            label = LLMPriority(waiter.priority).name.lower()
+            LLM_IN_FLIGHT.labels(label).inc()
+            LLM_QUEUE_DEPTH.labels(label).dec()
+            waiter.future.set_result(None)
+            granted.append(waiter)
+        for waiter in granted:
+            self._waiters.remove(waiter)
+
+    def _effective_priority(self, waiter: _Waiter, now: float) -> int:
+        if self.aging_seconds <= 0:
+            return waiter.priority
+        return max(0, waiter.priority - int((now - waiter.queued_at) // self.aging_seconds))
+
+
+_SCHEDULER_LOCK = threading.Lock()
+_SCHEDULERS: Dict[asyncio.AbstractEventLoop, LLMScheduler] = {}
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Return the scheduler for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    with _SCHEDULER_LOCK:
+        scheduler = _SCHEDULERS.get(loop)
+        if scheduler is None:
+            for stale_loop in [entry for entry in _SCHEDULERS if entry.is_closed()]:
+                _SCHEDULERS.pop(stale_loop, None)
+            settings = get_settings()
+            scheduler = LLMScheduler(
+                max_in_flight=settings.openai_max_concurrent_requests,
+                per_user_limit=settings.openai_max_concurrent_requests_per_user,
+                aging_seconds=settings.openai_scheduler_aging_seconds,
+            )
+            _SCHEDULERS[loop] = scheduler
+        return scheduler
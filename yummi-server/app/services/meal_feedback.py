@@ -6,10 +6,12 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Dict, Iterable, List, Sequence
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import aliased
 
 from ..db import get_session
 from ..models import MealFeedbackEvent
+from .feedback_cache import load_cached_feedback_entries, write_through_feedback_entries
 
 MAX_FEEDBACK_EVENTS_PER_USER = 100
 
@@ -93,25 +95,46 @@ async def record_meal_feedback_events(
                 context=safe_metadata,
             )
         )
+    retained_meal_ids: List[str] | None = None
     async with get_session() as session:
         session.add_all(events)
-        await session.commit()
         if MAX_FEEDBACK_EVENTS_PER_USER and MAX_FEEDBACK_EVENTS_PER_USER > 0:
-            stmt = (
-                select(MealFeedbackEvent.id)
-                .where(MealFeedbackEvent.user_id == user_id)
-                .order_by(
-                    MealFeedbackEvent.occurred_at.desc(),
-                    MealFeedbackEvent.created_at.desc(),
+            trimmed = await session.execute(_retention_delete(user_id, MAX_FEEDBACK_EVENTS_PER_USER))
+            if trimmed.rowcount:
+                # Meals whose events were all trimmed must leave the cached
+                # summary too, or it would diverge from the cold path.
+                result = await session.execute(
+                    select(MealFeedbackEvent.meal_id).where(MealFeedbackEvent.user_id == user_id).distinct()
                 )
-                .offset(MAX_FEEDBACK_EVENTS_PER_USER)
-            )
-            result = await session.execute(stmt)
-            stale_ids = [row[0] for row in result.all()]
-            if stale_ids:
-                delete_stmt = delete(MealFeedbackEvent).where(MealFeedbackEvent.id.in_(stale_ids))
-                await session.execute(delete_stmt)
-                await session.commit()
+                retained_meal_ids = list(result.scalars())
+        await session.commit()
+    # Later events win, so a meal both liked and disliked in one call ends as disliked.
+    await write_through_feedback_entries(
+        user_id,
+        {event.meal_id: _compact_entry(event) for event in events},
+        retain=retained_meal_ids,
+    )
+
+
+def _retention_delete(user_id: str, keep: int):
+    """Single DELETE trimming ``user_id`` to its ``keep`` newest events.
+
+    Runs in the insert's transaction (autoflush makes the new rows visible to
+    the ranking), so a write costs one commit rather than select-then-delete.
+    """
+    ranked = (
+        select(
+            MealFeedbackEvent.id,
+            func.row_number()
+            .over(order_by=(MealFeedbackEvent.occurred_at.desc(), MealFeedbackEvent.created_at.desc()))
+            .label("position"),
+        )
+        .where(MealFeedbackEvent.user_id == user_id)
+        .subquery()
+    )
+    return delete(MealFeedbackEvent).where(
+        MealFeedbackEvent.id.in_(select(ranked.c.id).where(ranked.c.position > keep))
+    )
 
 
 async def record_single_meal_feedback(
@@ -135,41 +158,16 @@ async def record_single_meal_feedback(
 
 
 async def load_feedback_summary(user_id: str) -> MealFeedbackSummary:
-    async with get_session() as session:
-        stmt = (
-            select(MealFeedbackEvent)
-            .where(MealFeedbackEvent.user_id == user_id)
-            .order_by(MealFeedbackEvent.occurred_at.desc(), MealFeedbackEvent.created_at.desc())
-        )
-        result = await session.execute(stmt)
-        records = list(result.scalars())
-
-    latest: Dict[str, MealFeedbackEntry] = {}
-    ordered_entries: List[MealFeedbackEntry] = []
-    for record in records:
-        entry = MealFeedbackEntry(
-            meal_id=record.meal_id,
-            reaction=MealFeedbackReaction(record.reaction),
-            source=MealFeedbackSource(record.source),
-            occurred_at=record.occurred_at,
-            context=record.context or {},
-        )
-        if record.meal_id not in latest:
-            latest[record.meal_id] = entry
-        ordered_entries.append(entry)
-
-    liked: List[MealFeedbackEntry] = []
-    disliked: List[MealFeedbackEntry] = []
-    # Iterate latest map preserving inserted order
-    for meal_id, entry in latest.items():
-        if entry.reaction == MealFeedbackReaction.LIKE:
-            liked.append(entry)
-        elif entry.reaction == MealFeedbackReaction.DISLIKE:
-            disliked.append(entry)
-
-    liked.sort(key=lambda entry: entry.occurred_at, reverse=True)
-    disliked.sort(key=lambda entry: entry.occurred_at, reverse=True)
+    """Latest reaction per meal, served from the write-through summary cache."""
+    compact = await load_cached_feedback_entries(user_id, lambda: _load_latest_feedback_entries(user_id))
+    entries = [_entry_from_compact(meal_id, payload) for meal_id, payload in compact.items()]
+    entries.sort(key=lambda entry: entry.occurred_at, reverse=True)
+    if MAX_FEEDBACK_EVENTS_PER_USER and MAX_FEEDBACK_EVENTS_PER_USER > 0:
+        entries = entries[:MAX_FEEDBACK_EVENTS_PER_USER]
 
+    latest: Dict[str, MealFeedbackEntry] = {entry.meal_id: entry for entry in entries}
+    liked = [entry for entry in entries if entry.reaction == MealFeedbackReaction.LIKE]
+    disliked = [entry for entry in entries if entry.reaction == MealFeedbackReaction.DISLIKE]
     return MealFeedbackSummary(
         liked=liked,
         disliked=disliked,
@@ -177,11 +175,61 @@ async def load_feedback_summary(user_id: str) -> MealFeedbackSummary:
     )
 
 
+async def _load_latest_feedback_entries(user_id: str) -> Dict[str, Dict[str, Any]]:
+    """Cold path: one row per meal, picked in SQL rather than by scanning history.
+
+    ROW_NUMBER() partitioned by meal is used instead of Postgres' DISTINCT ON
+    so the query also runs against SQLite.
+    """
+    ranked = (
+        select(
+            MealFeedbackEvent,
+            func.row_number()
+            .over(
+                partition_by=MealFeedbackEvent.meal_id,
+                order_by=(MealFeedbackEvent.occurred_at.desc(), MealFeedbackEvent.created_at.desc()),
+            )
+            .label("position"),
+        )
+        .where(MealFeedbackEvent.user_id == user_id)
+        .subquery()
+    )
+    latest_event = aliased(MealFeedbackEvent, ranked)
+    async with get_session() as session:
+        result = await session.execute(select(latest_event).where(ranked.c.position == 1))
+        records = list(result.scalars())
+    return {record.meal_id: _compact_entry(record) for record in records}
+
+
+def _compact_entry(record: MealFeedbackEvent) -> Dict[str, Any]:
+    return {
+        "reaction": record.reaction,
+        "source": record.source,
+        "occurredAt": record.occurred_at.isoformat(),
+        "context": record.context or {},
+    }
+
+
+def _entry_from_compact(meal_id: str, payload: Dict[str, Any]) -> MealFeedbackEntry:
+    occurred_at = datetime.fromisoformat(payload["occurredAt"])
+    if occurred_at.tzinfo is None:
+        # SQLite drops the offset; stored values are UTC.
+        occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+    return MealFeedbackEntry(
+        meal_id=meal_id,
+        reaction=MealFeedbackReaction(payload["reaction"]),
+        source=MealFeedbackSource(payload["source"]),
+        occurred_at=occurred_at,
+        context=payload.get("context") or {},
+    )
+
+
 async def clear_user_feedback(user_id: str) -> None:
     async with get_session() as session:
         stmt = delete(MealFeedbackEvent).where(MealFeedbackEvent.user_id == user_id)
         await session.execute(stmt)
         await session.commit()
+    await write_through_feedback_entries(user_id, {}, reset=True)
 
 
 def summarize_feedback_entries(entries: Iterable[MealFeedbackEntry]) -> List[Dict[str, Any]]:
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import json
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
 
 def extract_key_ingredients(meal: Dict[str, Any], limit: int = 6) -> List[Dict[str, Any]]:
@@ -50,6 +50,61 @@ def extract_sku_snapshot(meal: Dict[str, Any], limit: int = 4) -> List[Dict[str,
     return snapshots
 
 
+def format_final_ingredients(entries: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Flatten manifest ingredients into the camelCase shape served to clients."""
+    formatted: List[Dict[str, Any]] = []
+    for entry in entries or []:
+        if isinstance(entry, str):
+            formatted.append({"name": entry})
+            continue
+        if not isinstance(entry, dict):
+            continue
+        product = entry.get("selected_product") or {}
+        formatted.append(
+            {
+                "name": entry.get("core_item_name")
+                or entry.get("name")
+                or entry.get("ingredient"),
+                "quantity": entry.get("quantity"),
+                "preparation": entry.get("preparation"),
+                "productName": product.get("name"),
+                "productId": product.get("product_id"),
+                "detailUrl": product.get("detail_url"),
+                "salePrice": product.get("sale_price"),
+                "packageQuantity": product.get("package_quantity"),
+            }
+        )
+    return formatted
+
+
+def build_latest_recommendation_view(
+    meal: Dict[str, Any],
+    meal_id: str,
+    archetype_uid: str | None,
+) -> Dict[str, Any]:
+    """Return the full meal payload used for latest-recommendation responses."""
+    final_ingredients = meal.get("final_ingredients") or meal.get("ingredients") or []
+    ingredient_names: List[str] = []
+    for entry in final_ingredients:
+        if isinstance(entry, dict) and entry.get("core_item_name"):
+            ingredient_names.append(str(entry["core_item_name"]))
+        elif isinstance(entry, dict) and entry.get("name"):
+            ingredient_names.append(str(entry["name"]))
+        elif isinstance(entry, str):
+            ingredient_names.append(entry)
+    return {
+        "mealId": meal_id,
+        "name": meal.get("name"),
+        "description": meal.get("description"),
+        "tags": meal.get("meal_tags") or {},
+        "keyIngredients": ingredient_names,
+        "prepSteps": meal.get("prep_steps") or [],
+        "cookSteps": meal.get("cook_steps") or meal.get("instructions") or [],
+        "ingredients": format_final_ingredients(final_ingredients),
+        "archetypeId": archetype_uid,
+    }
+
+
 def format_json(payload: Any) -> str:
     """Pretty-print objects for prompt context without breaking datetime fields."""
 
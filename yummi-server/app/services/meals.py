@@ -3,21 +3,237 @@ from __future__ import annotations
 import json
 import os
 import threading
-from copy import deepcopy
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, List
 
 from fastapi import HTTPException
 
 from ..config import get_settings
+from ..schemas import MealSkuSnapshot, RecommendationMeal
+from .meal_representation import build_latest_recommendation_view, extract_sku_snapshot
 
 
-_MANIFEST_CACHE: dict[str, Any] | None = None
+# Must match PARQUET_HEADER_KEY in scripts/meal_aggregate_builder.py.
+PARQUET_HEADER_KEY = b"yummi.manifest_header"
+
+_INDEX_CACHE: MealManifestIndex | None = None
 _MANIFEST_PATH: Path | None = None
 _MANIFEST_MTIME: float | None = None
 _LOCK = threading.Lock()
 
 
+class FrozenDict(dict):
+    """Read-only dict shared by every reader of the cached manifest snapshot.
+
+    It stays a ``dict`` subclass so JSON encoding, pydantic validation and
+    ``isinstance(..., dict)`` checks keep working without a copy. Mutating calls
+    raise; ``copy.deepcopy`` returns a private, fully mutable copy.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError(
+            "Meal manifest snapshot is read-only; use copy.deepcopy() for a mutable copy"
+        )
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __copy__(self) -> dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> dict[str, Any]:
+        return _thaw(self)
+
+
+def freeze_manifest_value(value: Any) -> Any:
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenDict((key, freeze_manifest_value(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_manifest_value(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class MealTagIndex:
+    """Inverted index over ``meal_tags`` for one manifest snapshot.
+
+    Every meal with an id gets a bit position in manifest order; ``postings``
+    maps category -> tag value -> int bitset of the meals carrying that value,
+    so constraint checks reduce to a handful of AND / AND-NOT operations.
+    """
+
+    meals: List[tuple[FrozenDict, str | None]]
+    all_mask: int
+    meal_id_masks: Dict[Any, int]
+    postings: Dict[str, Dict[Any, int]]
+    archetype_ranges: Dict[str | None, List[tuple[int, int]]]
+
+    def category_mask(self, category: str, value: Any) -> int:
+        return self.postings.get(category, {}).get(value, 0)
+
+
+@dataclass(frozen=True)
+class MealManifestIndex:
+    """Lookup tables derived once from a manifest snapshot.
+
+    When a meal id appears under several archetypes the lookups keep the
+    semantics of the scans they replaced: ``find_meal`` (recommendation
+    workflow) returns the first occurrence keyed by ``meal_id``, while the
+    latest-recommendation views and ``recommendation_meals`` templates use the
+    last occurrence and also accept a ``mealId`` key.
+
+    ``recommendation_meals`` holds rank-less ``RecommendationMeal`` templates;
+    callers stamp a rank with ``model_copy(update=...)``.
+    """
+
+    manifest: FrozenDict
+    meals_by_id: Dict[str, tuple[FrozenDict, str | None]]
+    latest_meals_by_id: Dict[str, tuple[FrozenDict, str | None]]
+    archetypes_by_uid: Dict[str, FrozenDict]
+    recommendation_meals: Dict[str, RecommendationMeal]
+    latest_recommendation_views: Dict[str, FrozenDict]
+    tags: MealTagIndex
+
+    def find_meal(self, meal_id: Any) -> tuple[FrozenDict | None, str | None]:
+        return self.meals_by_id.get(str(meal_id), (None, None))
+
+    def hydrate_recommendation_meal(
+        self,
+        meal_id: Any,
+        *,
+        rank: int,
+        archetype_uid: str | None = None,
+        meal: Mapping[str, Any] | None = None,
+    ) -> RecommendationMeal | None:
+        """Ranked copy of the template for ``meal_id``.
+
+        With ``meal``, returns ``None`` unless the template was built from that
+        exact manifest entry, so callers holding a duplicate can hydrate it
+        themselves.
+        """
+        template = self.recommendation_meals.get(str(meal_id))
+        if template is None:
+            return None
+        if meal is not None and self.latest_meals_by_id[str(meal_id)][0] is not meal:
+            return None
+        update: Dict[str, Any] = {"rank": rank}
+        if archetype_uid is not None and archetype_uid != template.archetypeId:
+            update["archetypeId"] = archetype_uid
+        return template.model_copy(update=update)
+
+
+def build_meal_manifest_index(
+    manifest: Mapping[str, Any],
+    *,
+    tag_postings: Dict[str, Dict[Any, int]] | None = None,
+) -> MealManifestIndex:
+    """Build id/uid lookups and pre-hydrated meal views for ``manifest``.
+
+    See ``MealManifestIndex`` for how duplicate meal ids resolve. Loaders that
+    already hold the tags column can pass ``tag_postings`` (bit positions in
+    manifest order) so the tag index skips walking every meal's tags.
+    """
+    frozen = freeze_manifest_value(manifest)
+    meals_by_id: Dict[str, tuple[FrozenDict, str | None]] = {}
+    latest_meals_by_id: Dict[str, tuple[FrozenDict, str | None]] = {}
+    archetypes_by_uid: Dict[str, FrozenDict] = {}
+    for archetype in frozen.get("archetypes") or ():
+        archetype_uid = archetype.get("uid")
+        if archetype_uid is not None:
+            archetypes_by_uid.setdefault(str(archetype_uid), archetype)
+        for meal in archetype.get("meals") or ():
+            raw_id = meal.get("meal_id")
+            if raw_id is not None:
+                meals_by_id.setdefault(str(raw_id), (meal, archetype_uid))
+            latest_id = str(raw_id or meal.get("mealId") or "")
+            if latest_id:
+                latest_meals_by_id[latest_id] = (meal, archetype_uid)
+
+    recommendation_meals: Dict[str, RecommendationMeal] = {}
+    latest_views: Dict[str, FrozenDict] = {}
+    for meal_id, (meal, archetype_uid) in latest_meals_by_id.items():
+        recommendation_meals[meal_id] = RecommendationMeal(
+            mealId=meal_id,
+            name=meal.get("name"),
+            description=meal.get("description"),
+            tags=meal.get("meal_tags") or {},
+            rank=1,
+            skuSnapshot=[MealSkuSnapshot(**snapshot) for snapshot in extract_sku_snapshot(meal)],
+            archetypeId=archetype_uid,
+        )
+        latest_views[meal_id] = freeze_manifest_value(
+            build_latest_recommendation_view(meal, meal_id, archetype_uid)
+        )
+    return MealManifestIndex(
+        manifest=frozen,
+        meals_by_id=meals_by_id,
+        latest_meals_by_id=latest_meals_by_id,
+        archetypes_by_uid=archetypes_by_uid,
+        recommendation_meals=recommendation_meals,
+        latest_recommendation_views=latest_views,
+        tags=_build_meal_tag_index(frozen, postings=tag_postings),
+    )
+
+
+def _build_meal_tag_index(
+    manifest: FrozenDict,
+    *,
+    postings: Dict[str, Dict[Any, int]] | None = None,
+) -> MealTagIndex:
+    meals: List[tuple[FrozenDict, str | None]] = []
+    meal_id_masks: Dict[Any, int] = {}
+    build_postings = postings is None
+    if postings is None:
+        postings = {}
+    archetype_ranges: Dict[str | None, List[tuple[int, int]]] = {}
+    for archetype in manifest.get("archetypes") or []:
+        archetype_uid = archetype.get("uid")
+        start = len(meals)
+        for meal in archetype.get("meals") or []:
+            meal_id = meal.get("meal_id")
+            if not meal_id:
+                continue
+            bit = 1 << len(meals)
+            meals.append((meal, archetype_uid))
+            meal_id_masks[meal_id] = meal_id_masks.get(meal_id, 0) | bit
+            if not build_postings:
+                continue
+            for category, values in (meal.get("meal_tags") or {}).items():
+                category_postings = postings.setdefault(category, {})
+                for value in set(values or []):
+                    category_postings[value] = category_postings.get(value, 0) | bit
+        if len(meals) > start:
+            archetype_ranges.setdefault(archetype_uid, []).append((start, len(meals)))
+    return MealTagIndex(
+        meals=meals,
+        all_mask=(1 << len(meals)) - 1,
+        meal_id_masks=meal_id_masks,
+        postings=postings,
+        archetype_ranges=archetype_ranges,
+    )
+
+
 def _candidate_paths(raw_path: str) -> list[Path]:
     candidate = Path(raw_path)
     if candidate.is_absolute():
@@ -45,35 +261,205 @@ def _load_manifest(path: Path) -> dict[str, Any]:
         return json.load(handle)
 
 
-def get_meal_manifest() -> dict[str, Any]:
-    """Return the cached meal manifest, refreshing when the file changes."""
-    settings = get_settings()
-    if not settings.meals_manifest_path:
+def _load_parquet_manifest(path: Path) -> tuple[dict[str, Any], Dict[str, Dict[Any, int]] | None]:
+    """Rebuild the nested manifest from the flattened Parquet rows written by meal_aggregate_builder.
+
+    Also returns the tag postings for ``build_meal_manifest_index``, computed
+    from the Arrow ``tags_json`` column (``None`` if it cannot be parsed as a
+    table, in which case the index walks the meals instead).
+    """
+    try:
+        import pyarrow.parquet as pq  # type: ignore
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise HTTPException(
+            status_code=503,
+            detail="pyarrow is required for MEALS_MANIFEST_FORMAT=parquet",
+        ) from exc
+
+    table = pq.read_table(path, memory_map=True)
+    metadata = table.schema.metadata or {}
+    raw_header = metadata.get(PARQUET_HEADER_KEY)
+    header: dict[str, Any] = json.loads(raw_header) if raw_header else {}
+    row_count = table.num_rows
+
+    def column(name: str) -> list[Any]:
+        if name not in table.column_names:
+            return [None] * row_count
+        return table.column(name).to_pylist()
+
+    def json_column(name: str, default: Any) -> list[Any]:
+        return [json.loads(value) if value else default for value in column(name)]
+
+    manifest: dict[str, Any] = {key: value for key, value in header.items() if key != "archetypes"}
+    archetypes: dict[str, dict[str, Any]] = {}
+    for block in header.get("archetypes") or []:
+        archetypes[block.get("uid")] = {**block, "meals": []}
+
+    archetype_uids = column("archetype_uid")
+    archetype_names = column("archetype_name")
+    refresh_versions = column("archetype_refresh_version")
+    meal_ids = column("meal_id")
+    meal_names = column("meal_name")
+    descriptions = column("description")
+    servings = column("servings")
+    tags_text = column("tags_json")
+    tags = [json.loads(value) if value else {} for value in tags_text]
+    prep_steps = json_column("prep_steps_json", [])
+    cook_steps = json_column("cook_steps_json", [])
+    instructions = json_column("instructions_json", [])
+    metadata_values = json_column("metadata_json", {})
+    product_matches = json_column("product_matches_json", [])
+    warnings = json_column("warnings_json", [])
+    if "final_ingredients_json" in table.column_names:
+        final_ingredients = json_column("final_ingredients_json", [])
+        source_ingredients = json_column("source_ingredients_json", [])
+    else:
+        # Older files only carry the merged ingredients column.
+        final_ingredients = json_column("ingredients_json", [])
+        source_ingredients = [[] for _ in range(row_count)]
+
+    rows_by_uid: dict[str, list[int]] = {}
+    for row in range(row_count):
+        uid = archetype_uids[row]
+        archetype = archetypes.get(uid)
+        if archetype is None:
+            archetype = {
+                "uid": uid,
+                "name": archetype_names[row],
+                "refresh_version": refresh_versions[row],
+                "meals": [],
+            }
+            archetypes[uid] = archetype
+        meal: dict[str, Any] = {
+            "meal_id": meal_ids[row],
+            "name": meal_names[row],
+            "description": descriptions[row],
+            "servings": servings[row],
+            "meal_tags": tags[row],
+            "prep_steps": prep_steps[row],
+            "cook_steps": cook_steps[row],
+            "instructions": instructions[row],
+            "ingredients": source_ingredients[row],
+            "final_ingredients": final_ingredients[row],
+            "product_matches": product_matches[row],
+            "metadata": metadata_values[row],
+        }
+        if warnings[row]:
+            meal["warnings"] = warnings[row]
+        archetype["meals"].append(meal)
+        rows_by_uid.setdefault(uid, []).append(row)
+
+    if "manifest_id" not in manifest and row_count:
+        manifest["manifest_id"] = column("manifest_id")[0]
+    manifest["archetypes"] = [block for block in archetypes.values() if block["meals"]]
+
+    # Header order, not row order, decides where each meal lands in the
+    # manifest; give every row the bit position the tag index will use.
+    row_positions = [-1] * row_count
+    position = 0
+    for block in manifest["archetypes"]:
+        for row in rows_by_uid.get(block["uid"], ()):
+            if meal_ids[row]:
+                row_positions[row] = position
+                position += 1
+    return manifest, _parquet_tag_postings(tags_text, row_positions)
+
+
+def _parquet_tag_postings(
+    tags_text: list[str | None],
+    row_positions: list[int],
+) -> Dict[str, Dict[Any, int]] | None:
+    """Tag postings for the Parquet backend, built column by column.
+
+    Arrow parses the tag objects into one list column per category and
+    dictionary-encodes each, so the bitsets are filled from flat
+    (value code, row) pairs instead of per-meal dict walks.
+    """
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pc  # type: ignore
+    import pyarrow.json as pa_json  # type: ignore
+
+    if not tags_text:
+        return {}
+    lines = "\n".join(value or "{}" for value in tags_text).encode("utf-8")
+    try:
+        parsed = pa_json.read_json(pa.BufferReader(lines))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    bitmap_bytes = (max(row_positions) >> 3) + 1
+    postings: Dict[str, Dict[Any, int]] = {}
+    for category in parsed.column_names:
+        values = parsed.column(category).combine_chunks()
+        if not pa.types.is_list(values.type):
+            return None
+        encoded = pc.list_flatten(values).dictionary_encode()
+        bitmaps = [bytearray(bitmap_bytes) for _ in range(len(encoded.dictionary))]
+        parents = pc.list_parent_indices(values).to_pylist()
+        for code, row in zip(encoded.indices.to_pylist(), parents):
+            position = row_positions[row]
+            if code is not None and position >= 0:
+                bitmaps[code][position >> 3] |= 1 << (position & 7)
+        postings[category] = {
+            value: int.from_bytes(bitmap, "little")
+            for value, bitmap in zip(encoded.dictionary.to_pylist(), bitmaps)
+        }
+    return postings
+
+
+def _manifest_source(settings: Any) -> tuple[str, str | None]:
+    manifest_format = (settings.meals_manifest_format or "json").strip().lower()
+    if manifest_format == "parquet":
+        return manifest_format, settings.meals_manifest_parquet_path
+    if manifest_format != "json":
+        raise HTTPException(
+            status_code=503,
+            detail=f"Unsupported meals manifest format '{settings.meals_manifest_format}'",
+        )
+    return manifest_format, settings.meals_manifest_path
+
+
+def get_meal_manifest_index() -> MealManifestIndex:
+    """Return the index for the current manifest, rebuilding it when the file changes."""
+    manifest_format, raw_path = _manifest_source(get_settings())
+    if not raw_path:
         raise HTTPException(status_code=503, detail="Meals manifest path is not configured")
-    manifest_path = _resolve_manifest_path(settings.meals_manifest_path)
+    manifest_path = _resolve_manifest_path(raw_path)
     if not manifest_path.exists():
         raise HTTPException(status_code=503, detail=f"Meals manifest not found at {manifest_path}")
 
-    global _MANIFEST_CACHE, _MANIFEST_MTIME, _MANIFEST_PATH
+    global _INDEX_CACHE, _MANIFEST_MTIME, _MANIFEST_PATH
     mtime = os.path.getmtime(manifest_path)
     with _LOCK:
         if (
-            _MANIFEST_CACHE is not None
+            _INDEX_CACHE is not None
             and _MANIFEST_PATH == manifest_path
             and _MANIFEST_MTIME == mtime
         ):
-            return deepcopy(_MANIFEST_CACHE)
+            return _INDEX_CACHE
 
-        manifest = _load_manifest(manifest_path)
-        _MANIFEST_CACHE = manifest
+        tag_postings = None
+        if manifest_format == "parquet":
+            raw_manifest, tag_postings = _load_parquet_manifest(manifest_path)
+        else:
+            raw_manifest = _load_manifest(manifest_path)
+        index = build_meal_manifest_index(raw_manifest, tag_postings=tag_postings)
+        _INDEX_CACHE = index
         _MANIFEST_PATH = manifest_path
         _MANIFEST_MTIME = mtime
-        return deepcopy(manifest)
+        return index
+
+
+def get_meal_manifest() -> FrozenDict:
+    """Return the shared, read-only manifest snapshot, refreshing when the file changes.
+
+    The snapshot is frozen once per load and handed out without copying; callers
+    that need to mutate part of it must ``copy.deepcopy`` it first.
+    """
+    return get_meal_manifest_index().manifest
 
 
-def get_meal_archetype(uid: str) -> dict[str, Any]:
-    manifest = get_meal_manifest()
-    for entry in manifest.get("archetypes", []):
-        if entry.get("uid") == uid:
-            return entry
-    raise HTTPException(status_code=404, detail=f"Archetype '{uid}' not found")
+def get_meal_archetype(uid: str) -> Mapping[str, Any]:
+    archetype = get_meal_manifest_index().archetypes_by_uid.get(str(uid))
+    if archetype is None:
+        raise HTTPException(status_code=404, detail=f"Archetype '{uid}' not found")
+    return archetype
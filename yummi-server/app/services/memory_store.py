@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+
+from prometheus_client import Counter, Gauge
+
+MEMORY_STORE_ENTRIES = Gauge(
+    "yummi_memory_store_entries",
+    "Entries held by in-process fallback stores",
+    ["store"],
+)
+MEMORY_STORE_EVICTIONS = Counter(
+    "yummi_memory_store_evictions_total",
+    "Entries dropped from in-process fallback stores by reason",
+    ["store", "reason"],
+)
+
+# Expired entries are also swept on writes at most this often, so keys that
+# are never read again do not sit in memory until capacity forces them out.
+_SWEEP_INTERVAL_SECONDS = 30.0
+
+
+class BoundedTTLStore:
+    """Thread-safe LRU map with per-entry expiry, used where Redis is absent.
+
+    Values are JSON-shaped dicts/lists. They are structurally copied on the way
+    in and out, so callers can mutate what they read without touching the
+    stored copy.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_entries: int,
+        default_ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float | None, Any]]" = OrderedDict()
+        self._next_sweep_at = 0.0
+        self._size = MEMORY_STORE_ENTRIES.labels(name)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._live(key, self._clock()) is not None
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._live(key, self._clock())
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return copy_structure(entry[1])
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._put(key, value, ttl, self._clock())
+
+    def set_if_absent(self, key: str, value: Any, ttl: float | None = None) -> Any:
+        """Store ``value`` unless a live entry exists; returns that entry's copy, else ``None``."""
+        now = self._clock()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return copy_structure(entry[1])
+            self._put(key, value, ttl, now)
+            return None
+
+    def pop(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            self._size.set(len(self._entries))
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size.set(0)
+
+    def _live(self, key: str, now: float) -> Tuple[float | None, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= now:
+            del self._entries[key]
+            self._size.set(len(self._entries))
+            MEMORY_STORE_EVICTIONS.labels(self.name, "expired").inc()
+            return None
+        return entry
+
+    def _put(self, key: str, value: Any, ttl: float | None, now: float) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._entries[key] = (now + ttl if ttl is not None else None, copy_structure(value))
+        self._entries.move_to_end(key)
+        if now >= self._next_sweep_at:
+            self._sweep_expired(now)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            MEMORY_STORE_EVICTIONS.labels(self.name, "capacity").inc()
+        self._size.set(len(self._entries))
+
+    def _sweep_expired(self, now: float) -> None:
+        self._next_sweep_at = now + _SWEEP_INTERVAL_SECONDS
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            MEMORY_STORE_EVICTIONS.labels(self.name, "expired").inc(len(expired))
+
+
+def copy_structure(value: Any) -> Any:
+    """Copy nested dicts and lists; scalars are immutable and shared as-is."""
+    if isinstance(value, dict):
+        return {key: copy_structure(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_structure(item) for item in value]
+    return value
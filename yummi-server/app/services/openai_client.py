@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+
+import httpx
+from openai import AsyncOpenAI
+
+from ..config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+OPENAI_API_BASE_URL = "https://api.openai.com/v1"
+
+_LOCK = threading.Lock()
+_ASYNC_HTTP_CLIENT: httpx.AsyncClient | None = None
+_ASYNC_CLIENT_LOOP: asyncio.AbstractEventLoop | None = None
+_ASYNC_OPENAI_CLIENT: AsyncOpenAI | None = None
+
+
+def _client_limits(settings: Settings) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_keepalive_connections,
+        keepalive_expiry=settings.openai_keepalive_expiry_seconds,
+    )
+
+
+def _client_timeout(settings: Settings) -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.openai_request_timeout_seconds,
+        connect=settings.openai_connect_timeout_seconds,
+    )
+
+
+def _http2_enabled(settings: Settings) -> bool:
+    if not settings.openai_http2:
+        return False
+    try:
+        import h2  # noqa: F401  # type: ignore
+    except ImportError:
+        logger.warning("OPENAI_HTTP2 is enabled but the 'h2' package is missing; using HTTP/1.1")
+        return False
+    return True
+
+
+def _auth_headers(settings: Settings) -> dict[str, str]:
+    return {"Authorization": f"Bearer {settings.openai_api_key}"}
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled AsyncClient used for OpenAI traffic.
+
+    The pool is tied to the event loop that created it; a new loop (tests,
+    reloads) gets a fresh client instead of reusing dead connections.
+    """
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        return _async_http_client_locked(loop)
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Return an AsyncOpenAI SDK client sharing the pooled AsyncClient."""
+    global _ASYNC_OPENAI_CLIENT
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        http_client = _async_http_client_locked(loop)
+        if _ASYNC_OPENAI_CLIENT is None:
+            settings = get_settings()
+            _ASYNC_OPENAI_CLIENT = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                http_client=http_client,
+                timeout=_client_timeout(settings),
+            )
+        return _ASYNC_OPENAI_CLIENT
+
+
+def _async_http_client_locked(loop: asyncio.AbstractEventLoop) -> httpx.AsyncClient:
+    # Caller holds _LOCK, so the SDK client is built against the pool it checked.
+    global _ASYNC_HTTP_CLIENT, _ASYNC_CLIENT_LOOP, _ASYNC_OPENAI_CLIENT
+    if (
+        _ASYNC_HTTP_CLIENT is not None
+        and not _ASYNC_HTTP_CLIENT.is_closed
+        and _ASYNC_CLIENT_LOOP is loop
+    ):
+        return _ASYNC_HTTP_CLIENT
+    settings = get_settings()
+    _ASYNC_HTTP_CLIENT = httpx.AsyncClient(
+        base_url=OPENAI_API_BASE_URL,
+        headers=_auth_headers(settings),
+        limits=_client_limits(settings),
+        timeout=_client_timeout(settings),
+        http2=_http2_enabled(settings),
+    )
+    _ASYNC_CLIENT_LOOP = loop
+    _ASYNC_OPENAI_CLIENT = None
+    return _ASYNC_HTTP_CLIENT
+
+
+async def close_openai_clients() -> None:
+    """Close pooled connections; registered as an app shutdown handler."""
+    global _ASYNC_HTTP_CLIENT, _ASYNC_CLIENT_LOOP, _ASYNC_OPENAI_CLIENT
+    with _LOCK:
+        async_client = _ASYNC_HTTP_CLIENT
+        _ASYNC_HTTP_CLIENT = None
+        _ASYNC_CLIENT_LOOP = None
+        _ASYNC_OPENAI_CLIENT = None
+    if async_client is not None and not async_client.is_closed:
+        await async_client.aclose()
@@ -2,18 +2,22 @@ from __future__ import annotations
 
 import logging
 import json
-from typing import Any, Dict, Callable, Optional
+from typing import Any, Dict, Callable, List, Optional
 
 import httpx
 from fastapi import HTTPException, status
-from openai import OpenAI
 
 from ..config import get_settings
+from .llm_scheduler import LLMPriority, get_llm_scheduler
+from .openai_client import (
+    get_async_http_client,
+    get_async_openai_client,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def call_openai_responses(
+async def call_openai_responses_async(
     *,
     model: str,
     system_prompt: str,
@@ -23,15 +27,60 @@ def call_openai_responses(
     reasoning_effort: str | None = None,
     stream: bool = False,
     on_stream_delta: Optional[Callable[[str], None]] = None,
+    priority: LLMPriority = LLMPriority.INTERACTIVE,
+    user_id: str | None = None,
 ) -> str:
-    """Call the OpenAI Responses API and return the combined text output."""
+    """Call the OpenAI Responses API and return the combined text output.
+
+    Runs on the shared AsyncClient. Each call waits
+    for a slot from the LLM scheduler (global cap, per-user quota, priority
+    class). ``on_stream_delta`` is invoked on the event loop for every
+    streamed text delta.
+    """
     settings = get_settings()
+    _require_api_key(settings)
+    response_payload = _build_response_payload(
+        model=model,
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        max_output_tokens=max_output_tokens,
+        top_p=top_p,
+        reasoning_effort=reasoning_effort,
+    )
+    async with get_llm_scheduler().slot(priority=priority, user_id=user_id):
+        if stream:
+            return await _call_openai_streaming_async(response_payload, settings, on_stream_delta)
+
+        responses_client = getattr(get_async_openai_client(), "responses", None)
+        if responses_client and hasattr(responses_client, "create"):
+            return _handle_sdk_response(await responses_client.create(**response_payload))
+
+        try:
+            resp = await get_async_http_client().post("/responses", json=response_payload)
+        except httpx.TimeoutException as exc:
+            raise _timeout_error(settings, exc) from exc
+        except httpx.HTTPError as exc:  # pragma: no cover - network failure path
+            raise _transport_error(exc) from exc
+        return _handle_rest_response(resp)
+
+
+def _require_api_key(settings) -> None:
     if not settings.openai_api_key:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="OpenAI not configured",
         )
-    client = OpenAI(api_key=settings.openai_api_key)
+
+
+def _build_response_payload(
+    *,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    max_output_tokens: int,
+    top_p: float | None,
+    reasoning_effort: str | None,
+) -> Dict[str, Any]:
     response_payload: Dict[str, Any] = {
         "model": model,
         "input": [
@@ -44,51 +93,27 @@ def call_openai_responses(
         response_payload["top_p"] = top_p
     if reasoning_effort:
         response_payload["reasoning"] = {"effort": reasoning_effort}
-    if stream:
-        return _call_openai_streaming(response_payload, settings, on_stream_delta)
-
-    responses_client = getattr(client, "responses", None)
-    if responses_client and hasattr(responses_client, "create"):
-        response = responses_client.create(**response_payload)
-        if getattr(response, "status", "completed") != "completed":
-            reason = getattr(getattr(response, "incomplete_details", None), "reason", "unknown")
-            logger.error("OpenAI Responses API returned incomplete status: %s", reason)
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Recommendation model did not complete successfully",
-            )
-        text = _extract_response_text(response)
-        if not text:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Recommendation model returned empty output",
-            )
-        return text
-
-    logger.warning("OpenAI client missing Responses API; falling back to HTTP call")
-    try:
-        resp = httpx.post(
-            "https://api.openai.com/v1/responses",
-            json=response_payload,
-            headers={
-                "Authorization": f"Bearer {settings.openai_api_key}",
-                "Content-Type": "application/json",
-            },
-            timeout=settings.openai_request_timeout_seconds,
-        )
-    except httpx.TimeoutException as exc:
-        logger.error("HTTP timeout calling OpenAI Responses API after %ss", settings.openai_request_timeout_seconds)
+    return response_payload
+
+
+def _handle_sdk_response(response: Any) -> str:
+    if getattr(response, "status", "completed") != "completed":
+        reason = getattr(getattr(response, "incomplete_details", None), "reason", "unknown")
+        logger.error("OpenAI Responses API returned incomplete status: %s", reason)
         raise HTTPException(
-            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail="Timed out while waiting for the OpenAI model. Please retry.",
-        ) from exc
-    except httpx.HTTPError as exc:  # pragma: no cover - network failure path
-        logger.error("HTTP error calling OpenAI Responses API: %s", exc)
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Recommendation model did not complete successfully",
+        )
+    text = _extract_response_text(response)
+    if not text:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Unable to reach OpenAI",
-        ) from exc
+            detail="Recommendation model returned empty output",
+        )
+    return text
+
 
+def _handle_rest_response(resp: httpx.Response) -> str:
     if resp.status_code >= 400:
         logger.error("OpenAI Responses REST API returned %s: %s", resp.status_code, resp.text)
         raise HTTPException(
@@ -106,83 +131,100 @@ def call_openai_responses(
     return text
 
 
-def _call_openai_streaming(
+def _timeout_error(settings, exc: Exception, *, streaming: bool = False) -> HTTPException:
+    logger.error(
+        "HTTP timeout calling OpenAI Responses API after %ss%s",
+        settings.openai_request_timeout_seconds,
+        " (stream)" if streaming else "",
+    )
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail="Timed out while waiting for the OpenAI model. Please retry.",
+    )
+
+
+def _transport_error(exc: Exception, *, streaming: bool = False) -> HTTPException:
+    if streaming:
+        logger.error("HTTP error during OpenAI streaming request: %s", exc)
+    else:
+        logger.error("HTTP error calling OpenAI Responses API: %s", exc)
+    return HTTPException(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        detail="Unable to reach OpenAI",
+    )
+
+
+def _stream_status_error(resp: httpx.Response) -> HTTPException:
+    logger.error("OpenAI Responses REST API returned %s during stream: %s", resp.status_code, resp.text)
+    return HTTPException(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        detail="Recommendation model call failed",
+    )
+
+
+def _consume_stream_line(
+    raw_line: str | bytes | None,
+    chunks: List[str],
+    on_stream_delta: Optional[Callable[[str], None]],
+) -> bool:
+    """Handle one SSE line; return True once the stream signals completion."""
+    if raw_line is None:
+        return False
+    if isinstance(raw_line, bytes):
+        line = raw_line.decode("utf-8", errors="ignore")
+    else:
+        line = raw_line
+    stripped = line.strip()
+    if not stripped or stripped.startswith(":") or not stripped.startswith("data:"):
+        return False
+    data = stripped[5:].strip()
+    if data == "[DONE]":
+        return True
+    if not data:
+        return False
+    try:
+        event = json.loads(data)
+    except json.JSONDecodeError:
+        logger.debug("Malformed streaming event: %s", data)
+        return False
+    event_type = event.get("type")
+    if event_type == "response.output_text.delta":
+        delta = event.get("delta")
+        delta_text = delta if isinstance(delta, str) else ""
+        if delta_text:
+            chunks.append(delta_text)
+            if on_stream_delta:
+                on_stream_delta(delta_text)
+    elif event_type == "response.error":
+        message = (event.get("error") or {}).get("message", "unknown error")
+        logger.error("OpenAI streaming error: %s", message)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Recommendation model call failed",
+        )
+    return False
+
+
+async def _call_openai_streaming_async(
     response_payload: Dict[str, Any],
     settings,
     on_stream_delta: Optional[Callable[[str], None]],
 ) -> str:
     payload = dict(response_payload)
     payload["stream"] = True
-    headers = {
-        "Authorization": f"Bearer {settings.openai_api_key}",
-        "Content-Type": "application/json",
-    }
     chunks: list[str] = []
     try:
-        with httpx.stream(
-            "POST",
-            "https://api.openai.com/v1/responses",
-            json=payload,
-            headers=headers,
-            timeout=settings.openai_request_timeout_seconds,
-        ) as resp:
+        async with get_async_http_client().stream("POST", "/responses", json=payload) as resp:
             if resp.status_code >= 400:
-                logger.error("OpenAI Responses REST API returned %s during stream: %s", resp.status_code, resp.text)
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY,
-                    detail="Recommendation model call failed",
-                )
-            for raw_line in resp.iter_lines():
-                if raw_line is None:
-                    continue
-                if isinstance(raw_line, bytes):
-                    line = raw_line.decode("utf-8", errors="ignore")
-                else:
-                    line = raw_line
-                stripped = line.strip()
-                if not stripped:
-                    continue
-                if stripped.startswith(":"):
-                    continue
-                if not stripped.startswith("data:"):
-                    continue
-                data = stripped[5:].strip()
-                if not data or data == "[DONE]":
-                    if data == "[DONE]":
-                        break
-                    continue
-                try:
-                    event = json.loads(data)
-                except json.JSONDecodeError:
-                    logger.debug("Malformed streaming event: %s", data)
-                    continue
-                event_type = event.get("type")
-                if event_type == "response.output_text.delta":
-                    delta = event.get("delta")
-                    delta_text = delta if isinstance(delta, str) else ""
-                    if delta_text:
-                        chunks.append(delta_text)
-                        if on_stream_delta:
-                            on_stream_delta(delta_text)
-                elif event_type == "response.error":
-                    message = (event.get("error") or {}).get("message", "unknown error")
-                    logger.error("OpenAI streaming error: %s", message)
-                    raise HTTPException(
-                        status_code=status.HTTP_502_BAD_GATEWAY,
-                        detail="Recommendation model call failed",
-                    )
+                await resp.aread()
+                raise _stream_status_error(resp)
+            async for raw_line in resp.aiter_lines():
+                if _consume_stream_line(raw_line, chunks, on_stream_delta):
+                    break
     except httpx.TimeoutException as exc:
-        logger.error("HTTP timeout calling OpenAI Responses API after %ss (stream)", settings.openai_request_timeout_seconds)
-        raise HTTPException(
-            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail="Timed out while waiting for the OpenAI model. Please retry.",
-        ) from exc
+        raise _timeout_error(settings, exc, streaming=True) from exc
     except httpx.HTTPError as exc:  # pragma: no cover
-        logger.error("HTTP error during OpenAI streaming request: %s", exc)
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Unable to reach OpenAI",
-        ) from exc
+        raise _transport_error(exc, streaming=True) from exc
     return "".join(chunks)
 
 
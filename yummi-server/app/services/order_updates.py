@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Set, Tuple
+
+from ..redis_util import blocking_read_slice_seconds, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Order writes PUBLISH the new version here; each process holds one pattern
+# subscription and fans messages out to its parked long-poll requests.
+ORDER_UPDATES_CHANNEL_PREFIX = "order:updates:"
+LISTENER_READY_TIMEOUT_SECONDS = 1.0
+LISTENER_RETRY_SECONDS = 1.0
+
+_LOCK = threading.Lock()
+_WATCHES: Dict[str, Set["OrderWatch"]] = {}
+_LISTENERS: Dict[asyncio.AbstractEventLoop, Tuple[asyncio.Task, asyncio.Event]] = {}
+
+
+def order_update_channel(order_id: str) -> str:
+    return f"{ORDER_UPDATES_CHANNEL_PREFIX}{order_id}"
+
+
+class OrderWatch:
+    """Wakes one waiting request when its order is written again."""
+
+    def __init__(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._future: asyncio.Future = self._loop.create_future()
+
+    async def wait(self, timeout: float) -> bool:
+        """``True`` if the order changed (or may have) within ``timeout``."""
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if self._future.done():
+                self._future = self._loop.create_future()
+
+    def wake(self) -> None:
+        self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self._future.done():
+            self._future.set_result(None)
+
+
+@asynccontextmanager
+async def watch_order_updates(order_id: str) -> AsyncIterator[OrderWatch]:
+    """Register for updates to ``order_id`` before the caller reads it.
+
+    Registration (and, with Redis, the process subscription) is in place when
+    the block starts, so a write landing between the caller's read and its
+    ``wait`` still wakes it.
+    """
+    watch = OrderWatch()
+    with _LOCK:
+        _WATCHES.setdefault(order_id, set()).add(watch)
+    try:
+        client = get_async_redis()
+        if client is not None:
+            await _ensure_listener(client)
+        yield watch
+    finally:
+        with _LOCK:
+            watches = _WATCHES.get(order_id)
+            if watches is not None:
+                watches.discard(watch)
+                if not watches:
+                    _WATCHES.pop(order_id, None)
+
+
+def notify_order_watchers(order_id: str) -> None:
+    with _LOCK:
+        watches = list(_WATCHES.get(order_id, ()))
+    for watch in watches:
+        watch.wake()
+
+
+async def stop_order_update_listener() -> None:
+    """Cancel this loop's subscription; registered as an app shutdown handler."""
+    with _LOCK:
+        listener = _LISTENERS.pop(asyncio.get_running_loop(), None)
+    if listener is None:
+        return
+    task, _ = listener
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def _ensure_listener(client) -> None:
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        listener = _LISTENERS.get(loop)
+        if listener is None or listener[0].done():
+            ready = asyncio.Event()
+            listener = (loop.create_task(_listen(client, ready)), ready)
+            _LISTENERS[loop] = listener
+    ready = listener[1]
+    if ready.is_set():
+        return
+    try:
+        await asyncio.wait_for(ready.wait(), LISTENER_READY_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # Waiters still return at their deadline; they just miss early wake-ups.
+        logger.warning("Order update subscription not ready; long polls fall back to their timeout")
+
+
+async def _listen(client, ready: asyncio.Event) -> None:
+    while True:
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(f"{ORDER_UPDATES_CHANNEL_PREFIX}*")
+            ready.set()
+            # Anything published while (re)subscribing was missed; let every
+            # waiter re-read its order.
+            _wake_all()
+            # Each wait stays under the Redis socket timeout so an idle
+            # subscription never trips it.
+            listen_slice = blocking_read_slice_seconds()
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=listen_slice)
+                if message and message.get("type") == "pmessage":
+                    notify_order_watchers(str(message["channel"])[len(ORDER_UPDATES_CHANNEL_PREFIX) :])
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            ready.clear()
+            logger.warning("Order update subscription failed: %s", exc)
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:  # pragma: no cover - connection already gone
+                pass
+
+
+def _wake_all() -> None:
+    with _LOCK:
+        watches = [watch for group in _WATCHES.values() for watch in group]
+    for watch in watches:
+        watch.wake()
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 import logging
 import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, or_, case, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -17,6 +22,8 @@ REFUND_WINDOW_DAYS = 90
 REFUND_LIMIT_PER_WINDOW = 3
 CHARGEBACK_WINDOW_DAYS = 90
 CHARGEBACK_LIMIT_PER_WINDOW = 2
+WALLET_SUMMARY_TRANSACTION_LIMIT = 20
+WALLET_HISTORY_MAX_PAGE_SIZE = 100
 
 
 def _utcnow() -> datetime:
@@ -52,6 +59,12 @@ async def _create_wallet_transaction(
         context=context,
     )
     session.add(txn)
+    await _apply_balance_delta(
+        session,
+        user_id=user_id,
+        currency=currency,
+        delta=_signed_amount(entry_type, amount_minor),
+    )
     try:
         await session.commit()
     except Exception:  # pragma: no cover
@@ -61,6 +74,54 @@ async def _create_wallet_transaction(
     return txn
 
 
+def _signed_amount(entry_type: str, amount_minor: int) -> int:
+    return amount_minor if entry_type == "credit" else -amount_minor
+
+
+def _ledger_balance_expr():
+    return func.coalesce(
+        func.sum(
+            case(
+                (WalletTransaction.entry_type == "credit", WalletTransaction.amount_minor),
+                else_=-WalletTransaction.amount_minor,
+            )
+        ),
+        0,
+    )
+
+
+async def _apply_balance_delta(
+    session: AsyncSession,
+    *,
+    user_id: str,
+    currency: str,
+    delta: int,
+) -> None:
+    """Adjust the materialised balance inside the caller's transaction.
+
+    The state row is created with an insert-or-ignore so two first writes for
+    a user cannot collide, and the increment is a single UPDATE so concurrent
+    writers serialise on the row lock instead of overwriting each other.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_fn = pg_insert if dialect == "postgresql" else sqlite_insert
+        await session.execute(
+            insert_fn(WalletAccountState)
+            .values(user_id=user_id, spend_blocked=False, balance_minor=0, currency=currency)
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+    elif await session.get(WalletAccountState, user_id) is None:
+        session.add(WalletAccountState(user_id=user_id, balance_minor=0, currency=currency))
+        await session.flush()
+    await session.execute(
+        update(WalletAccountState)
+        .where(WalletAccountState.user_id == user_id)
+        .values(balance_minor=WalletAccountState.balance_minor + delta, currency=currency)
+        .execution_options(synchronize_session=False)
+    )
+
+
 async def _get_account_state(session: AsyncSession, user_id: Optional[str]) -> Optional[WalletAccountState]:
     if not user_id:
         return None
@@ -368,37 +429,95 @@ async def sync_wallet_transactions_for_payment(
         )
 
 
+def _serialize_wallet_transaction(txn: WalletTransaction) -> Dict[str, Any]:
+    return {
+        "id": str(txn.id),
+        "amountMinor": txn.amount_minor,
+        "currency": txn.currency,
+        "entryType": txn.entry_type,
+        "transactionType": txn.transaction_type,
+        "note": txn.note,
+        "createdAt": txn.created_at.isoformat(),
+        "paymentId": str(txn.payment_id) if txn.payment_id else None,
+        "externalReference": txn.external_reference,
+        "initiatedBy": txn.initiated_by,
+        "context": txn.context,
+    }
+
+
+def _encode_history_cursor(txn: WalletTransaction) -> str:
+    raw = json.dumps([txn.created_at.isoformat(), str(txn.id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_history_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, txn_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), uuid.UUID(txn_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+async def list_wallet_transactions(
+    session: AsyncSession,
+    user_id: str,
+    *,
+    limit: int = WALLET_SUMMARY_TRANSACTION_LIMIT,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of ledger history, newest first.
+
+    Pages are keyed on ``(created_at DESC, id)``, matching the column order of
+    ``ix_wallet_transactions_user_created``, so every page is an index range
+    scan regardless of depth. Returns the
+    serialised entries and the cursor for the next page, if any.
+    """
+    limit = max(1, min(limit, WALLET_HISTORY_MAX_PAGE_SIZE))
+    query = select(WalletTransaction).where(WalletTransaction.user_id == user_id)
+    if cursor:
+        created_at, txn_id = _decode_history_cursor(cursor)
+        query = query.where(
+            or_(
+                WalletTransaction.created_at < created_at,
+                and_(WalletTransaction.created_at == created_at, WalletTransaction.id > txn_id),
+            )
+        )
+    result = await session.execute(
+        query.order_by(WalletTransaction.created_at.desc(), WalletTransaction.id.asc()).limit(limit + 1)
+    )
+    rows = list(result.scalars())
+    next_cursor = _encode_history_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [_serialize_wallet_transaction(txn) for txn in rows[:limit]], next_cursor
+
+
 async def get_user_wallet_summary(
-    session: AsyncSession, user_id: Optional[str]
+    session: AsyncSession,
+    user_id: Optional[str],
+    *,
+    include_transactions: bool = True,
 ) -> Optional[Dict[str, Any]]:
+    """Balance and lock state for ``user_id``.
+
+    The balance comes from the materialised account state, so callers that
+    only need to check funds should pass ``include_transactions=False`` to
+    skip reading the ledger. Only the most recent entries are embedded;
+    ``transactionsCursor`` continues from there via
+    ``list_wallet_transactions``.
+    """
     if not user_id:
         return None
-    result = await session.execute(
-        select(WalletTransaction).where(WalletTransaction.user_id == user_id)
-    )
-    transactions = result.scalars().all()
-    account_state = await _get_account_state(session, user_id)
-
-    if not transactions:
-        return {
-            "userId": user_id,
-            "balanceMinor": 0,
-            "currency": "ZAR",
-            "transactions": [],
-            "spendableMinor": 0,
-            "spendBlocked": bool(account_state.spend_blocked) if account_state else False,
-            "lockReason": account_state.lock_reason if account_state else None,
-            "lockNote": account_state.lock_note if account_state else None,
-        }
-
-    balance = 0
-    currency = "ZAR"
-    for txn in transactions:
-        currency = txn.currency or currency
-        if txn.entry_type == "credit":
-            balance += txn.amount_minor
-        else:
-            balance -= txn.amount_minor
+    # Balances are changed by UPDATE statements, so bypass the identity map.
+    account_state = await session.get(WalletAccountState, user_id, populate_existing=True)
+    balance = account_state.balance_minor if account_state else 0
+    currency = (account_state.currency if account_state else None) or "ZAR"
+
+    transactions: List[Dict[str, Any]] = []
+    transactions_cursor = None
+    if include_transactions:
+        transactions, transactions_cursor = await list_wallet_transactions(
+            session, user_id, limit=WALLET_SUMMARY_TRANSACTION_LIMIT
+        )
 
     is_negative = balance < 0
     spend_blocked = is_negative or (account_state.spend_blocked if account_state else False)
@@ -412,22 +531,8 @@ async def get_user_wallet_summary(
         "userId": user_id,
         "balanceMinor": balance,
         "currency": currency,
-        "transactions": [
-            {
-                "id": str(txn.id),
-                "amountMinor": txn.amount_minor,
-                "currency": txn.currency,
-                "entryType": txn.entry_type,
-                "transactionType": txn.transaction_type,
-                "note": txn.note,
-                "createdAt": txn.created_at.isoformat(),
-                "paymentId": str(txn.payment_id) if txn.payment_id else None,
-                "externalReference": txn.external_reference,
-                "initiatedBy": txn.initiated_by,
-                "context": txn.context,
-            }
-            for txn in sorted(transactions, key=lambda t: t.created_at, reverse=True)
-        ],
+        "transactions": transactions,
+        "transactionsCursor": transactions_cursor,
         "spendableMinor": spendable_minor,
         "spendBlocked": spend_blocked,
         "lockReason": lock_reason,
@@ -435,6 +540,64 @@ async def get_user_wallet_summary(
     }
 
 
+async def reconcile_wallet_balances(
+    session: AsyncSession,
+    *,
+    user_id: Optional[str] = None,
+    repair: bool = False,
+) -> Dict[str, Any]:
+    """Compare materialised balances with the ledger totals.
+
+    With ``repair`` each drifted row is reset from a ledger SUM evaluated in
+    the same UPDATE statement, so entries written since the comparison are
+    not lost.
+    """
+    ledger_query = select(WalletTransaction.user_id, _ledger_balance_expr()).group_by(WalletTransaction.user_id)
+    state_query = select(WalletAccountState.user_id, WalletAccountState.balance_minor)
+    if user_id:
+        ledger_query = ledger_query.where(WalletTransaction.user_id == user_id)
+        state_query = state_query.where(WalletAccountState.user_id == user_id)
+    ledger = {row[0]: int(row[1] or 0) for row in (await session.execute(ledger_query)).all()}
+    materialized = {row[0]: int(row[1] or 0) for row in (await session.execute(state_query)).all()}
+
+    drift = []
+    for uid in sorted(set(ledger) | set(materialized)):
+        expected = ledger.get(uid, 0)
+        actual = materialized.get(uid, 0)
+        if expected != actual:
+            drift.append({"userId": uid, "ledgerMinor": expected, "materializedMinor": actual})
+
+    if repair and drift:
+        for entry in drift:
+            uid = entry["userId"]
+            if uid not in materialized:
+                session.add(WalletAccountState(user_id=uid))
+                await session.flush()
+            ledger_sum = (
+                select(_ledger_balance_expr())
+                .where(WalletTransaction.user_id == uid)
+                .scalar_subquery()
+            )
+            await session.execute(
+                update(WalletAccountState)
+                .where(WalletAccountState.user_id == uid)
+                .values(balance_minor=ledger_sum)
+                .execution_options(synchronize_session=False)
+            )
+        try:
+            await session.commit()
+        except Exception:  # pragma: no cover
+            await session.rollback()
+            raise
+        logger.warning("Repaired wallet balance drift for %d user(s)", len(drift))
+
+    return {
+        "checked": len(set(ledger) | set(materialized)),
+        "repaired": bool(repair and drift),
+        "drift": drift,
+    }
+
+
 async def record_chargeback(
     session: AsyncSession,
     *,
@@ -460,7 +623,7 @@ async def record_chargeback(
     )
 
     await _evaluate_chargeback_flags(session, payment.user_id)
-    summary = await get_user_wallet_summary(session, payment.user_id)
+    summary = await get_user_wallet_summary(session, payment.user_id, include_transactions=False)
 
     balance = summary["balanceMinor"] if summary else 0
     spend_blocked = summary["spendBlocked"] if summary else False
@@ -505,7 +668,7 @@ async def request_wallet_refund(
     reason: Optional[str],
     actor_email: Optional[str],
 ) -> Dict[str, Any]:
-    summary = await get_user_wallet_summary(session, user_id)
+    summary = await get_user_wallet_summary(session, user_id, include_transactions=False)
     if summary is None:
         raise ValueError("Wallet not found")
     if summary["spendBlocked"]:
@@ -547,7 +710,7 @@ async def request_wallet_refund(
         },
     )
 
-    updated = await get_user_wallet_summary(session, user_id)
+    updated = await get_user_wallet_summary(session, user_id, include_transactions=False)
     return {
         "transaction": txn,
         "summary": updated,
@@ -611,7 +774,7 @@ async def update_refund_status(
             context={"sourceTransaction": transaction_id},
         )
 
-    summary = await get_user_wallet_summary(session, txn.user_id)
+    summary = await get_user_wallet_summary(session, txn.user_id, include_transactions=False)
     return {
         "transaction": txn,
         "summary": summary,
@@ -23,9 +23,11 @@ from ..schemas import (
 )
 from .filtering import CandidateMealDetail, generate_candidate_pool_with_details
 from .meal_representation import extract_key_ingredients, extract_sku_snapshot, format_json
-from .meals import get_meal_manifest
-from .openai_responses import call_openai_responses
+from .meals import MealManifestIndex, get_meal_manifest_index
+from .llm_scheduler import LLMPriority
+from .openai_responses import call_openai_responses_async
 from .exploration_tracker import flush_background_run
+from .json_stream import JsonArrayStreamParser
 from .meal_feedback import MealFeedbackSource, record_meal_feedback_events
 from .preferences import (
     get_user_preference_profile,
@@ -41,14 +43,21 @@ async def run_recommendation_workflow(
     *,
     user_id: str,
     request: RecommendationRunRequest,
+    on_meal: Callable[[RecommendationMeal], None] | None = None,
 ) -> RecommendationRunResponse:
+    """Run the recommendation feed pipeline.
+
+    ``on_meal`` receives liked preselections first and then each model pick as
+    soon as its ID streams in; the returned response stays authoritative.
+    """
     settings = get_settings()
     if not settings.openai_api_key:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="OpenAI not configured",
         )
-    manifest = get_meal_manifest()
+    manifest_index = get_meal_manifest_index()
+    manifest = manifest_index.manifest
     manifest_version = manifest.get("manifest_id")
     if request.mealVersion and manifest_version and request.mealVersion != manifest_version:
         raise HTTPException(
@@ -102,7 +111,7 @@ async def run_recommendation_workflow(
         )
         if filtered_ids:
             exploration_streamed_details = _build_detail_records_from_manifest(
-                manifest=manifest,
+                manifest_index=manifest_index,
                 meal_ids=filtered_ids,
             )
     filter_request = CandidateFilterRequest(
@@ -112,7 +121,7 @@ async def run_recommendation_workflow(
         limit=candidate_limit,
     )
     filter_response, generated_detail_records = generate_candidate_pool_with_details(
-        manifest=manifest,
+        manifest_index=manifest_index,
         tag_manifest=tag_manifest,
         profile=profile,
         request=filter_request,
@@ -128,7 +137,7 @@ async def run_recommendation_workflow(
 
     blocked_archetypes = _derive_blocked_archetypes(
         reaction_groups.get("dislike") or [],
-        manifest,
+        manifest_index,
     )
     if blocked_archetypes:
         detail_records = [
@@ -145,7 +154,7 @@ async def run_recommendation_workflow(
     liked_recommendations = _hydrate_preselected_recommendations(
         liked_meal_ids,
         detail_records,
-        manifest,
+        manifest_index,
     )
     liked_meal_ids_set = {meal.mealId for meal in liked_recommendations}
     llm_detail_records = [
@@ -160,11 +169,14 @@ async def run_recommendation_workflow(
     profile_payload = serialize_preference_profile(profile, tag_manifest)
     feedback_payload = _build_feedback_payload(
         reaction_groups=reaction_groups,
-        manifest=manifest,
+        manifest_index=manifest_index,
         exploration_session=exploration_session,
         declined_ids=declined_ids,
     )
     llm_meal_target = max(meal_target - len(liked_recommendations), 0)
+    if on_meal is not None:
+        for meal in liked_recommendations:
+            on_meal(meal)
     llm_meals: List[RecommendationMeal] = []
     parsed: Dict[str, Any] = {"recommendations": [], "notes": []}
     if llm_meal_target > 0 and llm_detail_records:
@@ -177,12 +189,30 @@ async def run_recommendation_workflow(
             meal_target=llm_meal_target,
         )
 
+        streamable_details = {str(detail.meal.get("meal_id")): detail for detail in llm_detail_records}
+        emitted_meal_ids: set[str] = set()
+
         def handle_streamed_recommendation(meal_id: str) -> None:
             logger.info("Recommendation stream update user=%s meal_id=%s", user_id, meal_id)
+            detail = streamable_details.get(str(meal_id))
+            if (
+                on_meal is None
+                or detail is None
+                or meal_id in emitted_meal_ids
+                or len(emitted_meal_ids) >= llm_meal_target
+            ):
+                return
+            emitted_meal_ids.add(meal_id)
+            on_meal(
+                _hydrate_recommendation_meal(
+                    detail,
+                    rank=len(liked_recommendations) + len(emitted_meal_ids),
+                    manifest_index=manifest_index,
+                )
+            )
 
         stream_accumulator = _RecommendationStreamingAccumulator(handle_streamed_recommendation)
-        llm_call = asyncio.to_thread(
-            call_openai_responses,
+        llm_call = call_openai_responses_async(
             model=settings.openai_recommendation_model,
             system_prompt=system_prompt,
             user_prompt=user_prompt,
@@ -191,6 +221,8 @@ async def run_recommendation_workflow(
             reasoning_effort=settings.openai_recommendation_reasoning_effort,
             stream=True,
             on_stream_delta=stream_accumulator.handle_delta,
+            priority=LLMPriority.INTERACTIVE,
+            user_id=user_id,
         )
         stream_timeout = settings.recommendation_stream_timeout_seconds
         llm_text: str | None = None
@@ -230,6 +262,7 @@ async def run_recommendation_workflow(
             detail_records=llm_detail_records,
             meal_target=llm_meal_target,
             random_fill=using_streamed_candidates,
+            manifest_index=manifest_index,
         )
 
     final_meals = _merge_and_shuffle_recommendations(liked_recommendations, llm_meals)
@@ -278,16 +311,16 @@ def _extract_latest_home_feed_ids(profile: UserPreferenceProfile | None) -> set[
 def _build_feedback_payload(
     *,
     reaction_groups: Dict[str, List[str]],
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
     exploration_session: MealExplorationSession | None,
     declined_ids: set[str],
 ) -> Dict[str, Any]:
     likes = reaction_groups.get("like") or []
     neutrals = reaction_groups.get("neutral") or []
     dislikes = reaction_groups.get("dislike") or []
-    liked_entries = _materialize_feedback_entries(likes, manifest, exploration_session)
-    neutral_entries = _materialize_feedback_entries(neutrals, manifest, exploration_session)
-    disliked_entries = _materialize_feedback_entries(dislikes, manifest, exploration_session)
+    liked_entries = _materialize_feedback_entries(likes, manifest_index, exploration_session)
+    neutral_entries = _materialize_feedback_entries(neutrals, manifest_index, exploration_session)
+    disliked_entries = _materialize_feedback_entries(dislikes, manifest_index, exploration_session)
     return {
         "explorationSessionId": str(exploration_session.id) if exploration_session else None,
         "likedMeals": liked_entries,
@@ -309,7 +342,7 @@ def _build_feedback_payload(
 
 def _materialize_feedback_entries(
     meal_ids: Iterable[str],
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
     exploration_session: MealExplorationSession | None,
 ) -> List[Dict[str, Any]]:
     session_lookup = _session_meal_lookup(exploration_session)
@@ -325,7 +358,7 @@ def _materialize_feedback_entries(
                 }
             )
             continue
-        manifest_entry = _find_manifest_meal(manifest, meal_id)
+        manifest_entry, _ = manifest_index.find_meal(meal_id)
         if manifest_entry:
             entries.append(
                 {
@@ -446,21 +479,6 @@ def _session_meal_lookup(session: MealExplorationSession | None) -> Dict[str, Di
     return lookup
 
 
-def _find_manifest_meal(manifest: Dict[str, Any], meal_id: str) -> Dict[str, Any] | None:
-    meal, _ = _find_manifest_meal_with_archetype(manifest, meal_id)
-    return meal
-
-
-def _find_manifest_meal_with_archetype(
-    manifest: Dict[str, Any], meal_id: str
-) -> tuple[Dict[str, Any] | None, str | None]:
-    for archetype in manifest.get("archetypes") or []:
-        for meal in archetype.get("meals") or []:
-            if str(meal.get("meal_id")) == str(meal_id):
-                return meal, archetype.get("uid")
-    return None, None
-
-
 def _prepare_candidate_payload(
     details: List[CandidateMealDetail],
     limit: int,
@@ -535,6 +553,7 @@ def _materialize_recommendations(
     detail_records: List[CandidateMealDetail],
     meal_target: int,
     random_fill: bool = False,
+    manifest_index: MealManifestIndex | None = None,
 ) -> List[RecommendationMeal]:
     lookup = {str(detail.meal.get("meal_id")): detail for detail in detail_records}
     hydrated: List[RecommendationMeal] = []
@@ -546,7 +565,7 @@ def _materialize_recommendations(
         detail = lookup.get(str(meal_id))
         if not detail:
             continue
-        hydrated.append(_hydrate_recommendation_meal(detail, rank=index))
+        hydrated.append(_hydrate_recommendation_meal(detail, rank=index, manifest_index=manifest_index))
         seen_ids.add(str(detail.meal.get("meal_id")))
         if len(hydrated) >= meal_target:
             break
@@ -569,7 +588,9 @@ def _materialize_recommendations(
             meal_id = str(detail.meal.get("meal_id"))
             if not meal_id or meal_id in seen_ids:
                 continue
-            hydrated.append(_hydrate_recommendation_meal(detail, rank=next_rank))
+            hydrated.append(
+                _hydrate_recommendation_meal(detail, rank=next_rank, manifest_index=manifest_index)
+            )
             seen_ids.add(meal_id)
             next_rank += 1
             if len(hydrated) >= meal_target:
@@ -593,11 +614,11 @@ def _normalize_selection_payload(selections: List[Any]) -> List[str]:
 
 def _derive_blocked_archetypes(
     disliked_meal_ids: Sequence[str],
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
 ) -> set[str]:
     blocked: set[str] = set()
     for meal_id in disliked_meal_ids or []:
-        _, archetype_uid = _find_manifest_meal_with_archetype(manifest, meal_id)
+        _, archetype_uid = manifest_index.find_meal(meal_id)
         if archetype_uid:
             blocked.add(str(archetype_uid))
     return blocked
@@ -619,8 +640,18 @@ def _hydrate_recommendation_meal(
     detail: CandidateMealDetail,
     *,
     rank: int,
+    manifest_index: MealManifestIndex | None = None,
 ) -> RecommendationMeal:
     meal = detail.meal
+    if manifest_index is not None:
+        hydrated = manifest_index.hydrate_recommendation_meal(
+            meal.get("meal_id"),
+            rank=rank,
+            archetype_uid=detail.archetype_uid,
+            meal=meal,
+        )
+        if hydrated is not None:
+            return hydrated
     return RecommendationMeal(
         mealId=str(meal.get("meal_id")),
         name=meal.get("name"),
@@ -669,12 +700,12 @@ def _filter_streamed_meal_ids(
 
 def _build_detail_records_from_manifest(
     *,
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
     meal_ids: Sequence[str],
 ) -> List[CandidateMealDetail]:
     details: List[CandidateMealDetail] = []
     for meal_id in meal_ids:
-        meal, archetype_uid = _find_manifest_meal_with_archetype(manifest, meal_id)
+        meal, archetype_uid = manifest_index.find_meal(meal_id)
         if not meal:
             continue
         details.append(
@@ -695,7 +726,7 @@ def _resolve_meal_target(default_target: int, requested: int | None) -> int:
 def _hydrate_preselected_recommendations(
     meal_ids: Sequence[str],
     detail_records: Sequence[CandidateMealDetail],
-    manifest: Dict[str, Any],
+    manifest_index: MealManifestIndex,
 ) -> List[RecommendationMeal]:
     lookup = {str(detail.meal.get("meal_id")): detail for detail in detail_records}
     hydrated: List[RecommendationMeal] = []
@@ -706,12 +737,14 @@ def _hydrate_preselected_recommendations(
             continue
         detail = lookup.get(normalized)
         if not detail:
-            meal, archetype_uid = _find_manifest_meal_with_archetype(manifest, normalized)
+            meal, archetype_uid = manifest_index.find_meal(normalized)
             if meal:
                 detail = CandidateMealDetail(archetype_uid=archetype_uid, meal=meal)
         if not detail:
             continue
-        hydrated.append(_hydrate_recommendation_meal(detail, rank=len(hydrated) + 1))
+        hydrated.append(
+            _hydrate_recommendation_meal(detail, rank=len(hydrated) + 1, manifest_index=manifest_index)
+        )
         seen.add(normalized)
     return hydrated
 
@@ -739,24 +772,22 @@ def _merge_and_shuffle_recommendations(
 class _RecommendationStreamingAccumulator:
     def __init__(self, on_stream_meal: Callable[[str], None] | None = None) -> None:
         self.on_stream_meal = on_stream_meal
-        self.buffer: str = ""
         self.meal_ids: List[str] = []
+        self._chunks: List[str] = []
+        self._parser = JsonArrayStreamParser("recommendations")
         self._emitted: set[str] = set()
 
+    @property
+    def buffer(self) -> str:
+        return "".join(self._chunks)
+
     def handle_delta(self, delta: str | None) -> None:
         if not delta:
             return
-        self.buffer += delta
-        self._try_emit_ids()
+        self._chunks.append(delta)
+        self._emit_ids(self._parser.feed(delta))
 
-    def _try_emit_ids(self) -> None:
-        if not self.buffer:
-            return
-        try:
-            payload = json.loads(self.buffer)
-        except json.JSONDecodeError:
-            return
-        selections = payload.get("recommendations") or []
+    def _emit_ids(self, selections: List[Any]) -> None:
         ordered = _normalize_selection_payload(selections)
         for meal_id in ordered:
             if not meal_id or meal_id in self._emitted:
@@ -25,8 +25,9 @@ from ..schemas import (
 from .filtering import CandidateMealDetail, generate_candidate_pool_with_details
 from .meal_feedback import MealFeedbackSummary, load_feedback_summary
 from .meal_representation import extract_sku_snapshot, format_json
-from .meals import get_meal_manifest
-from .openai_responses import call_openai_responses
+from .meals import get_meal_manifest_index
+from .llm_scheduler import LLMPriority
+from .openai_responses import call_openai_responses_async
 from .preferences import (
     get_user_preference_profile,
     load_tag_manifest,
@@ -150,7 +151,7 @@ async def run_recommendation_learning_workflow(
         trigger,
         sorted((event_context or {}).keys()),
     )
-    manifest = get_meal_manifest()
+    manifest_index = get_meal_manifest_index()
     tag_manifest = load_tag_manifest()
     profile, usage_snapshot = await _collect_profile_snapshot(user_id, tag_manifest)
     if not profile:
@@ -183,7 +184,7 @@ async def run_recommendation_learning_workflow(
         declinedMealIds=list(declined_meal_ids),
     )
     filter_response, candidate_details = generate_candidate_pool_with_details(
-        manifest=manifest,
+        manifest_index=manifest_index,
         tag_manifest=tag_manifest,
         profile=profile,
         request=filter_request,
@@ -249,6 +250,7 @@ async def run_recommendation_learning_workflow(
     )
 
     recommendation_stage = await _run_shadow_recommendation(
+        user_id=user_id,
         settings=settings,
         usage_snapshot=usage_snapshot,
         feedback_summary=feedback_summary,
@@ -380,6 +382,7 @@ async def _run_shadow_exploration(
         on_stream_meal=handle_streamed_meal,
         timeout_seconds=timeout,
         get_streamed_ids=lambda uid: list(streamed_meal_ids.get(uid, [])),
+        priority=LLMPriority.BACKGROUND,
     )
     if pending_tasks:
         logger.info(
@@ -420,6 +423,7 @@ async def _run_shadow_exploration(
 
 async def _run_shadow_recommendation(
     *,
+    user_id: str,
     settings,
     usage_snapshot: Dict[str, Any],
     feedback_summary: MealFeedbackSummary,
@@ -457,6 +461,7 @@ async def _run_shadow_recommendation(
         top_p=settings.openai_recommendation_learning_top_p,
         reasoning=settings.openai_recommendation_learning_reasoning_effort,
         timeout=settings.recommendation_learning_timeout_seconds,
+        user_id=user_id,
     )
     parsed = _parse_json_response(raw)
     ranked_ids = _normalize_selection(parsed.get("recommendations"))
@@ -549,15 +554,17 @@ async def _call_model(
     top_p: float | None,
     reasoning: str | None,
     timeout: int,
+    user_id: str | None = None,
 ) -> str:
-    llm_call = asyncio.to_thread(
-        call_openai_responses,
+    llm_call = call_openai_responses_async(
         model=model,
         system_prompt=system_prompt,
         user_prompt=user_prompt,
         max_output_tokens=max_tokens,
         top_p=top_p,
         reasoning_effort=reasoning,
+        priority=LLMPriority.BACKGROUND,
+        user_id=user_id,
     )
     if timeout:
         return await asyncio.wait_for(llm_call, timeout=timeout)
@@ -6,12 +6,15 @@ import logging
 import math
 import os
 import re
+import sqlite3
 import threading
 from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Sequence
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Sequence
 
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 
 from ..config import get_settings
 from ..schemas import (
@@ -22,7 +25,11 @@ from ..schemas import (
     ShoppingListProductSelection,
     ShoppingListResultItem,
 )
-from .openai_responses import call_openai_responses
+from .catalog_store import CatalogSnapshot, get_catalog_snapshot, get_catalog_snapshot_async, peek_catalog_snapshot
+from .ingredient_index import IngredientIndex, file_sha256, open_ingredient_index, write_ingredient_index
+from .llm_cache import build_llm_cache_key, get_cached_llm_response, store_llm_response
+from .llm_scheduler import LLMPriority
+from .openai_responses import call_openai_responses_async
 from .meal_feedback import MealFeedbackSource, record_meal_feedback_events
 from .recommendationlearning import (
     SHOPPING_LIST_TRIGGER,
@@ -32,18 +39,63 @@ from .recommendationlearning import (
 
 logger = logging.getLogger(__name__)
 
-_catalog_lock = threading.Lock()
-_catalog_by_product_id: Dict[str, Dict[str, Any]] | None = None
-_catalog_by_catalog_ref: Dict[str, Dict[str, Any]] | None = None
-_catalog_cache_mtime: float = 0.0
-_catalog_cache_path: str | None = None
+SHOPPING_LIST_CACHE_NAMESPACE = "shopping_list"
 
 _product_index_lock = threading.Lock()
-_ingredient_product_index: Dict[str, List[Dict[str, Any]]] | None = None
-_ingredient_product_index_path: str | None = None
-_ingredient_product_index_mtime: float = 0.0
+_ingredient_product_index: IngredientIndex | Dict[str, List[Dict[str, Any]]] | None = None
+# (path, mtime_ns, size) of the compiled artifact and of the JSONL, plus the catalog version joined in.
+_ingredient_product_index_source: tuple[Any, Any, Any] | None = None
 
 MAX_CLASSIFIED_PRODUCTS = 12
+MAX_SOLVER_PACKS = 24
+SOLVER_UNIT_TYPES = {"weight", "volume"}
+# Requirements below this share of the smallest pack are usually already on
+# hand, so the model decides pickup vs pantry for them.
+SOLVER_MIN_PACK_FRACTION = 0.25
+# Group labels (exact or as the trailing words) the solver never auto-buys.
+SOLVER_PANTRY_STAPLES = frozenset(
+    {
+        "salt",
+        "black pepper",
+        "white pepper",
+        "peppercorns",
+        "oil",
+        "vinegar",
+        "sugar",
+        "honey",
+        "baking powder",
+        "baking soda",
+        "bicarbonate of soda",
+        "cornflour",
+        "stock cube",
+        "stock cubes",
+        "stock powder",
+        "soy sauce",
+        "fish sauce",
+        "worcestershire sauce",
+        "mustard",
+        "vanilla essence",
+        "vanilla extract",
+        "spice",
+        "spices",
+        "seasoning",
+        "mixed herbs",
+        "dried herbs",
+        "paprika",
+        "cumin",
+        "turmeric",
+        "cinnamon",
+        "nutmeg",
+        "oregano",
+        "chilli flakes",
+        "chilli powder",
+        "chili flakes",
+        "chili powder",
+        "curry powder",
+        "garam masala",
+    }
+)
+SHOPPING_LIST_TOKENS_PER_GROUP = 60
 UNIT_DEFINITIONS: Dict[str, Dict[str, Any]] = {
     "g": {"unit_type": "weight", "unit_label": "g", "multiplier": 1},
     "gram": {"unit_type": "weight", "unit_label": "g", "multiplier": 1},
@@ -112,6 +164,9 @@ async def run_shopping_list_workflow(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="At least one meal selection is required",
         )
+    # Refresh the catalog and the ingredient index off the event loop; the
+    # sync helpers below only read what is already loaded.
+    await load_ingredient_product_index_async()
     ingredient_groups = _aggregate_ingredient_groups(meals)
     if not ingredient_groups:
         return ShoppingListBuildResponse(
@@ -121,6 +176,7 @@ async def run_shopping_list_workflow(
         )
     system_prompt = _build_system_prompt()
     llm_items = await _score_ingredient_groups(
+        user_id=user_id,
         meals=meals,
         ingredient_groups=ingredient_groups,
         system_prompt=system_prompt,
@@ -328,7 +384,8 @@ def _merge_product_lists(
 def _lookup_indexed_products(labels: Sequence[str]) -> List[Dict[str, Any]]:
     if not labels:
         return []
-    index = _load_ingredient_product_index()
+    # Loaded off the event loop by run_shopping_list_workflow.
+    index = _ingredient_product_index
     if not index:
         return []
     results: List[Dict[str, Any]] = []
@@ -446,13 +503,22 @@ def _build_user_prompt(
         indent=2,
     )
     schema_json = json.dumps(schema, ensure_ascii=False, indent=2)
+    if len(ingredient_groups) > 1:
+        scope = (
+            f"You receive {len(ingredient_groups)} independent ingredient groups in this request. "
+            "Handle each group on its own:"
+        )
+        entry_rule = "Return exactly one JSON entry per group, echoing its `group_key`,"
+    else:
+        scope = "You receive exactly one ingredient group per request. For that group:"
+        entry_rule = "Return exactly one JSON entry"
     instructions = (
-        "You receive exactly one ingredient group per request. For that group:\n"
+        f"{scope}\n"
         "1. Study each `requirements[]` entry. Use the text plus any `requirement_measurement` hints to understand the total quantity needed across all meals.\n"
         "2. Review `linked_products` to see every Woolworths SKU already linked to this ingredient. ALL ingredients already map to these SKUs, so you must choose one of them—never invent or skip a product.\n"
         "3. Decide whether the user needs to purchase the ingredient now (`classification = pickup`) or if it is a pantry staple already on hand (`classification = pantry`). Pantry items must always use the provided product but set `packages = 0`.\n"
         "4. Compute how many retail packs to buy for the chosen product. `packages` must be a WHOLE number (integer) and for pickup items it must be at least 1. Round up so the user always has enough to satisfy every meal.\n"
-        "5. Return exactly one JSON entry that matches the schema—include both `product_id` (from `linked_products[].productId`) and the closest `catalog_ref_id` when present."
+        f"5. {entry_rule} that matches the schema—include both `product_id` (from `linked_products[].productId`) and the closest `catalog_ref_id` when present."
     )
     return (
         f"{instructions}\nContext JSON:\n```json\n{context_json}\n```\n"
@@ -503,6 +569,7 @@ def _parse_model_response(text: str) -> Dict[str, Any]:
 
 async def _score_ingredient_groups(
     *,
+    user_id: str | None = None,
     meals: Sequence[ShoppingListMealPayload],
     ingredient_groups: Sequence[Dict[str, Any]],
     system_prompt: str,
@@ -510,9 +577,55 @@ async def _score_ingredient_groups(
 ) -> Dict[str, ShoppingListResultItem]:
     if not ingredient_groups:
         return {}
+    results: Dict[str, ShoppingListResultItem] = {}
+    pending_groups: List[Dict[str, Any]] = []
+    for group in ingredient_groups:
+        solved = _solve_group_packs(group) if settings.shopping_list_pack_solver_enabled else None
+        if solved is not None:
+            results[str(group.get("group_key"))] = solved
+        else:
+            pending_groups.append(group)
+    if len(pending_groups) < len(ingredient_groups):
+        logger.info(
+            "Shopping list pack solver resolved groups=%s llm_groups=%s",
+            len(ingredient_groups) - len(pending_groups),
+            len(pending_groups),
+        )
+    if settings.shopping_list_batching_enabled and len(pending_groups) > 1:
+        results.update(
+            await _score_groups_batched(
+                user_id=user_id,
+                meals=meals,
+                ingredient_groups=pending_groups,
+                system_prompt=system_prompt,
+                settings=settings,
+            )
+        )
+    else:
+        results.update(
+            await _score_groups_individually(
+                user_id=user_id,
+                meals=meals,
+                ingredient_groups=pending_groups,
+                system_prompt=system_prompt,
+                settings=settings,
+            )
+        )
+    return results
+
+
+async def _score_groups_individually(
+    *,
+    user_id: str | None,
+    meals: Sequence[ShoppingListMealPayload],
+    ingredient_groups: Sequence[Dict[str, Any]],
+    system_prompt: str,
+    settings,
+) -> Dict[str, ShoppingListResultItem]:
     tasks = [
         asyncio.create_task(
             _score_single_group(
+                user_id=user_id,
                 meals=meals,
                 group=group,
                 system_prompt=system_prompt,
@@ -542,29 +655,313 @@ async def _score_ingredient_groups(
 
 async def _score_single_group(
     *,
+    user_id: str | None = None,
     meals: Sequence[ShoppingListMealPayload],
     group: Dict[str, Any],
     system_prompt: str,
     settings,
 ) -> ShoppingListResultItem:
-    meal_ids = list(_collect_group_meal_ids(group))
-    user_prompt = _build_user_prompt(
-        meals,
-        [group],
-        limit_meal_ids=meal_ids or None,
+    user_prompt = _build_group_user_prompt(meals, group)
+    cache_key = _build_shopping_list_cache_key(settings, system_prompt, user_prompt)
+    llm_text = await get_cached_llm_response(cache_key, namespace=SHOPPING_LIST_CACHE_NAMESPACE)
+    cache_hit = llm_text is not None
+    if not cache_hit:
+        llm_text = await call_openai_responses_async(
+            model=settings.openai_shopping_list_model,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            max_output_tokens=settings.openai_shopping_list_max_output_tokens,
+            top_p=settings.openai_shopping_list_top_p,
+            reasoning_effort=settings.openai_shopping_list_reasoning_effort,
+            priority=LLMPriority.SHOPPING_LIST,
+            user_id=user_id,
+        )
+    payload = _parse_model_response(llm_text)
+    llm_entry = _extract_group_entry(payload, group.get("group_key"))
+    if not cache_hit and llm_entry is not None:
+        # Only responses that parsed and named this group are worth replaying.
+        await store_llm_response(cache_key, llm_text)
+    return _build_result_item(group, llm_entry)
+
+
+async def _score_groups_batched(
+    *,
+    user_id: str | None,
+    meals: Sequence[ShoppingListMealPayload],
+    ingredient_groups: Sequence[Dict[str, Any]],
+    system_prompt: str,
+    settings,
+) -> Dict[str, ShoppingListResultItem]:
+    """Score several groups per model call, retrying failed groups one by one.
+
+    Groups already answered in the per-group response cache are resolved
+    first; fresh batch answers are written back under the per-group keys so
+    both modes share hits.
+    """
+    results: Dict[str, ShoppingListResultItem] = {}
+    uncached: List[Dict[str, Any]] = []
+    for group in ingredient_groups:
+        cache_key = _build_shopping_list_cache_key(
+            settings, system_prompt, _build_group_user_prompt(meals, group)
+        )
+        cached = await get_cached_llm_response(cache_key, namespace=SHOPPING_LIST_CACHE_NAMESPACE)
+        item = _build_validated_item(group, _parse_cached_entry(cached, group)) if cached else None
+        if item is not None:
+            results[str(group.get("group_key"))] = item
+        else:
+            uncached.append(group)
+    if not uncached:
+        return results
+
+    chunk_size = _SHOPPING_LIST_BATCH_TUNER.chunk_size(settings)
+    chunks = [uncached[index : index + chunk_size] for index in range(0, len(uncached), chunk_size)]
+    # A one-group chunk is just the single-group prompt; route it there so it shares that path's cache.
+    retry_groups: List[Dict[str, Any]] = [chunk[0] for chunk in chunks if len(chunk) == 1]
+    chunks = [chunk for chunk in chunks if len(chunk) > 1]
+    logger.info(
+        "Shopping list batching groups=%s chunks=%s chunk_size=%s",
+        len(uncached),
+        len(chunks),
+        chunk_size,
+    )
+    outcomes = await asyncio.gather(
+        *(
+            _score_group_chunk(
+                user_id=user_id,
+                meals=meals,
+                chunk=chunk,
+                system_prompt=system_prompt,
+                settings=settings,
+            )
+            for chunk in chunks
+        ),
+        return_exceptions=True,
     )
-    llm_text = await asyncio.to_thread(
-        call_openai_responses,
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning("Shopping list chunk failed groups=%s error=%s", len(chunk), outcome)
+            retry_groups.extend(chunk)
+            continue
+        for group in chunk:
+            group_key = str(group.get("group_key"))
+            item = outcome.get(group_key)
+            if item is None:
+                retry_groups.append(group)
+            else:
+                results[group_key] = item
+    if retry_groups:
+        logger.info("Shopping list retrying groups individually count=%s", len(retry_groups))
+        results.update(
+            await _score_groups_individually(
+                user_id=user_id,
+                meals=meals,
+                ingredient_groups=retry_groups,
+                system_prompt=system_prompt,
+                settings=settings,
+            )
+        )
+    return results
+
+
+async def _score_group_chunk(
+    *,
+    user_id: str | None,
+    meals: Sequence[ShoppingListMealPayload],
+    chunk: Sequence[Dict[str, Any]],
+    system_prompt: str,
+    settings,
+) -> Dict[str, ShoppingListResultItem]:
+    meal_ids: set[str] = set()
+    for group in chunk:
+        meal_ids.update(_collect_group_meal_ids(group))
+    user_prompt = _build_user_prompt(meals, chunk, limit_meal_ids=list(meal_ids) or None)
+    llm_start = perf_counter()
+    llm_text = await call_openai_responses_async(
         model=settings.openai_shopping_list_model,
         system_prompt=system_prompt,
         user_prompt=user_prompt,
         max_output_tokens=settings.openai_shopping_list_max_output_tokens,
         top_p=settings.openai_shopping_list_top_p,
         reasoning_effort=settings.openai_shopping_list_reasoning_effort,
+        priority=LLMPriority.SHOPPING_LIST,
+        user_id=user_id,
     )
+    _SHOPPING_LIST_BATCH_TUNER.observe(perf_counter() - llm_start, len(chunk))
     payload = _parse_model_response(llm_text)
-    llm_entry = _extract_group_entry(payload, group.get("group_key"))
-    return _build_result_item(group, llm_entry)
+    entries = payload.get("items") if isinstance(payload, dict) else None
+    entries_by_key: Dict[str, Dict[str, Any]] = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict) and entry.get("group_key") is not None:
+            entries_by_key.setdefault(str(entry["group_key"]), entry)
+    results: Dict[str, ShoppingListResultItem] = {}
+    for group in chunk:
+        group_key = str(group.get("group_key"))
+        llm_entry = entries_by_key.get(group_key)
+        item = _build_validated_item(group, llm_entry)
+        if item is None:
+            continue
+        results[group_key] = item
+        cache_key = _build_shopping_list_cache_key(
+            settings, system_prompt, _build_group_user_prompt(meals, group)
+        )
+        await store_llm_response(cache_key, json.dumps({"items": [llm_entry]}, ensure_ascii=False))
+    return results
+
+
+def _build_validated_item(
+    group: Dict[str, Any], llm_entry: Dict[str, Any] | None
+) -> ShoppingListResultItem | None:
+    """Return the result item only when the entry yields a usable selection."""
+    if not llm_entry:
+        return None
+    item = _build_result_item(group, llm_entry)
+    if item.needsManualProductSelection:
+        return None
+    return item
+
+
+def _parse_cached_entry(cached: str, group: Dict[str, Any]) -> Dict[str, Any] | None:
+    try:
+        payload = _parse_model_response(cached)
+    except HTTPException:
+        return None
+    return _extract_group_entry(payload, group.get("group_key"))
+
+
+def _build_group_user_prompt(meals: Sequence[ShoppingListMealPayload], group: Dict[str, Any]) -> str:
+    meal_ids = list(_collect_group_meal_ids(group))
+    return _build_user_prompt(meals, [group], limit_meal_ids=meal_ids or None)
+
+
+def _build_shopping_list_cache_key(settings, system_prompt: str, user_prompt: str) -> str:
+    return build_llm_cache_key(
+        namespace=SHOPPING_LIST_CACHE_NAMESPACE,
+        model=settings.openai_shopping_list_model,
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        params={
+            "max_output_tokens": settings.openai_shopping_list_max_output_tokens,
+            "top_p": settings.openai_shopping_list_top_p,
+            "reasoning_effort": settings.openai_shopping_list_reasoning_effort,
+        },
+    )
+
+
+class _BatchSizeTuner:
+    """Pick shopping-list chunk sizes from the token budget and observed latency.
+
+    The output budget caps how many group entries fit in one response; an
+    EWMA of seconds-per-group keeps chunks under the target latency so a slow
+    model shrinks batches instead of stretching the tail. Samples include the
+    fixed per-call overhead, which overstates the per-group cost of small
+    chunks; the size still settles where a whole call meets the target.
+    """
+
+    def __init__(self, smoothing: float = 0.3) -> None:
+        self._smoothing = smoothing
+        self._seconds_per_group: float | None = None
+        self._lock = threading.Lock()
+
+    def observe(self, duration_seconds: float, group_count: int) -> None:
+        if group_count <= 0 or duration_seconds <= 0:
+            return
+        sample = duration_seconds / group_count
+        with self._lock:
+            if self._seconds_per_group is None:
+                self._seconds_per_group = sample
+            else:
+                self._seconds_per_group += self._smoothing * (sample - self._seconds_per_group)
+
+    def chunk_size(self, settings) -> int:
+        # Reasoning tokens share max_output_tokens, so only half is budgeted for entries.
+        token_cap = (settings.openai_shopping_list_max_output_tokens // 2) // SHOPPING_LIST_TOKENS_PER_GROUP
+        size = min(settings.shopping_list_batch_max_groups, max(1, token_cap))
+        with self._lock:
+            seconds_per_group = self._seconds_per_group
+        if seconds_per_group:
+            latency_cap = int(settings.shopping_list_batch_target_seconds / seconds_per_group)
+            # Never below two: one-group chunks go through the single-group
+            # path, which records no samples, so the estimate could not recover.
+            size = min(size, max(2, latency_cap))
+        return max(1, size)
+
+
+_SHOPPING_LIST_BATCH_TUNER = _BatchSizeTuner()
+
+
+def _solve_group_packs(group: Dict[str, Any]) -> ShoppingListResultItem | None:
+    """Pick the cheapest product/pack count that covers a measurable requirement.
+
+    Only weight/volume groups where every entry has a parsed measurement and at
+    least one priced product with a pack size of the same unit type qualify.
+    Pantry staples and amounts well below the smallest pack also return None:
+    whether the user already has them is the model's pickup/pantry call, as
+    are counts and mixed units.
+    """
+    if _is_pantry_staple(group.get("label")):
+        return None
+    summary = group.get("requirement_summary") or {}
+    unit_type = summary.get("unit_type")
+    required_amount = summary.get("amount")
+    if unit_type not in SOLVER_UNIT_TYPES or not isinstance(required_amount, (int, float)):
+        return None
+    if not math.isfinite(required_amount) or required_amount <= 0:
+        return None
+    entries = group.get("entries") or []
+    if not entries or any(not entry.get("requirement_measurement") for entry in entries):
+        return None
+    best: tuple[float, float, float, Dict[str, Any]] | None = None
+    smallest_pack: float | None = None
+    for product in group.get("linked_products") or []:
+        if not (product.get("productId") or product.get("catalogRefId")):
+            continue
+        pack_amount = _resolve_solver_pack_amount(product, unit_type)
+        if pack_amount is None:
+            continue
+        price = _coerce_sale_price_value(product)
+        if price is None:
+            price = _lookup_catalog_price(product)
+        if price is None or not math.isfinite(price) or price < 0:
+            continue
+        smallest_pack = pack_amount if smallest_pack is None else min(smallest_pack, pack_amount)
+        packs = math.ceil(required_amount / pack_amount - 1e-9)
+        if packs < 1 or packs > MAX_SOLVER_PACKS:
+            continue
+        candidate = (packs * price, packs * pack_amount - required_amount, float(packs), product)
+        if best is None or candidate[:3] < best[:3]:
+            best = candidate
+    if best is None or required_amount < SOLVER_MIN_PACK_FRACTION * smallest_pack:
+        return None
+    product = best[3]
+    return _build_result_item(
+        group,
+        {
+            "group_key": group.get("group_key"),
+            "classification": "pickup",
+            "product_id": product.get("productId") or product.get("product_id"),
+            "catalog_ref_id": product.get("catalogRefId") or product.get("catalog_ref_id"),
+            "packages": best[2],
+        },
+    )
+
+
+def _is_pantry_staple(label: Any) -> bool:
+    words = re.findall(r"[a-z]+", str(label or "").lower())
+    return any(" ".join(words[start:]) in SOLVER_PANTRY_STAPLES for start in range(len(words)))
+
+
+def _resolve_solver_pack_amount(product: Dict[str, Any], unit_type: str) -> float | None:
+    amount, pack_unit_type = _extract_pack_measurement(product)
+    if pack_unit_type != unit_type:
+        measurement = _parse_measurement_value(
+            product.get("ingredientLine") or product.get("ingredient_line") or product.get("name")
+        )
+        if not measurement or measurement.get("unit_type") != unit_type:
+            return None
+        amount = measurement.get("base_amount")
+    if not isinstance(amount, (int, float)) or not math.isfinite(amount) or amount <= 0:
+        return None
+    return float(amount)
 
 
 def _extract_group_entry(payload: Dict[str, Any], group_key: Any) -> Dict[str, Any] | None:
@@ -877,133 +1274,170 @@ def _normalize_label(value: Any) -> str | None:
     return text or None
 
 
-def _load_catalog_entries() -> tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
-    settings = get_settings()
-    path = settings.catalog_path or "resolver/catalog.json"
-    try:
-        stat = os.stat(path)
-    except OSError:
-        return {}, {}
-    with _catalog_lock:
-        global _catalog_by_product_id, _catalog_by_catalog_ref, _catalog_cache_mtime, _catalog_cache_path
-        if (
-            _catalog_by_product_id is not None
-            and _catalog_cache_path == path
-            and _catalog_cache_mtime >= stat.st_mtime
-        ):
-            return _catalog_by_product_id or {}, _catalog_by_catalog_ref or {}
-        with open(path, "r", encoding="utf-8") as handle:
-            payload = json.load(handle)
-        entries: List[Dict[str, Any]] = []
-        if isinstance(payload, list):
-            entries = [entry for entry in payload if isinstance(entry, dict)]
-        elif isinstance(payload, dict):
-            if isinstance(payload.get("items"), list):
-                entries = [entry for entry in payload["items"] if isinstance(entry, dict)]
-            else:
-                entries = [entry for entry in payload.values() if isinstance(entry, dict)]
-        by_product: Dict[str, Dict[str, Any]] = {}
-        by_catalog_ref: Dict[str, Dict[str, Any]] = {}
-        for entry in entries:
-            product_id = entry.get("productId") or entry.get("product_id") or entry.get("sku")
-            catalog_ref = entry.get("catalogRefId") or entry.get("catalog_ref_id")
-            if product_id is not None:
-                by_product[str(product_id)] = entry
-            if catalog_ref is not None:
-                by_catalog_ref[str(catalog_ref)] = entry
-        _catalog_by_product_id = by_product
-        _catalog_by_catalog_ref = by_catalog_ref
-        _catalog_cache_mtime = stat.st_mtime
-        _catalog_cache_path = path
-        return by_product, by_catalog_ref
-
-
 def _lookup_catalog_product(product_id: Any, catalog_ref_id: Any) -> Dict[str, Any] | None:
     if product_id is None and catalog_ref_id is None:
         return None
-    by_product, by_catalog_ref = _load_catalog_entries()
-    if product_id is not None:
-        entry = by_product.get(str(product_id))
-        if entry:
-            return entry
-    if catalog_ref_id is not None:
-        entry = by_catalog_ref.get(str(catalog_ref_id))
-        if entry:
-            return entry
-    return None
+    snapshot = peek_catalog_snapshot()
+    if snapshot is None:
+        return None
+    return snapshot.lookup(product_id, catalog_ref_id)
 
 
-def _load_ingredient_product_index() -> Dict[str, List[Dict[str, Any]]]:
+async def load_ingredient_product_index_async() -> IngredientIndex | Dict[str, List[Dict[str, Any]]]:
+    """``_load_ingredient_product_index`` for coroutines.
+
+    A current index is returned directly; opening the artifact, or parsing the
+    JSONL and compiling a new one, runs in a worker thread.
+    """
+    catalog = await get_catalog_snapshot_async()
+    source = _ingredient_index_source(get_settings(), catalog)
+    if source is None:
+        return {}
+    index = _ingredient_product_index
+    if index is not None and _ingredient_product_index_source == source:
+        return index
+    return await run_in_threadpool(_load_ingredient_product_index)
+
+
+def _load_ingredient_product_index() -> IngredientIndex | Dict[str, List[Dict[str, Any]]]:
+    """Label → product options, preferring the compiled artifact over the JSONL.
+
+    The artifact opens in milliseconds. When none matches the classifications
+    and the live catalog version (file or admin import), the JSONL is parsed,
+    joined with that catalog and compiled into a new artifact, so later loads
+    and other workers open it instead. Blocking: call it from a worker thread.
+    """
     settings = get_settings()
+    catalog = get_catalog_snapshot()
+    source = _ingredient_index_source(settings, catalog)
+    if source is None:
+        return {}
+    path = settings.ingredient_classifications_path
+    index_path = settings.ingredient_index_path
+    global _ingredient_product_index, _ingredient_product_index_source
+    with _product_index_lock:
+        if _ingredient_product_index is not None and _ingredient_product_index_source == source:
+            return _ingredient_product_index
+        started = perf_counter()
+        source_sha256 = file_sha256(path) if source[1] is not None else None
+        index: IngredientIndex | Dict[str, List[Dict[str, Any]]] | None = None
+        if source[0] is not None and catalog is not None:
+            index = open_ingredient_index(index_path, catalog_version=catalog.version, source_sha256=source_sha256)
+        if index is None and source[1] is not None:
+            options = build_ingredient_product_index(_read_classification_records(path), catalog)
+            index = _compile_ingredient_index(index_path, options, source_sha256, catalog) or options
+        logger.info(
+            "Loaded ingredient product index compiled=%s labels=%d ms=%.1f",
+            isinstance(index, IngredientIndex),
+            len(index or {}),
+            (perf_counter() - started) * 1000,
+        )
+        if isinstance(_ingredient_product_index, IngredientIndex) and _ingredient_product_index is not index:
+            _ingredient_product_index.close()
+        _ingredient_product_index = index or {}
+        # Re-read: compiling replaced the artifact this key was taken from.
+        _ingredient_product_index_source = _ingredient_index_source(settings, catalog)
+        return _ingredient_product_index
+
+
+def _compile_ingredient_index(
+    index_path: str | None,
+    options: Dict[str, List[Dict[str, Any]]],
+    source_sha256: str | None,
+    catalog: CatalogSnapshot | None,
+) -> IngredientIndex | None:
+    if not index_path or source_sha256 is None or catalog is None:
+        return None
+    try:
+        write_ingredient_index(index_path, options, source_sha256=source_sha256, catalog_version=catalog.version)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning("Could not write ingredient index path=%s: %s", index_path, exc)
+        return None
+    return open_ingredient_index(index_path, catalog_version=catalog.version, source_sha256=source_sha256)
+
+
+def _ingredient_index_source(settings, catalog: CatalogSnapshot | None) -> tuple[Any, Any, Any] | None:
     path = settings.ingredient_classifications_path
     if not path:
-        return {}
+        return None
+    index_path = settings.ingredient_index_path
+    files = (_file_source(index_path) if index_path else None, _file_source(path))
+    if files == (None, None):
+        return None
+    return (*files, catalog.version if catalog is not None else None)
+
+
+def build_ingredient_product_index(
+    records: Iterable[Dict[str, Any]],
+    catalog: CatalogSnapshot | None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Group classification rows by normalised core item, joined with ``catalog``.
+
+    Options carry the parsed ``packageMeasurement`` so the pack solver does not
+    re-parse product lines per request. Also used offline to compile the index
+    artifact.
+    """
+    mapping: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    seen_keys: Dict[str, set[str]] = defaultdict(set)
+    for payload in records:
+        core_name = payload.get("core_item_name") or payload.get("coreItemName")
+        normalized = _normalize_label(core_name)
+        if not normalized:
+            continue
+        product_id = payload.get("product_id") or payload.get("productId") or payload.get("sku")
+        catalog_ref_id = payload.get("catalog_ref_id") or payload.get("catalogRefId")
+        option = _build_classified_product_option(product_id, catalog_ref_id, core_name, catalog)
+        if not option:
+            continue
+        key = option.get("productId") or option.get("catalogRefId") or option.get("name")
+        if not key:
+            continue
+        normalized_key = str(key)
+        if normalized_key in seen_keys[normalized]:
+            continue
+        seen_keys[normalized].add(normalized_key)
+        mapping[normalized].append(option)
+    return dict(mapping)
+
+
+def _read_classification_records(path: str) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for raw_line in handle:
+            line = raw_line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def _file_source(path: str) -> tuple[str, int, int] | None:
     try:
         stat = os.stat(path)
     except OSError:
-        return {}
-    global _ingredient_product_index, _ingredient_product_index_mtime, _ingredient_product_index_path
-    with _product_index_lock:
-        if (
-            _ingredient_product_index is not None
-            and _ingredient_product_index_path == path
-            and _ingredient_product_index_mtime >= stat.st_mtime
-        ):
-            return _ingredient_product_index
-        mapping: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        seen_keys: Dict[str, set[str]] = defaultdict(set)
-        with open(path, "r", encoding="utf-8") as handle:
-            for raw_line in handle:
-                line = raw_line.strip()
-                if not line:
-                    continue
-                try:
-                    payload = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                core_name = payload.get("core_item_name") or payload.get("coreItemName")
-                normalized = _normalize_label(core_name)
-                if not normalized:
-                    continue
-                product_id = (
-                    payload.get("product_id")
-                    or payload.get("productId")
-                    or payload.get("sku")
-                )
-                catalog_ref_id = payload.get("catalog_ref_id") or payload.get("catalogRefId")
-                option = _build_classified_product_option(product_id, catalog_ref_id, core_name)
-                if not option:
-                    continue
-                key = (
-                    option.get("productId")
-                    or option.get("catalogRefId")
-                    or option.get("name")
-                )
-                if not key:
-                    continue
-                normalized_key = str(key)
-                if normalized_key in seen_keys[normalized]:
-                    continue
-                seen_keys[normalized].add(normalized_key)
-                mapping[normalized].append(option)
-        _ingredient_product_index = dict(mapping)
-        _ingredient_product_index_path = path
-        _ingredient_product_index_mtime = stat.st_mtime
-        return _ingredient_product_index
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
 
 
 def _build_classified_product_option(
-    product_id: Any, catalog_ref_id: Any, fallback_name: str | None
+    product_id: Any,
+    catalog_ref_id: Any,
+    fallback_name: str | None,
+    catalog: CatalogSnapshot | None,
 ) -> Dict[str, Any] | None:
     if product_id is None and catalog_ref_id is None and not fallback_name:
         return None
-    catalog_entry = _lookup_catalog_product(product_id, catalog_ref_id)
+    catalog_entry = catalog.lookup(product_id, catalog_ref_id) if catalog is not None else None
     name = fallback_name
     detail_url = None
     sale_price = None
     package_quantity = None
     ingredient_line = fallback_name
     image_url = None
+    package_measurement = None
     if catalog_entry:
         if product_id is None:
             catalog_product_id = (
@@ -1033,6 +1467,9 @@ def _build_classified_product_option(
         )
         ingredient_line = ingredient_line or name
         image_url = catalog_entry.get("imageUrl") or catalog_entry.get("image_url")
+        package_measurement = _parse_measurement_value(
+            catalog_entry.get("size") or catalog_entry.get("name") or catalog_entry.get("title")
+        )
     if product_id is None and catalog_ref_id is None and not name:
         return None
     return {
@@ -1043,6 +1480,7 @@ def _build_classified_product_option(
         "salePrice": sale_price,
         "packageQuantity": package_quantity,
         "ingredientLine": ingredient_line,
+        "packageMeasurement": package_measurement,
         "imageUrl": image_url,
     }
 
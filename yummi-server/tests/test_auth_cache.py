@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import base64
+import time
+
+from jose import jwt
+
+from app import auth
+from app.config import get_settings
+
+SECRET = "test-signing-secret"
+ISSUER = "https://clerk.example.test"
+
+
+def _install_keys(monkeypatch):
+    monkeypatch.setenv("CLERK_ISSUER", ISSUER)
+    monkeypatch.setenv("AUTH_DISABLE_VERIFICATION", "false")
+    get_settings.cache_clear()
+    jwk = {
+        "kty": "oct",
+        "kid": "k1",
+        "alg": "HS256",
+        "k": base64.urlsafe_b64encode(SECRET.encode()).decode().rstrip("="),
+    }
+    cache = auth.JWKSCache()
+    cache._jwks, cache._url = {"keys": [jwk]}, ISSUER + "/.well-known/jwks.json"
+    cache._fetched_at, cache._exp_ts = time.time(), time.time() + 600
+    monkeypatch.setattr(auth, "_jwks_cache", cache)
+    monkeypatch.setattr(auth, "_verified_tokens", auth.VerifiedTokenCache())
+
+
+def test_verified_claims_are_reused_until_expiry(monkeypatch):
+    _install_keys(monkeypatch)
+    decode_calls = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **k: decode_calls.append(1) or real_decode(*a, **k))
+    token = jwt.encode(
+        {"sub": "user-1", "iss": ISSUER, "exp": int(time.time()) + 60},
+        SECRET,
+        algorithm="HS256",
+        headers={"kid": "k1"},
+    )
+    try:
+        assert auth._verify_jwt(token)["sub"] == "user-1"
+        assert auth._verify_jwt(token)["sub"] == "user-1"
+        assert len(decode_calls) == 1
+
+        auth._verified_tokens._entries[auth.VerifiedTokenCache.key(token)] = (time.time() - 1, {"sub": "stale"})
+        assert auth._verify_jwt(token)["sub"] == "user-1"
+        assert len(decode_calls) == 2
+    finally:
+        get_settings.cache_clear()
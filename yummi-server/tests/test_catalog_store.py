@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import replace
+
+import pytest
+
+from app.config import get_settings
+from app.services import catalog_store
+from app.services.catalog_store import (
+    _build_snapshot,
+    _iter_entries,
+    get_catalog_snapshot,
+    get_catalog_snapshot_async,
+    invalidate_catalog_snapshot,
+    peek_catalog_snapshot,
+)
+
+
+@pytest.fixture
+def catalog_path(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json"
+    monkeypatch.setenv("CATALOG_PATH", str(path))
+    monkeypatch.setenv("CATALOG_REFRESH_INTERVAL_SECONDS", "60")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(catalog_store, "_SNAPSHOT", None)
+    monkeypatch.setattr(catalog_store, "_NEXT_CHECK_AT", 0.0)
+    get_settings.cache_clear()
+    yield path
+    get_settings.cache_clear()
+
+
+def test_snapshot_reloads_only_when_the_file_version_changes(catalog_path):
+    catalog_path.write_text(json.dumps({"milk": {"productId": "1", "name": "Milk"}}))
+    first = get_catalog_snapshot()
+    assert first is not None and first.lookup(product_id="1")["name"] == "Milk"
+
+    invalidate_catalog_snapshot()
+    assert get_catalog_snapshot() is first
+
+    catalog_path.write_text(json.dumps({"bread": {"productId": "2", "name": "Brown Bread"}}))
+    # Within the refresh interval the cached snapshot is served without a stat.
+    assert get_catalog_snapshot() is first
+    invalidate_catalog_snapshot()
+    second = get_catalog_snapshot()
+    assert second is not first and second.version != first.version
+    assert second.lookup(product_id="1") is None
+    assert second.lookup(product_id="2")["name"] == "Brown Bread"
+
+
+def test_entries_accept_list_items_and_mapping_layouts():
+    products = [{"productId": "1", "title": "Milk"}, {"catalogRefId": "r2", "name": "Bread"}, "skipped"]
+
+    assert [key for key, _ in _iter_entries(products)] == ["Milk", "Bread"]
+    assert [key for key, _ in _iter_entries({"items": products})] == ["Milk", "Bread"]
+    assert [key for key, _ in _iter_entries({"milk": products[0], "bad": None})] == ["milk"]
+
+    snapshot = _build_snapshot("file", "v1", _iter_entries({"items": products}))
+    assert snapshot.lookup(catalog_ref_id="r2")["name"] == "Bread"
+    assert snapshot.by_key["Milk"] is products[0]
+
+
+def test_sample_with_seed_is_repeatable():
+    snapshot = _build_snapshot("file", "v1", [(f"item_{idx}", {"productId": str(idx)}) for idx in range(50)])
+
+    assert snapshot.sample(5, seed="home") == snapshot.sample(5, seed="home")
+    assert len(snapshot.sample(500, seed="home")) == 50
+
+
+def test_views_are_built_once_per_snapshot_and_sampled_like_entries():
+    snapshot = _build_snapshot("file", "v1", [(f"item_{idx}", {"productId": str(idx)}) for idx in range(50)])
+    calls = []
+
+    def _project(key, entry):
+        calls.append(key)
+        return entry["productId"]
+
+    products = snapshot.view("ids", _project)
+    assert snapshot.view("ids", _project) is products
+    assert len(calls) == 50
+    sampled = snapshot.sample(5, seed="home", population=products)
+    assert sampled == [entry["productId"] for _, entry in snapshot.sample(5, seed="home")]
+    # A snapshot derived for another version starts without the old views.
+    assert replace(snapshot, version="v2").view("ids", _project) is not products
+
+
+def test_async_snapshot_reuses_a_fresh_snapshot_and_reloads_off_loop(catalog_path):
+    catalog_path.write_text(json.dumps({"milk": {"productId": "1", "name": "Milk"}}))
+    first = asyncio.run(get_catalog_snapshot_async())
+    assert first is not None and peek_catalog_snapshot() is first
+    assert asyncio.run(get_catalog_snapshot_async()) is first
+
+    catalog_path.write_text(json.dumps({"bread": {"productId": "2", "name": "Brown Bread"}}))
+    invalidate_catalog_snapshot()
+    second = asyncio.run(get_catalog_snapshot_async())
+    assert second is not first and second.lookup(product_id="2")["name"] == "Brown Bread"
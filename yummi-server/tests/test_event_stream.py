@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.services.event_stream import SSE_KEEPALIVE_COMMENT, stream_workflow_events
+
+
+class _Card(BaseModel):
+    mealId: str
+
+
+class _Summary(BaseModel):
+    meals: int
+
+
+def _parse(frame: str) -> tuple[str, dict]:
+    assert frame.endswith("\n\n")
+    event_line, data_line = frame[:-2].split("\n")
+    assert event_line.startswith("event: ") and data_line.startswith("data: ")
+    return event_line[len("event: ") :], json.loads(data_line[len("data: ") :])
+
+
+class EventStreamTestCase(IsolatedAsyncioTestCase):
+    async def test_meals_keepalive_then_summary(self):
+        async def run(on_meal):
+            on_meal(_Card(mealId="m1"))
+            await asyncio.sleep(0.25)
+            on_meal(_Card(mealId="m2"))
+            return _Summary(meals=2)
+
+        frames = [frame async for frame in stream_workflow_events(run, keepalive_seconds=0.1)]
+
+        self.assertIn(SSE_KEEPALIVE_COMMENT, frames)
+        events = [_parse(frame) for frame in frames if frame != SSE_KEEPALIVE_COMMENT]
+        self.assertEqual(
+            events,
+            [("meal", {"mealId": "m1"}), ("meal", {"mealId": "m2"}), ("summary", {"meals": 2})],
+        )
+
+    async def test_failure_ends_with_error_event(self):
+        async def run(on_meal):
+            on_meal(_Card(mealId="m1"))
+            raise HTTPException(status_code=400, detail="Preferences must be saved")
+
+        frames = [frame async for frame in stream_workflow_events(run, keepalive_seconds=5)]
+
+        self.assertEqual(
+            [_parse(frame) for frame in frames],
+            [("meal", {"mealId": "m1"}), ("error", {"status": 400, "detail": "Preferences must be saved"})],
+        )
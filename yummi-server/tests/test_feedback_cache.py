@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from unittest import IsolatedAsyncioTestCase, mock
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import db
+from app.models import Base, MealFeedbackEvent
+from app.services import meal_feedback
+from app.services.feedback_cache import (
+    clear_feedback_summary_cache,
+    load_cached_feedback_entries,
+    write_through_feedback_entries,
+)
+from app.services.meal_feedback import (
+    MealFeedbackReaction,
+    _load_latest_feedback_entries,
+    load_feedback_summary,
+    record_meal_feedback_events,
+)
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FeedbackSummaryCacheTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self._previous_session = db.SessionLocal
+        db.SessionLocal = async_sessionmaker(self.engine, expire_on_commit=False)
+        clear_feedback_summary_cache()
+
+    async def asyncTearDown(self):
+        db.SessionLocal = self._previous_session
+        clear_feedback_summary_cache()
+        await self.engine.dispose()
+
+    async def _add(self, user_id: str, meal_id: str, reaction: str, minutes: int) -> None:
+        async with db.SessionLocal() as session:
+            session.add(
+                MealFeedbackEvent(
+                    user_id=user_id,
+                    meal_id=meal_id,
+                    reaction=reaction,
+                    source="system",
+                    occurred_at=START + timedelta(minutes=minutes),
+                )
+            )
+            await session.commit()
+
+    async def test_cold_path_returns_latest_reaction_per_meal(self):
+        await self._add("user-1", "meal-a", "like", 1)
+        await self._add("user-1", "meal-a", "dislike", 2)
+        await self._add("user-1", "meal-b", "like", 3)
+        await self._add("user-2", "meal-c", "like", 4)
+
+        entries = await _load_latest_feedback_entries("user-1")
+
+        self.assertEqual({meal_id: entry["reaction"] for meal_id, entry in entries.items()}, {"meal-a": "dislike", "meal-b": "like"})
+
+    async def test_write_through_follows_retention(self):
+        await self._add("user-1", "meal-old", "like", 1)
+        await self._add("user-1", "meal-a", "like", 2)
+        summary = await load_feedback_summary("user-1")
+        self.assertEqual(set(summary.latest_by_meal), {"meal-old", "meal-a"})
+
+        with mock.patch.object(meal_feedback, "MAX_FEEDBACK_EVENTS_PER_USER", 2):
+            await record_meal_feedback_events(
+                user_id="user-1",
+                dislikes=["meal-b"],
+                occurred_at=START + timedelta(minutes=3),
+            )
+            with mock.patch.object(meal_feedback, "_load_latest_feedback_entries", side_effect=AssertionError("cache miss")):
+                cached = await load_feedback_summary("user-1")
+
+        self.assertEqual(set(cached.latest_by_meal), set(await _load_latest_feedback_entries("user-1")))
+        self.assertEqual(set(cached.latest_by_meal), {"meal-a", "meal-b"})
+        self.assertEqual(cached.latest_by_meal["meal-b"].reaction, MealFeedbackReaction.DISLIKE)
+
+    async def test_cold_load_racing_a_write_is_not_cached(self):
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                # A reaction is committed while the cold query is running.
+                await write_through_feedback_entries("user-1", {"meal-a": {"reaction": "like"}})
+            return {}
+
+        self.assertEqual(await load_cached_feedback_entries("user-1", loader), {})
+        self.assertEqual(await load_cached_feedback_entries("user-1", loader), {})
+        self.assertEqual(calls, 2)
+        self.assertEqual(await load_cached_feedback_entries("user-1", loader), {})
+        self.assertEqual(calls, 2)
@@ -3,7 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 from app.schemas import CandidateFilterRequest
-from app.services.filtering import generate_candidate_pool
+from app.services.filtering import ConstraintContext, _filter_manifest, generate_candidate_pool
+from app.services.meals import build_meal_manifest_index
 from app.services.preferences import load_tag_manifest
 
 
@@ -108,7 +109,7 @@ def test_generate_candidate_pool_filters_by_diet_and_allergens():
     )
     request = CandidateFilterRequest()
     result = generate_candidate_pool(
-        manifest=manifest,
+        manifest_index=build_meal_manifest_index(manifest),
         tag_manifest=load_tag_manifest(),
         profile=profile,
         request=request,
@@ -131,7 +132,7 @@ def test_generate_candidate_pool_respects_declined_ids_and_limit():
     )
     request = CandidateFilterRequest(limit=1, declinedMealIds=["meal_vegan"])
     result = generate_candidate_pool(
-        manifest=manifest,
+        manifest_index=build_meal_manifest_index(manifest),
         tag_manifest=load_tag_manifest(),
         profile=profile,
         request=request,
@@ -151,7 +152,7 @@ def test_generate_candidate_pool_enforces_heat_limit_for_mild_users():
     )
     request = CandidateFilterRequest()
     result = generate_candidate_pool(
-        manifest=manifest,
+        manifest_index=build_meal_manifest_index(manifest),
         tag_manifest=load_tag_manifest(),
         profile=profile,
         request=request,
@@ -162,3 +163,59 @@ def test_generate_candidate_pool_enforces_heat_limit_for_mild_users():
     returned_ids = {meal.mealId for meal in result.candidateMeals}
     assert "meal_hot" not in returned_ids
     assert "meal_vegan" in returned_ids
+
+
+def test_filter_manifest_applies_bitset_constraints():
+    manifest = {
+        "manifest_id": "bitset_manifest",
+        "archetypes": [
+            {
+                "uid": "arch_a",
+                "meals": [
+                    {
+                        "meal_id": f"meal_{index}",
+                        "meal_tags": {
+                            "Audience": ["Family"],
+                            "DietaryRestrictions": ["None", "Halal"] if index % 2 else ["None"],
+                            "Allergens": ["Dairy"] if index % 3 == 0 else ["None"],
+                            "Cuisine": ["Italian"] if index % 5 == 0 else ["Thai"],
+                        },
+                    }
+                    for index in range(30)
+                ],
+            },
+            {
+                "uid": "arch_b",
+                "meals": [
+                    {
+                        "meal_id": "meal_single",
+                        "meal_tags": {"Audience": ["Single"], "DietaryRestrictions": ["Halal"]},
+                    }
+                ],
+            },
+        ],
+    }
+    constraints = ConstraintContext(
+        selected_audience="Family",
+        required_dietary_restrictions={"Halal"},
+        disallowed_allergens={"Dairy"},
+        disliked_tag_values={"Cuisine": {"Italian"}},
+        declined_meal_ids={"meal_1"},
+    )
+
+    manifest_index = build_meal_manifest_index(manifest)
+    total, summaries, details = _filter_manifest(manifest_index=manifest_index, constraints=constraints, limit=50)
+
+    expected = [
+        f"meal_{index}"
+        for index in range(30)
+        if index % 2 and index % 3 and index % 5 and index != 1
+    ]
+    assert total == len(expected)
+    assert [summary.mealId for summary in summaries] == expected
+    assert all(detail.archetype_uid == "arch_a" for detail in details)
+
+    total, summaries, _ = _filter_manifest(manifest_index=manifest_index, constraints=constraints, limit=3)
+    assert total == len(expected)
+    assert len(summaries) == 3
+    assert {summary.mealId for summary in summaries} <= set(expected)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import replace
+
+from app.config import get_settings
+from app.services import shopping_list
+from app.services.catalog_store import load_catalog_file
+from app.services.ingredient_index import IngredientIndex, open_ingredient_index, write_ingredient_index
+from app.services.shopping_list import build_ingredient_product_index
+
+
+def test_compiled_index_matches_built_options_and_rejects_other_sources(tmp_path):
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(json.dumps({"cake-flour": {"productId": "111", "name": "Cake Flour 2.5 kg", "salePrice": "49.99"}}))
+    catalog = load_catalog_file(str(catalog_path))
+    records = [
+        {"product_id": "111", "core_item_name": "Cake flour"},
+        {"product_id": "111", "core_item_name": "cake flour"},
+        {"product_id": "222", "core_item_name": "Cake flour"},
+    ]
+    options = build_ingredient_product_index(records, catalog)
+    assert [option["productId"] for option in options["cake flour"]] == ["111", "222"]
+    assert options["cake flour"][0]["packageMeasurement"]["base_amount"] == 2500
+
+    path = str(tmp_path / "index.sqlite")
+    assert write_ingredient_index(path, options, source_sha256="abc", catalog_version=catalog.version) == 2
+
+    index = open_ingredient_index(path, catalog_version=catalog.version, source_sha256="abc")
+    assert index is not None and len(index) == 1
+    assert index.get("cake flour") == options["cake flour"]
+    assert index.get("bread flour") is None
+    index.close()
+    assert index.get("cake flour") is None
+    assert open_ingredient_index(path, catalog_version=catalog.version, source_sha256="changed") is None
+    assert open_ingredient_index(path, catalog_version="other", source_sha256="abc") is None
+
+
+def test_loader_compiles_for_the_live_catalog_and_closes_replaced_index(tmp_path, monkeypatch):
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(json.dumps({"cake-flour": {"productId": "111", "name": "Cake Flour 2.5 kg"}}))
+    classifications = tmp_path / "classifications.jsonl"
+    classifications.write_text(json.dumps({"product_id": "111", "core_item_name": "Cake flour"}) + "\n")
+    index_path = tmp_path / "ingredients" / "index.sqlite"
+    monkeypatch.setenv("INGREDIENT_CLASSIFICATIONS_PATH", str(classifications))
+    monkeypatch.setenv("INGREDIENT_INDEX_PATH", str(index_path))
+    monkeypatch.setattr(shopping_list, "_ingredient_product_index", None)
+    monkeypatch.setattr(shopping_list, "_ingredient_product_index_source", None)
+    catalogs = [load_catalog_file(str(catalog_path))]
+
+    async def _live_catalog():
+        return catalogs[0]
+
+    monkeypatch.setattr(shopping_list, "get_catalog_snapshot", lambda: catalogs[0])
+    monkeypatch.setattr(shopping_list, "get_catalog_snapshot_async", _live_catalog)
+    get_settings.cache_clear()
+    try:
+        options = build_ingredient_product_index([{"product_id": "111", "core_item_name": "Cake flour"}], catalogs[0])
+        # No artifact yet: the JSONL is joined with the live catalog and compiled.
+        compiled = asyncio.run(shopping_list.load_ingredient_product_index_async())
+        assert isinstance(compiled, IngredientIndex)
+        assert compiled.meta["catalog_version"] == catalogs[0].version
+        assert compiled.get("cake flour") == options["cake flour"]
+        assert asyncio.run(shopping_list.load_ingredient_product_index_async()) is compiled
+        assert [path.name for path in index_path.parent.iterdir()] == ["index.sqlite"]
+
+        # An admin import swaps the live catalog: the artifact is rebuilt for it.
+        catalogs[0] = replace(catalogs[0], version="redis:2")
+        rebuilt = asyncio.run(shopping_list.load_ingredient_product_index_async())
+        assert isinstance(rebuilt, IngredientIndex) and rebuilt is not compiled
+        assert rebuilt.meta["catalog_version"] == "redis:2"
+        assert rebuilt.get("cake flour") == options["cake flour"]
+        assert compiled.get("cake flour") is None
+        rebuilt.close()
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import json
+
+from app.services.json_stream import JsonArrayStreamParser
+
+
+def test_parser_emits_elements_as_they_close_across_chunks():
+    payload = {
+        "notes": ["ignore ] and {", "x"],
+        "recommendations": [
+            {"meal_id": "meal_a", "why": "quote \" and ]"},
+            "meal_b",
+            {"meal_id": "meal_c", "nested": [1, {"k": 2}]},
+            7,
+        ],
+    }
+    text = "```json\n" + json.dumps(payload, indent=2) + "\n```"
+    parser = JsonArrayStreamParser("recommendations")
+
+    emitted = []
+    for index in range(0, len(text), 3):
+        emitted.extend(parser.feed(text[index : index + 3]))
+
+    assert emitted == payload["recommendations"]
+
+
+def test_parser_yields_first_element_before_document_completes():
+    parser = JsonArrayStreamParser("explorationSet")
+
+    assert parser.feed('{"other": {"explorationSet": [1]}, "explorationSet": [{"meal_id": "m') == []
+    assert parser.feed('eal_1"}, {"meal_id"') == [{"meal_id": "meal_1"}]
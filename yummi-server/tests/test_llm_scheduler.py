@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from app.services.llm_scheduler import LLMPriority, LLMScheduler
+
+
+class LLMSchedulerTestCase(IsolatedAsyncioTestCase):
+    async def _hold(self, scheduler, order, name, release, *, priority, user_id):
+        async with scheduler.slot(priority=priority, user_id=user_id):
+            order.append(name)
+            await release.wait()
+
+    async def test_priority_and_per_user_quota(self):
+        scheduler = LLMScheduler(max_in_flight=2, per_user_limit=1)
+        order: list[str] = []
+        filler_release = asyncio.Event()
+        release = asyncio.Event()
+        filler = asyncio.create_task(
+            self._hold(scheduler, order, "filler", filler_release, priority=LLMPriority.INTERACTIVE, user_id="filler")
+        )
+        heavy = asyncio.create_task(
+            self._hold(scheduler, order, "heavy-1", release, priority=LLMPriority.INTERACTIVE, user_id="heavy")
+        )
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(self._hold(scheduler, order, "heavy-2", release, priority=LLMPriority.INTERACTIVE, user_id="heavy")),
+            asyncio.create_task(self._hold(scheduler, order, "background", release, priority=LLMPriority.BACKGROUND, user_id="other")),
+            asyncio.create_task(self._hold(scheduler, order, "interactive", release, priority=LLMPriority.INTERACTIVE, user_id="other")),
+        ]
+        for _ in range(3):
+            await asyncio.sleep(0)
+        self.assertEqual(scheduler.queue_depth, 3)
+
+        # heavy-2 is held back by the per-user quota, so the freed slot goes to
+        # the other user's interactive call ahead of its background call.
+        filler_release.set()
+        await filler
+        for _ in range(3):
+            await asyncio.sleep(0)
+        self.assertEqual(order, ["filler", "heavy-1", "interactive"])
+        self.assertEqual(scheduler.in_flight, 2)
+        self.assertEqual(scheduler.queue_depth, 2)
+
+        release.set()
+        await asyncio.gather(heavy, *queued)
+        self.assertEqual(scheduler.in_flight, 0)
+        self.assertEqual(scheduler.queue_depth, 0)
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        scheduler = LLMScheduler(max_in_flight=1, per_user_limit=1)
+        release = asyncio.Event()
+        holder = asyncio.create_task(self._hold(scheduler, [], "holder", release, priority=LLMPriority.INTERACTIVE, user_id=None))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(self._hold(scheduler, [], "waiter", release, priority=LLMPriority.BACKGROUND, user_id=None))
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.queue_depth, 1)
+
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(scheduler.queue_depth, 0)
+
+        release.set()
+        await holder
+        self.assertEqual(scheduler.in_flight, 0)
+
+    async def test_background_waiter_ages_past_newer_interactive_calls(self):
+        now = [0.0]
+        scheduler = LLMScheduler(max_in_flight=1, per_user_limit=1, aging_seconds=5, clock=lambda: now[0])
+        order: list[str] = []
+        releases = {name: asyncio.Event() for name in ("holder", "background", "interactive-1", "interactive-2")}
+
+        def _start(name, priority):
+            return asyncio.create_task(self._hold(scheduler, order, name, releases[name], priority=priority, user_id=name))
+
+        tasks = [_start("holder", LLMPriority.INTERACTIVE)]
+        await asyncio.sleep(0)
+        tasks.append(_start("background", LLMPriority.BACKGROUND))
+        await asyncio.sleep(0)
+        tasks.append(_start("interactive-1", LLMPriority.INTERACTIVE))
+        await asyncio.sleep(0)
+
+        # Fresh interactive calls still win over background work.
+        releases["holder"].set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        self.assertEqual(order, ["holder", "interactive-1"])
+
+        # After two aging periods the background call ranks with interactive
+        # calls and, having queued first, goes next.
+        now[0] = 10.0
+        tasks.append(_start("interactive-2", LLMPriority.INTERACTIVE))
+        await asyncio.sleep(0)
+        releases["interactive-1"].set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        self.assertEqual(order, ["holder", "interactive-1", "background"])
+
+        for release in releases.values():
+            release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order[-1], "interactive-2")
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.services.meals import PARQUET_HEADER_KEY, _load_parquet_manifest, build_meal_manifest_index
+
+
+def _manifest() -> dict:
+    return {
+        "archetypes": [
+            {"uid": "arch-a", "meals": [{"meal_id": "m1", "name": "First"}]},
+            {
+                "uid": "arch-b",
+                "meals": [
+                    {"meal_id": "m1", "name": "Second"},
+                    {"mealId": "m2", "name": "Camel only"},
+                ],
+            },
+        ]
+    }
+
+
+def test_duplicate_meal_ids_keep_the_semantics_of_the_replaced_scans():
+    index = build_meal_manifest_index(_manifest())
+
+    meal, archetype_uid = index.find_meal("m1")
+    assert (meal["name"], archetype_uid) == ("First", "arch-a")
+    assert index.find_meal("m2") == (None, None)
+
+    assert index.latest_recommendation_views["m1"]["name"] == "Second"
+    assert index.latest_recommendation_views["m1"]["archetypeId"] == "arch-b"
+    assert index.latest_recommendation_views["m2"]["name"] == "Camel only"
+
+    latest = index.hydrate_recommendation_meal("m1", rank=3)
+    assert (latest.name, latest.rank, latest.archetypeId) == ("Second", 3, "arch-b")
+    # The first-wins entry is not what the template was built from.
+    assert index.hydrate_recommendation_meal("m1", rank=1, meal=meal) is None
+
+
+def test_parquet_tag_postings_follow_manifest_order(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    import pyarrow as pa
+
+    rows = [
+        ("arch-a", "m1", {"Cuisine": ["Thai"], "Diet": ["Vegan", "Vegan"]}),
+        ("arch-a", "m2", {"Cuisine": ["Italian"]}),
+        ("arch-b", "", {"Cuisine": ["Thai"]}),
+        ("arch-b", "m3", {"Cuisine": ["Thai"], "Diet": ["Halal"]}),
+    ]
+    table = pa.table(
+        {
+            "archetype_uid": [uid for uid, _, _ in rows],
+            "meal_id": [meal_id for _, meal_id, _ in rows],
+            "tags_json": [json.dumps(tags) for _, _, tags in rows],
+        }
+    )
+    # Rows are sorted by uid but the header lists arch-b first.
+    header = {"manifest_id": "pq", "archetypes": [{"uid": "arch-b"}, {"uid": "arch-a"}]}
+    table = table.replace_schema_metadata({PARQUET_HEADER_KEY: json.dumps(header)})
+    path = tmp_path / "meals.parquet"
+    pq.write_table(table, path)
+
+    manifest, tag_postings = _load_parquet_manifest(path)
+    assert tag_postings is not None
+    walked = build_meal_manifest_index(manifest).tags
+    loaded = build_meal_manifest_index(manifest, tag_postings=tag_postings).tags
+    assert loaded.postings == walked.postings
+    assert [meal["meal_id"] for meal, _ in loaded.meals] == ["m3", "m1", "m2"]
+    assert loaded.category_mask("Cuisine", "Thai") == 0b011
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from app.services.memory_store import BoundedTTLStore
+
+
+def test_store_expires_evicts_lru_and_copies():
+    now = [1000.0]
+    store = BoundedTTLStore("test", max_entries=2, default_ttl=60, clock=lambda: now[0])
+
+    order = {"id": "a", "items": [{"sku": "1"}]}
+    store.set("a", order)
+    order["items"].append({"sku": "2"})
+    read = store.get("a")
+    read["items"][0]["sku"] = "mutated"
+    assert store.get("a") == {"id": "a", "items": [{"sku": "1"}]}
+
+    store.set("b", {"id": "b"})
+    store.get("a")
+    store.set("c", {"id": "c"})
+    assert "b" not in store and "a" in store and len(store) == 2
+
+    assert store.set_if_absent("a", {"id": "other"}) == {"id": "a", "items": [{"sku": "1"}]}
+    now[0] += 61
+    assert store.get("a") is None
+    assert store.set_if_absent("a", {"id": "fresh"}, ttl=5) is None
+    assert store.get("a") == {"id": "fresh"}
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.config import get_settings
+from app.services import openai_client
+
+
+def test_sdk_client_is_built_once_per_pool(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    get_settings.cache_clear()
+
+    async def _clients():
+        first = openai_client.get_async_openai_client()
+        second = openai_client.get_async_openai_client()
+        return first, second, openai_client.get_async_http_client()
+
+    try:
+        first, second, pool = asyncio.run(_clients())
+        assert first is second
+        assert first._client is pool
+
+        # A new loop gets a new pool, and the SDK client follows it.
+        third, _, new_pool = asyncio.run(_clients())
+        assert new_pool is not pool
+        assert third is not first and third._client is new_pool
+    finally:
+        asyncio.run(openai_client.close_openai_clients())
+        get_settings.cache_clear()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from app.auth import get_current_principal_async
+from app.config import get_settings
+from app.main import app
+from app.redis_util import blocking_read_slice_seconds
+
+
+class OrderLongPollTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        app.dependency_overrides[get_current_principal_async] = lambda: {"sub": "user-1"}
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        app.dependency_overrides.pop(get_current_principal_async, None)
+
+    async def test_long_poll_returns_when_order_changes(self):
+        created = await self.client.post(
+            "/v1/orders",
+            json={"retailer": "woolworths", "items": [{"title": "Milk", "qty": 1}]},
+        )
+        order_id = created.json()["order_id"]
+
+        async def _ack_later():
+            await asyncio.sleep(0.2)
+            await self.client.post(f"/v1/orders/{order_id}/ack")
+
+        started = time.monotonic()
+        polled, _ = await asyncio.gather(
+            self.client.get(f"/v1/orders/{order_id}", params={"waitSeconds": 10}),
+            _ack_later(),
+        )
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(polled.json()["status"], "completed")
+        self.assertEqual(polled.json()["version"], 2)
+
+        # A client that is behind gets the current state without waiting.
+        stale = await self.client.get(f"/v1/orders/{order_id}", params={"waitSeconds": 10, "sinceVersion": 1})
+        self.assertEqual(stale.json()["version"], 2)
+
+
+def test_listen_slice_stays_under_the_socket_timeout(monkeypatch):
+    try:
+        for socket_timeout, expected in (("5", 4.0), ("1.5", 0.75)):
+            monkeypatch.setenv("REDIS_SOCKET_TIMEOUT_SECONDS", socket_timeout)
+            get_settings.cache_clear()
+            assert blocking_read_slice_seconds() == expected
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+from fastapi import Depends, FastAPI
+from limits.storage import MemoryStorage
+from limits.strategies import MovingWindowRateLimiter
+
+from app import ratelimit
+from app.auth import get_current_principal_async
+from app.config import get_settings
+from app.ratelimit import user_budget
+
+
+class _FlakyStorage(MemoryStorage):
+    down = True
+
+    def check(self) -> bool:
+        return not self.down
+
+    def acquire_entry(self, *args, **kwargs) -> bool:
+        if self.down:
+            raise ConnectionError("redis down")
+        return super().acquire_entry(*args, **kwargs)
+
+
+class UserBudgetTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        get_settings.cache_clear()
+        settings = get_settings()
+        self._previous_budget = settings.rate_limit_user_budget
+        settings.rate_limit_user_budget = "20/minute"
+        self.app = FastAPI()
+
+        @self.app.get("/llm", dependencies=[Depends(user_budget(8))])
+        async def llm():
+            return {"ok": True}
+
+        @self.app.get("/read", dependencies=[Depends(user_budget(1))])
+        async def read():
+            return {"ok": True}
+
+        self.app.dependency_overrides[get_current_principal_async] = lambda: {"sub": self.id()}
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        get_settings().rate_limit_user_budget = self._previous_budget
+
+    async def test_weighted_costs_share_one_budget(self):
+        self.assertEqual((await self.client.get("/llm")).status_code, 200)
+        self.assertEqual((await self.client.get("/llm")).status_code, 200)
+        for _ in range(4):
+            self.assertEqual((await self.client.get("/read")).status_code, 200)
+
+        # 8 + 8 + 4 reads used the 20-unit window; one more read is refused.
+        refused = await self.client.get("/read")
+        self.assertEqual(refused.status_code, 429)
+        self.assertGreaterEqual(int(refused.headers["Retry-After"]), 1)
+        self.assertLessEqual(int(refused.headers["Retry-After"]), 60)
+
+    async def test_storage_error_falls_back_to_memory(self):
+        storage = _FlakyStorage()
+        budget = ratelimit._BudgetStorage(MovingWindowRateLimiter(storage), MovingWindowRateLimiter(MemoryStorage()))
+        saved = ratelimit._budget_storage
+        ratelimit._budget_storage = budget
+        try:
+            self.assertEqual((await self.client.get("/llm")).status_code, 200)
+            self.assertTrue(budget.primary_dead)
+            self.assertEqual((await self.client.get("/llm")).status_code, 200)
+            # The fallback enforces the same budget while Redis is away.
+            self.assertEqual((await self.client.get("/llm")).status_code, 429)
+
+            # Once the primary answers its health check again, charges go back to it.
+            budget._next_check_at = 0.0
+            storage.down = False
+            self.assertEqual((await self.client.get("/llm")).status_code, 200)
+            self.assertFalse(budget.primary_dead)
+        finally:
+            ratelimit._budget_storage = saved
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from app.services.shopping_list import _BatchSizeTuner
+
+
+def _settings() -> SimpleNamespace:
+    return SimpleNamespace(
+        openai_shopping_list_max_output_tokens=2400,
+        shopping_list_batch_max_groups=20,
+        shopping_list_batch_target_seconds=30.0,
+    )
+
+
+def test_batch_tuner_recovers_after_one_slow_call():
+    settings = _settings()
+    tuner = _BatchSizeTuner()
+    assert tuner.chunk_size(settings) == 20
+
+    # One stalled call would put the latency cap at zero groups.
+    tuner.observe(120.0, 2)
+    assert tuner.chunk_size(settings) == 2
+
+    size = 2
+    for _ in range(30):
+        # 6s fixed overhead plus 1s per group.
+        tuner.observe(6.0 + size, size)
+        size = tuner.chunk_size(settings)
+    assert size == 20
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from app.services.shopping_list import _solve_group_packs, _summarize_requirement
+
+
+def _group(entries: list[dict], products: list[dict]) -> dict:
+    return {
+        "group_key": "flour",
+        "label": "Cake flour",
+        "entries": entries,
+        "requirement_summary": _summarize_requirement(entries),
+        "linked_products": products,
+    }
+
+
+def _entry(meal_id: str, grams: float) -> dict:
+    return {
+        "entry_id": f"{meal_id}-0",
+        "meal_id": meal_id,
+        "meal_name": meal_id,
+        "quantity_text": f"{grams} g",
+        "required_quantity": 1.0,
+        "requirement_measurement": {"base_amount": grams, "unit_type": "weight", "unit_label": "g"},
+    }
+
+
+def test_solver_picks_cheapest_covering_pack_count():
+    group = _group(
+        [_entry("meal_a", 700), _entry("meal_b", 600)],
+        [
+            {"productId": "small", "name": "Cake Flour 500g", "salePrice": 21.0},
+            {"productId": "large", "name": "Cake Flour 2.5kg", "salePrice": 65.0},
+            {"productId": "mid", "name": "Cake Flour", "salePrice": 30.0,
+             "packageMeasurement": {"base_amount": 1000, "unit_type": "weight", "unit_label": "g"}},
+        ],
+    )
+
+    item = _solve_group_packs(group)
+
+    # 2 x 1kg (60.00) beats 3 x 500g (63.00) and 1 x 2.5kg (65.00).
+    assert item is not None
+    assert item.classification == "pickup"
+    assert [(product.productId, product.packages) for product in item.linkedProducts] == [("mid", 2.0)]
+    assert item.requiredQuantity == 2.0
+
+
+def test_solver_defers_unmeasurable_groups_to_model():
+    counted = _group(
+        [
+            {
+                "entry_id": "meal_a-0",
+                "meal_id": "meal_a",
+                "requirement_measurement": {"base_amount": 2, "unit_type": "count", "unit_label": "count"},
+            }
+        ],
+        [{"productId": "eggs", "name": "Eggs 6 pack", "salePrice": 30.0}],
+    )
+    unpriced = _group([_entry("meal_a", 300)], [{"productId": "small", "name": "Cake Flour 500g"}])
+
+    assert _solve_group_packs(counted) is None
+    assert _solve_group_packs(unpriced) is None
+
+
+def test_solver_leaves_pantry_and_small_amounts_to_model():
+    salt = _group([_entry("meal_a", 5)], [{"productId": "salt", "name": "Fine Salt 1kg", "salePrice": 12.0}])
+    salt["label"] = "Salt"
+    oil = _group(
+        [_entry("meal_a", 400), _entry("meal_b", 400)],
+        [{"productId": "oil", "name": "Olive Oil 750g", "salePrice": 120.0}],
+    )
+    oil["label"] = "Extra virgin olive oil"
+    pinch = _group([_entry("meal_a", 20)], [{"productId": "small", "name": "Cake Flour 500g", "salePrice": 21.0}])
+
+    assert _solve_group_packs(salt) is None
+    assert _solve_group_packs(oil) is None
+    assert _solve_group_packs(pinch) is None
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+from app.config import get_settings
+from app.main import app
+from app.redis_util import close_redis_clients, get_async_blocking_redis, get_async_redis
+from app.routes import thin
+
+
+class ThinQueueTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        thin._mem_orders.clear()
+        with thin._mem_lock:
+            thin._mem_pending.clear()
+            thin._mem_claims.clear()
+        thin._last_reap_at = 0.0
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/v1/thin")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def _place(self, title: str) -> str:
+        response = await self.client.post("/orders/place", json={"items": [{"title": title}]})
+        return response.json()["orderId"]
+
+    async def test_claim_ack_and_requeue_expired_claim(self):
+        first = await self._place("Milk")
+        second = await self._place("Bread")
+
+        claimed = await self.client.get("/orders/next", params={"workerId": "runner-1"})
+        self.assertEqual((claimed.json()["id"], claimed.json()["status"]), (first, "claimed"))
+        await self.client.post(f"/orders/{first}/ack", json={"status": "completed"})
+        self.assertEqual((await self.client.get(f"/orders/{first}")).json()["status"], "completed")
+
+        claimed = await self.client.get("/orders/next", params={"workerId": "runner-1"})
+        self.assertEqual(claimed.json()["id"], second)
+        # The runner goes away; once its visibility deadline passes the order
+        # goes back to the front of the queue for the next runner.
+        with thin._mem_lock:
+            thin._mem_claims[second] = time.time() - 1
+        thin._last_reap_at = 0.0
+        reclaimed = await self.client.get("/orders/next", params={"workerId": "runner-2"})
+        self.assertEqual((reclaimed.json()["id"], reclaimed.json()["claimedBy"]), (second, "runner-2"))
+
+        self.assertEqual((await self.client.get("/orders/next")).status_code, 204)
+
+    async def test_acked_order_is_not_handed_out_again(self):
+        order_id = await self._place("Eggs")
+        await self.client.get("/orders/next")
+        await self.client.post(f"/orders/{order_id}/ack", json={"status": "failed", "error": "login"})
+        # A stale copy of the id left in the queue is dropped on claim.
+        with thin._mem_lock:
+            thin._mem_pending.append(order_id)
+
+        self.assertEqual((await self.client.get("/orders/next")).status_code, 204)
+        self.assertEqual((await self.client.get(f"/orders/{order_id}")).json()["status"], "failed")
+
+    async def test_long_poll_returns_when_an_order_is_placed(self):
+        async def _place_later():
+            await asyncio.sleep(0.2)
+            return await self._place("Cheese")
+
+        started = time.monotonic()
+        claimed, order_id = await asyncio.gather(
+            self.client.get("/orders/next", params={"waitSeconds": 10}),
+            _place_later(),
+        )
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(claimed.json()["id"], order_id)
+
+    async def test_claim_retries_share_one_deadline(self):
+        order_id = await self._place("Butter")
+        await self.client.get("/orders/next")
+        await self.client.post(f"/orders/{order_id}/ack", json={"status": "completed"})
+        waits: list[float] = []
+
+        async def _claim(wait_seconds):
+            # Every claim turns up the finished order, forcing a retry.
+            waits.append(wait_seconds)
+            await asyncio.sleep(min(wait_seconds, 0.2))
+            return order_id
+
+        with mock.patch.object(thin, "_claim_next_id", _claim):
+            response = await self.client.get("/orders/next", params={"waitSeconds": 0.3})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(waits), 3)
+        self.assertAlmostEqual(waits[0], 0.3, delta=0.05)
+        self.assertLess(waits[1], 0.15)
+        self.assertEqual(waits[2], 0.0)
+
+    async def test_blocking_pops_use_their_own_pool(self):
+        with mock.patch.dict("os.environ", {"REDIS_URL": "redis://localhost:6399/0", "REDIS_BLOCKING_MAX_CONNECTIONS": "3"}):
+            get_settings.cache_clear()
+            try:
+                shared = get_async_redis()
+                blocking = get_async_blocking_redis()
+                self.assertIsNot(shared.connection_pool, blocking.connection_pool)
+                self.assertEqual(blocking.connection_pool.max_connections, 3)
+                self.assertIs(get_async_blocking_redis(), blocking)
+            finally:
+                await close_redis_clients()
+                get_settings.cache_clear()
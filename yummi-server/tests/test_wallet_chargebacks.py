@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
 from unittest import IsolatedAsyncioTestCase
 
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
-from app.models import Base, PaymentStatus
+from app.models import Base, PaymentStatus, WalletAccountState, WalletTransaction
 from app.services import payments as payment_service
 from app.services.payments import (
     create_payfast_payment,
     ensure_wallet_credit_for_payment,
     get_user_wallet_summary,
+    list_wallet_transactions,
+    reconcile_wallet_balances,
     record_chargeback,
     request_wallet_refund,
 )
@@ -86,3 +90,52 @@ class WalletChargebackRefundTest(IsolatedAsyncioTestCase):
             self.assertTrue(payload["spendBlocked"])
             self.assertTrue(summary["spendBlocked"])
             self.assertEqual(payload["lockReason"], "review")
+
+    async def test_reconcile_repairs_materialized_balance_drift(self):
+        async with self.Session() as session:
+            await self._create_funded_payment(session, amount_minor=1500)
+            clean = await reconcile_wallet_balances(session)
+            self.assertEqual(clean["drift"], [])
+
+            state = await session.get(WalletAccountState, "user-1")
+            self.assertEqual(state.balance_minor, 1500)
+            state.balance_minor = 10
+            await session.commit()
+
+            report = await reconcile_wallet_balances(session, repair=True)
+            self.assertEqual(
+                report["drift"],
+                [{"userId": "user-1", "ledgerMinor": 1500, "materializedMinor": 10}],
+            )
+            summary = await get_user_wallet_summary(session, "user-1")
+            self.assertEqual(summary["balanceMinor"], 1500)
+
+    async def test_transaction_history_pages_with_cursor(self):
+        async with self.Session() as session:
+            await self._create_funded_payment(session, amount_minor=3000)
+            for amount in (100, 200, 300):
+                await request_wallet_refund(
+                    session,
+                    user_id="user-1",
+                    user_email="user@example.com",
+                    amount_minor=amount,
+                    reason=None,
+                    actor_email=None,
+                )
+            # SQLite's CURRENT_TIMESTAMP has second precision; spread the rows out.
+            txns = (await session.execute(select(WalletTransaction))).scalars().all()
+            base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+            for offset, txn in enumerate(sorted(txns, key=lambda t: t.transaction_type != "top_up")):
+                txn.created_at = base + timedelta(minutes=offset)
+            await session.commit()
+
+            first, cursor = await list_wallet_transactions(session, "user-1", limit=3)
+            self.assertIsNotNone(cursor)
+            rest, end_cursor = await list_wallet_transactions(session, "user-1", limit=3, cursor=cursor)
+            self.assertIsNone(end_cursor)
+            ids = [entry["id"] for entry in first + rest]
+            self.assertEqual(len(ids), 4)
+            self.assertEqual(len(set(ids)), 4)
+            self.assertEqual(rest[-1]["transactionType"], "top_up")
+            with self.assertRaises(ValueError):
+                await list_wallet_transactions(session, "user-1", cursor="not-a-cursor")